@@ -1,93 +1,288 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import AnyHttpUrl, BaseModel
+from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
 from apscheduler.schedulers.background import BackgroundScheduler
-import requests
-from datetime import datetime
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 import uuid
-import json
 import os
+import time
+
+from executor import AsyncJobExecutor
+from job_store import RECURRING_TRIGGERS, create_job_store, import_legacy_jobs
+from metrics import CONTENT_TYPE, MetricsMiddleware, TimedCalls, Tracer, registry, tracing_enabled
 
 app = FastAPI()
+app.add_middleware(MetricsMiddleware, registry=registry)
 scheduler = BackgroundScheduler()
 scheduler.start()
 
 JOBS_FILE = "jobs.json"
+JOB_STORE_URL = os.getenv("JOB_STORE_URL", "sqlite:///jobs.db")
+# Only jobs due within this window are held in APScheduler; the rest stay in the store
+SCHEDULE_WINDOW = timedelta(seconds=int(os.getenv("SCHEDULE_WINDOW_SECONDS", "3600")))
+# Finished jobs (with their outcome) are kept this long before being purged
+JOB_HISTORY = timedelta(seconds=int(os.getenv("JOB_HISTORY_SECONDS", "604800")))
+# Upper bound on jobs accepted by one /schedule-jobs/ request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# Scheduler lag buckets (seconds): APScheduler normally fires within milliseconds;
+# the long tail shows jobs that came due while the service was down
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 3600)
+LOAD_JOB_ID = "load-upcoming-jobs"
+
+STORE_SECONDS = registry.histogram("job_store_operation_seconds", "Job store call latency", ["operation"])
+STORE_ERRORS = registry.counter("job_store_operation_errors_total", "Job store calls that raised", ["operation"])
+SCHEDULER_LAG = registry.histogram("scheduler_lag_seconds",
+                                   "Time between a job's scheduled run time and APScheduler firing it",
+                                   buckets=LAG_BUCKETS)
+SCHEDULER_FIRED = registry.counter("scheduler_jobs_fired_total", "Job runs handed to the executor")
+SCHEDULER_MISSED = registry.counter("scheduler_jobs_missed_total", "Job runs APScheduler skipped as misfired")
+SCHEDULER_ERRORS = registry.counter("scheduler_job_errors_total", "Job runs that raised before reaching the executor")
+JOBS_LOADED = registry.counter("scheduler_jobs_loaded_total", "Stored jobs moved into APScheduler by window loads")
+tracer = Tracer(registry, "scheduler", tracing_enabled())
 
-# Ensure jobs file exists
-if not os.path.exists(JOBS_FILE):
-    with open(JOBS_FILE, "w") as f:
-        json.dump([], f)
+# All job store calls are timed per operation
+job_store = TimedCalls(create_job_store(JOB_STORE_URL), STORE_SECONDS, STORE_ERRORS)
+executor = AsyncJobExecutor(
+    job_store.record_results,
+    max_connections=int(os.getenv("EXECUTOR_MAX_CONNECTIONS", "500")),
+    per_host_limit=int(os.getenv("EXECUTOR_PER_HOST_LIMIT", "100")),
+    timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", "10")),
+    max_retries=int(os.getenv("JOB_MAX_RETRIES", "3")),
+)
 
 class JobRequest(BaseModel):
-    url: str
+    url: AnyHttpUrl  # Rejected with a 422 before it reaches the executor
     payload: dict
-    run_at: datetime  # Format: "YYYY-MM-DD HH:MM:SS"
+    # Format: "YYYY-MM-DD HH:MM:SS"; required for "date" jobs, first run for recurring ones
+    run_at: Optional[datetime] = None
+    trigger: Literal["date", "interval", "cron"] = "date"
+    interval_seconds: Optional[int] = None  # For "interval" jobs
+    cron: Optional[str] = None  # For "cron" jobs: "minute hour day month day_of_week"
+    end_at: Optional[datetime] = None  # Recurring jobs stop after this time
 
-# Load jobs from JSON file
-def load_jobs():
-    with open(JOBS_FILE, "r") as f:
-        return json.load(f)
+# Queue depth: jobs held in APScheduler (due within the window) and jobs in the store by status
+registry.gauge("scheduler_jobs_scheduled", "Jobs held in APScheduler",
+               function=lambda: sum(1 for job in scheduler.get_jobs() if job.id != LOAD_JOB_ID))
+registry.gauge("job_store_jobs", "Stored jobs by status", ["status"],
+               function=lambda: {status: job_store.count([status])
+                                 for status in ("pending", "running", "succeeded", "failed")})
 
-# Save jobs to JSON file
-def save_jobs(jobs):
-    with open(JOBS_FILE, "w") as f:
-        json.dump(jobs, f, indent=4, default=str)
-
-# Function to execute the job
-def execute_job(job_id, url, payload):
-    try:
-        response = requests.post(url, json=payload)
-        print(f"POST request sent to {url} with status {response.status_code}")
-    except Exception as e:
-        print(f"Failed to send request: {str(e)}")
+# APScheduler events: lag of every run handed over (coalesced runs count once each), misfires and errors
+def record_scheduler_event(event):
+    if event.job_id == LOAD_JOB_ID:
+        return
+    if event.code == EVENT_JOB_SUBMITTED:
+        now = datetime.now(timezone.utc)
+        SCHEDULER_FIRED.inc()
+        for run_time in event.scheduled_run_times:
+            SCHEDULER_LAG.observe(max((now - run_time).total_seconds(), 0.0))
+    elif event.code == EVENT_JOB_MISSED:
+        SCHEDULER_MISSED.inc()
+    else:
+        SCHEDULER_ERRORS.inc()
+        print(f"Job {event.job_id} failed: {event.exception!r}")
 
-    # Remove job from JSON file after execution
-    jobs = load_jobs()
-    jobs = [job for job in jobs if job["id"] != job_id]
-    save_jobs(jobs)
+scheduler.add_listener(record_scheduler_event, EVENT_JOB_SUBMITTED | EVENT_JOB_MISSED | EVENT_JOB_ERROR)
 
-# Endpoint to schedule a job
-@app.post("/schedule-job/")
-def schedule_job(job_request: JobRequest):
-    job_id = str(uuid.uuid4())  # Generate unique job ID
+# Validate a job request and turn it into a stored job
+def build_job(job_request: JobRequest):
     job_data = {
-        "id": job_id,
-        "url": job_request.url,
+        "id": str(uuid.uuid4()),  # Generate unique job ID
+        "url": str(job_request.url),
         "payload": job_request.payload,
-        "run_at": job_request.run_at,
+        "run_at": job_request.run_at or datetime.now().replace(microsecond=0),
+        "trigger": job_request.trigger,
     }
 
-    # Save job to JSON file
-    jobs = load_jobs()
-    jobs.append(job_data)
-    save_jobs(jobs)
+    if job_request.trigger == "date":
+        if job_request.run_at is None:
+            raise ValueError("run_at is required for date jobs")
+    elif job_request.trigger == "interval":
+        if not job_request.interval_seconds or job_request.interval_seconds <= 0:
+            raise ValueError("interval_seconds must be a positive number of seconds")
+        job_data["trigger_args"] = {"interval_seconds": job_request.interval_seconds}
+    else:
+        if not job_request.cron:
+            raise ValueError("cron is required for cron jobs")
+        job_data["trigger_args"] = {"cron": job_request.cron}
+
+    if job_request.end_at is not None and job_request.trigger in RECURRING_TRIGGERS:
+        job_data["trigger_args"]["end_at"] = job_request.end_at
+
+    build_trigger(job_data)  # Rejects malformed cron expressions
+    return job_data
+
+# Build the APScheduler trigger for a stored job
+def build_trigger(job_data):
+    trigger_args = job_data.get("trigger_args") or {}
+    end_at = trigger_args.get("end_at")
+
+    if job_data.get("trigger", "date") == "date":
+        return DateTrigger(run_date=job_data["run_at"])
+    if job_data["trigger"] == "interval":
+        return IntervalTrigger(seconds=trigger_args["interval_seconds"],
+                               start_date=job_data["run_at"], end_date=end_at)
+
+    # Same fields as CronTrigger.from_crontab, plus the start and end dates
+    fields = trigger_args["cron"].split()
+    if len(fields) != 5:
+        raise ValueError(f"Wrong number of cron fields; got {len(fields)}, expected 5")
+    minute, hour, day, month, day_of_week = fields
+    return CronTrigger(minute=minute, hour=hour, day=day, month=month, day_of_week=day_of_week,
+                       start_date=job_data["run_at"], end_date=end_at)
+
+# Function to execute the job
+def execute_job(job_id, url, payload, recurring=False):
+    # Skip one-shot jobs that were removed or are already being executed;
+    # recurring jobs stay pending and only leave APScheduler when removed
+    if not recurring and not job_store.claim(job_id):
+        return
+
+    # The POST, retries and outcome recording happen on the async executor
+    executor.submit(job_id, url, payload)
+
+# Add a stored job to APScheduler
+def schedule_in_scheduler(job_data):
+    trigger = build_trigger(job_data)
+    recurring = job_data.get("trigger", "date") in RECURRING_TRIGGERS
+
+    # Recurring jobs past their end date are finished rather than rescheduled
+    if recurring and trigger.get_next_fire_time(None, datetime.now(trigger.timezone)) is None:
+        job_store.expire(job_data["id"])
+        return
 
-    # Schedule the job in APScheduler
     scheduler.add_job(
         execute_job,
-        "date",
-        run_date=job_request.run_at,
-        args=[job_id, job_request.url, job_request.payload],
-        id=job_id,
+        trigger,
+        args=[job_data["id"], job_data["url"], job_data["payload"], recurring],
+        id=job_data["id"],
+        replace_existing=True,
+        coalesce=True,  # A recurring job that missed several runs fires once
+        misfire_grace_time=None,  # Jobs that came due while the service was down still run
     )
 
-    return {"message": "Job scheduled", "job_id": job_id}
+# Move jobs that come due within the window from the store into APScheduler
+def load_upcoming_jobs():
+    job_store.purge_finished(datetime.now() - JOB_HISTORY)
+
+    loaded = 0
+    with tracer.span("load_upcoming_jobs"):
+        for job_data in job_store.due(datetime.now() + SCHEDULE_WINDOW):
+            if scheduler.get_job(job_data["id"]) is None:
+                schedule_in_scheduler(job_data)
+                loaded += 1
+    JOBS_LOADED.inc(loaded)
+    return loaded
+
+# Reload pending jobs into the scheduler on startup
+@app.on_event("startup")
+def rehydrate_jobs():
+    imported = import_legacy_jobs(job_store, JOBS_FILE)
+    if imported:
+        print(f"Imported {imported} jobs from {JOBS_FILE}")
+
+    executor.start()
 
-# Endpoint to get all scheduled jobs from JSON
+    # Jobs interrupted mid-execution by a restart run again
+    job_store.release_claims()
+
+    loaded = load_upcoming_jobs()
+    scheduler.add_job(
+        load_upcoming_jobs,
+        "interval",
+        seconds=max(SCHEDULE_WINDOW.total_seconds() / 2, 1),
+        id=LOAD_JOB_ID,
+        replace_existing=True,
+    )
+    print(f"Rehydrated {loaded} of {job_store.count()} pending jobs")
+
+@app.on_event("shutdown")
+def shutdown():
+    scheduler.shutdown(wait=False)
+    executor.shutdown()
+    job_store.close()
+
+# Whether a stored job starts before the next window load
+def in_window(job_data):
+    return job_data["run_at"].timestamp() <= time.time() + SCHEDULE_WINDOW.total_seconds()
+
+# Endpoint to schedule a job
+@app.post("/schedule-job/")
+def schedule_job(job_request: JobRequest):
+    try:
+        with tracer.span("build_job"):
+            job_data = build_job(job_request)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Persist the job; schedule it now if it is due before the next window load
+    job_store.add(job_data)
+    if in_window(job_data):
+        with tracer.span("schedule_in_scheduler"):
+            schedule_in_scheduler(job_data)
+
+    return {"message": "Job scheduled", "job_id": job_data["id"]}
+
+# Endpoint to schedule a batch of jobs in one request and one store transaction
+@app.post("/schedule-jobs/")
+def schedule_jobs(job_requests: List[JobRequest]):
+    if len(job_requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} jobs per request")
+
+    # Validate the whole batch first so it is stored all-or-nothing
+    jobs = []
+    with tracer.span("build_jobs"):
+        for index, job_request in enumerate(job_requests):
+            try:
+                jobs.append(build_job(job_request))
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=f"Job {index}: {str(e)}")
+
+    job_store.add_many(jobs)
+    with tracer.span("schedule_in_scheduler"):
+        for job_data in jobs:
+            if in_window(job_data):
+                schedule_in_scheduler(job_data)
+
+    return {"message": "Jobs scheduled", "job_ids": [job_data["id"] for job_data in jobs]}
+
+# Endpoint to get scheduled jobs, ordered by run_at
+# (pending/running by default; pass status=succeeded or status=failed for history)
 @app.get("/jobs/")
-def get_jobs():
-    return load_jobs()
+def get_jobs(limit: Optional[int] = None, offset: int = 0, status: Optional[str] = None):
+    if status is None:
+        return job_store.list_jobs(limit=limit, offset=offset)
+    return job_store.list_jobs(limit=limit, offset=offset, statuses=[status])
+
+# Endpoint to get a single scheduled job
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job_data = job_store.get(job_id)
+    if job_data is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_data
 
 # Endpoint to remove a job
 @app.delete("/jobs/{job_id}")
 def remove_job(job_id: str):
-    jobs = load_jobs()
-    new_jobs = [job for job in jobs if job["id"] != job_id]
-    
-    if len(jobs) == len(new_jobs):
+    if not job_store.remove(job_id):
         raise HTTPException(status_code=404, detail="Job not found")
 
-    save_jobs(new_jobs)
-    scheduler.remove_job(job_id)
+    try:
+        scheduler.remove_job(job_id)
+    except JobLookupError:
+        pass  # Already fired
 
     return {"message": "Job removed", "job_id": job_id}
+
+# Prometheus metrics: route latency and payload sizes, scheduler lag and queue depth,
+# executor outcomes, job store timings and trace spans
+@app.get("/metrics")
+def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
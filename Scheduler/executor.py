@@ -0,0 +1,175 @@
+import asyncio
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from metrics import registry
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+JOBS = registry.counter("executor_jobs_total", "Executed jobs by outcome", ["outcome"])
+JOB_SECONDS = registry.histogram("executor_job_seconds", "Job execution time including retries", ["outcome"])
+ATTEMPTS = registry.counter("executor_attempts_total", "POST attempts by status code or error type", ["result"])
+REQUEST_SECONDS = registry.histogram("executor_request_seconds", "Latency of a single job POST")
+QUEUE_WAIT = registry.histogram("executor_queue_wait_seconds",
+                                "Time from submit() to the first POST, including per-host limit waits")
+IN_FLIGHT = registry.gauge("executor_jobs_in_flight", "Jobs submitted and not yet finished")
+RESULT_FLUSH_FAILURES = registry.counter("executor_result_flush_failures_total",
+                                         "Result batches the job store failed to record")
+
+
+class AsyncJobExecutor:
+    """
+    Fire job POSTs from a dedicated asyncio loop over one pooled httpx client.
+
+    APScheduler threads only hand jobs over with submit(), so a burst of jobs
+    sharing a run_at no longer ties up the scheduler's thread pool. Requests
+    are capped globally and per host, time out, and are retried with
+    exponential backoff. Outcomes (status, latency, attempts, error) are
+    handed to `on_results` in batches from a worker thread.
+    """
+
+    def __init__(self, on_results: Callable[[List[dict]], None], max_connections: int = 500,
+                 per_host_limit: int = 100, timeout: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 flush_interval: float = 0.1, flush_size: int = 500):
+        self.on_results = on_results
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._results: List[dict] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        """Start the event loop thread and the shared client."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="job-executor", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+        )
+        self._host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        self._flusher = self._loop.create_task(self._flush_periodically())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def submit(self, job_id: str, url: str, payload: dict) -> Future:
+        """Schedule a job POST on the executor loop; safe to call from any thread."""
+        IN_FLIGHT.inc()
+        return asyncio.run_coroutine_threadsafe(self._execute(job_id, url, payload, time.perf_counter()),
+                                                self._loop)
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.status_code == 429:
+            try:
+                return min(float(response.headers.get("Retry-After", "")), self.backoff_max)
+            except ValueError:
+                pass
+        return min(self.backoff_base * (2 ** attempt), self.backoff_max) * random.uniform(0.5, 1.0)
+
+    async def _execute(self, job_id: str, url: str, payload: dict, submitted: float) -> dict:
+        result = {"id": job_id, "status": "failed", "status_code": None, "attempts": 0,
+                  "latency_ms": None, "error": None}
+        start = time.perf_counter()
+
+        # Anything but a transport error (a malformed URL, a bug) fails the job rather than
+        # escaping the task, so the result is still recorded and IN_FLIGHT released
+        try:
+            async with self._host_limits[urlsplit(url).netloc]:
+                QUEUE_WAIT.observe(time.perf_counter() - submitted)
+                for attempt in range(self.max_retries + 1):
+                    response = None
+                    result["attempts"] = attempt + 1
+                    attempt_start = time.perf_counter()
+                    try:
+                        response = await self._client.post(url, json=payload)
+                        result["status_code"] = response.status_code
+                        result["error"] = None
+                        ATTEMPTS.labels(response.status_code).inc()
+                        if response.status_code not in RETRY_STATUS_CODES:
+                            break
+                    except httpx.HTTPError as e:
+                        result["error"] = f"{type(e).__name__}: {e}"
+                        ATTEMPTS.labels(type(e).__name__).inc()
+                    finally:
+                        REQUEST_SECONDS.observe(time.perf_counter() - attempt_start)
+
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(self._backoff(attempt, response))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+            ATTEMPTS.labels(type(e).__name__).inc()
+
+        result["latency_ms"] = (time.perf_counter() - start) * 1000
+        if result["status_code"] is not None and result["status_code"] < 400:
+            result["status"] = "succeeded"
+        elif result["error"] is None:
+            result["error"] = f"HTTP {result['status_code']}"
+
+        JOBS.labels(result["status"]).inc()
+        JOB_SECONDS.labels(result["status"]).observe(result["latency_ms"] / 1000)
+        IN_FLIGHT.dec()
+        self._results.append(result)
+        if len(self._results) >= self.flush_size:
+            await self._flush()
+        return result
+
+    async def _flush(self) -> None:
+        if not self._results:
+            return
+        batch, self._results = self._results, []
+        try:
+            await self._loop.run_in_executor(None, self.on_results, batch)
+        except Exception as e:
+            RESULT_FLUSH_FAILURES.inc()
+            print(f"Failed to record {len(batch)} job results: {str(e)}")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _close(self) -> None:
+        self._flusher.cancel()
+        pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self._flush()
+        await self._client.aclose()
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        """Let in-flight jobs finish (up to `timeout`), record their results and stop the loop."""
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+        try:
+            future.result(timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
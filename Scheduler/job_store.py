@@ -0,0 +1,299 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+
+# Jobs still waiting to fire or in flight; finished jobs are 'succeeded' or 'failed'
+ACTIVE_STATUSES = ("pending", "running")
+
+# One-shot jobs use the 'date' trigger; 'interval' and 'cron' jobs stay pending between runs
+RECURRING_TRIGGERS = ("interval", "cron")
+
+
+class JobStore(ABC):
+    """Interface for persisting scheduled jobs."""
+
+    @abstractmethod
+    def add(self, job: dict) -> None:
+        ...
+
+    @abstractmethod
+    def add_many(self, jobs: Iterable[dict]) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    def remove(self, job_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list_jobs(self, limit: Optional[int] = None, offset: int = 0,
+                  statuses: Iterable[str] = ACTIVE_STATUSES) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def due(self, before: datetime, limit: Optional[int] = None) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def claim(self, job_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def release_claims(self) -> int:
+        ...
+
+    @abstractmethod
+    def record_results(self, results: List[dict]) -> None:
+        ...
+
+    @abstractmethod
+    def purge_finished(self, before: datetime) -> int:
+        ...
+
+    @abstractmethod
+    def expire(self, job_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def count(self, statuses: Iterable[str] = ACTIVE_STATUSES) -> int:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+def _run_at_ts(run_at) -> float:
+    if isinstance(run_at, str):
+        run_at = datetime.fromisoformat(run_at)
+    return run_at.timestamp()
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Embedded SQLite job store in WAL mode.
+
+    Inserts and deletes touch a single row, lookups go through the primary
+    key or the run_at index, and every write runs in its own transaction.
+    A lock serialises access from the APScheduler thread and request handlers.
+    """
+
+    OUTCOME_COLUMNS = (
+        ("status_code", "INTEGER"),
+        ("attempts", "INTEGER"),
+        ("latency_ms", "REAL"),
+        ("error", "TEXT"),
+        ("finished_at", "TEXT"),
+    )
+
+    TRIGGER_COLUMNS = (
+        ("trigger", "TEXT NOT NULL DEFAULT 'date'"),
+        ("trigger_args", "TEXT"),
+    )
+
+    INSERT_SQL = ("INSERT INTO jobs (id, url, payload, run_at, run_at_ts, created_at, trigger, trigger_args) "
+                  "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def __init__(self, path: str = "jobs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock:
+            self.conn.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    run_at TEXT NOT NULL,
+                    run_at_ts REAL NOT NULL,
+                    created_at TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending'
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_run_at ON jobs (status, run_at_ts);
+            """)
+            # Outcome and trigger columns, added to stores created before they existed
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for name, column_type in self.OUTCOME_COLUMNS + self.TRIGGER_COLUMNS:
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {column_type}")
+
+    @staticmethod
+    def _row(job: dict) -> tuple:
+        return (
+            job["id"],
+            job["url"],
+            json.dumps(job["payload"]),
+            str(job["run_at"]),
+            _run_at_ts(job["run_at"]),
+            datetime.now().isoformat(sep=" ", timespec="seconds"),
+            job.get("trigger", "date"),
+            json.dumps(job["trigger_args"], default=str) if job.get("trigger_args") else None,
+        )
+
+    @classmethod
+    def _job(cls, row: sqlite3.Row) -> dict:
+        job = {
+            "id": row["id"],
+            "url": row["url"],
+            "payload": json.loads(row["payload"]),
+            "run_at": row["run_at"],
+            "status": row["status"],
+            "trigger": row["trigger"],
+        }
+        if row["trigger_args"]:
+            job["trigger_args"] = json.loads(row["trigger_args"])
+        if row["finished_at"] is not None:
+            job.update({name: row[name] for name, _ in cls.OUTCOME_COLUMNS})
+        return job
+
+    def _write(self, sql: str, params) -> sqlite3.Cursor:
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                cursor = self.conn.execute(sql, params)
+                self.conn.execute("COMMIT")
+                return cursor
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def add(self, job: dict) -> None:
+        self._write(self.INSERT_SQL, self._row(job))
+
+    def add_many(self, jobs: Iterable[dict]) -> int:
+        rows = [self._row(job) for job in jobs]
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(self.INSERT_SQL, rows)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def remove(self, job_id: str) -> bool:
+        return self._write("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount > 0
+
+    def list_jobs(self, limit: Optional[int] = None, offset: int = 0,
+                  statuses: Iterable[str] = ACTIVE_STATUSES) -> List[dict]:
+        statuses = tuple(statuses)
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY run_at_ts, id LIMIT ? OFFSET ?",
+                (*statuses, -1 if limit is None else limit, offset)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def due(self, before: datetime, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE status = 'pending' AND run_at_ts <= ? ORDER BY run_at_ts LIMIT ?",
+                (before.timestamp(), -1 if limit is None else limit)
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def claim(self, job_id: str) -> bool:
+        """Mark a pending job as running; False if it is gone or already claimed."""
+        return self._write(
+            "UPDATE jobs SET status = 'running' WHERE id = ? AND status = 'pending'", (job_id,)
+        ).rowcount > 0
+
+    def release_claims(self) -> int:
+        """Return jobs left running by a previous process to pending so they run again."""
+        return self._write("UPDATE jobs SET status = 'pending' WHERE status = 'running'", ()).rowcount
+
+    def record_results(self, results: List[dict]) -> None:
+        """
+        Store execution outcomes for a batch of jobs in one transaction.
+
+        Recurring jobs keep their status and only record the outcome of the latest run.
+        """
+        finished_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        rows = [
+            (r["status"], r["status_code"], r["attempts"], r["latency_ms"], r["error"], finished_at, r["id"])
+            for r in results
+        ]
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany(
+                    "UPDATE jobs SET status = CASE WHEN trigger = 'date' THEN ? ELSE status END, "
+                    "status_code = ?, attempts = ?, latency_ms = ?, error = ?, finished_at = ? "
+                    "WHERE id = ?", rows
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def purge_finished(self, before: datetime) -> int:
+        """Delete finished jobs whose run_at is older than `before`."""
+        return self._write(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND run_at_ts < ?",
+            (before.timestamp(),)
+        ).rowcount
+
+    def expire(self, job_id: str) -> bool:
+        """Finish a recurring job whose trigger will not fire again, keeping its last outcome."""
+        return self._write(
+            "UPDATE jobs SET status = CASE WHEN error IS NULL THEN 'succeeded' ELSE 'failed' END, "
+            "finished_at = COALESCE(finished_at, ?) WHERE id = ? AND status = 'pending'",
+            (datetime.now().isoformat(sep=" ", timespec="seconds"), job_id)
+        ).rowcount > 0
+
+    def count(self, statuses: Iterable[str] = ACTIVE_STATUSES) -> int:
+        statuses = tuple(statuses)
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            return self.conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})", statuses
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def import_legacy_jobs(store: JobStore, jobs_file: str = "jobs.json") -> int:
+    """
+    Move jobs from the old whole-file jobs.json into the store, once.
+
+    The file is renamed to '<jobs_file>.migrated' so the import is not repeated.
+    """
+    if not os.path.exists(jobs_file):
+        return 0
+
+    with open(jobs_file, "r") as f:
+        jobs = json.load(f)
+
+    imported = store.add_many(job for job in jobs if store.get(job["id"]) is None)
+    os.replace(jobs_file, f"{jobs_file}.migrated")
+    return imported
+
+
+def create_job_store(url: str) -> JobStore:
+    """
+    Build a job store from a URL-like setting, e.g. 'sqlite:///jobs.db' or a plain path.
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    if "://" in url:
+        raise ValueError(f"Unsupported job store: {url}")
+    return SQLiteJobStore(url)
@@ -0,0 +1,405 @@
+# Shared by the Scheduler and mongoDB services. Each service's image is built from its own
+# directory, so this module is copied into both; benchmarks/check_shared_modules.py fails
+# when the copies differ.
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers sub-millisecond store calls up to the executor's request timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes; request and response payload sizes
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _label_text(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Metric(ABC):
+    """
+    A named metric family with optional labels, e.g.
+    REQUESTS = registry.counter("requests_total", "Requests", ["route"]); REQUESTS.labels("/items/").inc()
+
+    Children are created on first use of a label combination and kept for the
+    life of the process, so labels must have a bounded set of values (route
+    templates, not raw paths).
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[tuple, object] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    @abstractmethod
+    def _new_child(self):
+        """A new value holder for one label combination."""
+
+    def labels(self, *values, **kwargs):
+        """The child for one label combination (positional in labelnames order, or by name)."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(sample name suffix, label text, value) for every child."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return "\n".join(lines)
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def samples(self):
+        return [("", _label_text(self.labelnames, key), child.value) for key, child in list(self._children.items())]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down. With `function`, the value is read at scrape
+    time instead: a number, or a {label values tuple: number} dict for a
+    labelled gauge (e.g. queue depth per status).
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 function: Optional[Callable[[], object]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._children[()].dec(amount)
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+    def samples(self):
+        if self.function is None:
+            return [("", _label_text(self.labelnames, key), child.value) for key, child in list(self._children.items())]
+        try:
+            value = self.function()
+        except Exception as e:
+            print(f"Failed to collect {self.name}: {str(e)}")
+            return []
+        if isinstance(value, dict):
+            return [("", _label_text(self.labelnames, key if isinstance(key, tuple) else (key,)), float(v))
+                    for key, v in value.items()]
+        return [("", "", float(value))]
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(Metric):
+    """Cumulative buckets plus _sum and _count, as Prometheus histograms are exposed."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.upper_bounds = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def samples(self):
+        samples = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", _label_text(self.labelnames + ("le",), key + (_format_value(bound),)),
+                                cumulative))
+            labels = _label_text(self.labelnames, key)
+            samples.append(("_sum", labels, total))
+            samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class Registry:
+    """The metrics exposed by one service, rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+              function: Optional[Callable[[], object]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = Registry()
+
+
+# ============================
+# Trace spans
+# ============================
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("child", "errors", "start")
+
+    def __init__(self, child, errors):
+        self.child = child
+        self.errors = errors
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.errors.inc()
+        return False
+
+
+class Tracer:
+    """
+    Named timing spans around hot-path steps, aggregated into a histogram per
+    span name rather than kept as individual traces, so they cost a couple of
+    perf_counter() calls and a bucket increment. Disabled, span() returns a
+    shared no-op context manager.
+    """
+
+    def __init__(self, registry: Registry, prefix: str, enabled: bool = True):
+        self.enabled = enabled
+        self.seconds = registry.histogram(f"{prefix}_span_seconds", "Time spent in traced spans", ["span"])
+        self.errors = registry.counter(f"{prefix}_span_errors_total", "Traced spans that raised", ["span"])
+        self._children: Dict[str, tuple] = {}
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NO_SPAN
+        children = self._children.get(name)
+        if children is None:
+            children = self._children.setdefault(name, (self.seconds.labels(name), self.errors.labels(name)))
+        return _Span(*children)
+
+
+def tracing_enabled() -> bool:
+    """TRACE_SPANS=0 turns span timing off; it is on by default."""
+    return os.getenv("TRACE_SPANS", "1").lower() not in ("0", "false", "no", "off")
+
+
+# ============================
+# HTTP instrumentation
+# ============================
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status and payload sizes.
+
+    Routes are labelled by their template (/items/{item_id}), taken from the
+    route FastAPI matched, so label values stay bounded; unmatched paths are
+    counted as "unmatched". Latency runs until the last response body chunk is
+    sent, which includes streaming responses.
+    """
+
+    def __init__(self, app, registry: Registry, prefix: str = "http"):
+        self.app = app
+        self.latency = registry.histogram(f"{prefix}_request_duration_seconds", "Request latency by route",
+                                          ["method", "route", "status"])
+        self.request_size = registry.histogram(f"{prefix}_request_size_bytes", "Request body size by route",
+                                               ["method", "route"], SIZE_BUCKETS)
+        self.response_size = registry.histogram(f"{prefix}_response_size_bytes", "Response body size by route",
+                                                ["method", "route"], SIZE_BUCKETS)
+        self.in_progress = registry.gauge(f"{prefix}_requests_in_progress", "Requests being handled")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status, request_bytes, response_bytes = 500, 0, 0
+
+        async def receive_counted():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        self.in_progress.inc()
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            self.in_progress.dec()
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.latency.labels(method, route, status).observe(time.perf_counter() - start)
+            self.request_size.labels(method, route).observe(request_bytes)
+            self.response_size.labels(method, route).observe(response_bytes)
+
+
+class TimedCalls:
+    """
+    Wrap an object so each public method call is timed into `histogram`,
+    labelled by method name; other attributes pass through. Used for the
+    store/database layer, e.g. TimedCalls(store, STORE_SECONDS, STORE_ERRORS).
+    """
+
+    def __init__(self, target, histogram: Histogram, errors: Optional[Counter] = None):
+        self._target = target
+        self._histogram = histogram
+        self._errors = errors
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._target, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        child = self._histogram.labels(name)
+        errors = self._errors.labels(name) if self._errors is not None else None
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            except Exception:
+                if errors is not None:
+                    errors.inc()
+                raise
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        setattr(self, name, timed)  # later lookups skip __getattr__
+        return timed
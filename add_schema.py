@@ -1,6 +1,7 @@
-import os, json
+import os, sys, json
+import argparse
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import IndexModel, MongoClient
 from pymongo.errors import OperationFailure, PyMongoError
 
 # Connect to MongoDB
@@ -11,12 +12,11 @@ db = client['mydatabase']  # Replace with your database name
 load_dotenv()
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
 
-# Function to read schema from JSON file
-def load_schema_from_file(file_path: str):
+# Function to read the schema file: {"validator": ..., "indexes": [...], "hot_queries": [...]}
+def load_schema_spec(file_path: str):
     try:
         with open(file_path, 'r') as file:
-            schema = json.load(file)
-        return schema
+            spec = json.load(file)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         return None
@@ -24,6 +24,18 @@ def load_schema_from_file(file_path: str):
         print(f"Error: Invalid JSON format in '{file_path}'.")
         return None
 
+    # Older schema files hold only the $jsonSchema document
+    if "validator" not in spec:
+        spec = {"validator": spec}
+    spec.setdefault("indexes", [])
+    spec.setdefault("hot_queries", [])
+    return spec
+
+# Function to read schema from JSON file
+def load_schema_from_file(file_path: str):
+    spec = load_schema_spec(file_path)
+    return spec["validator"] if spec else None
+
 # Function to create or update the collection with schema validation
 def create_or_update_collection_with_schema_from_file(file_path: str, collection_name: str):
     schema = load_schema_from_file(file_path)
@@ -51,7 +63,87 @@ def create_or_update_collection_with_schema_from_file(file_path: str, collection
     except PyMongoError as e:
         print("General PyMongoError:", e)
 
+# Function to make the collection's indexes match the declared ones
+# Indexes with a declared name but different keys are rebuilt; undeclared indexes are only
+# reported unless drop_undeclared is set (the _id index is never touched)
+def reconcile_indexes(collection_name: str, index_specs: list, drop_undeclared: bool = False):
+    collection = db[collection_name]
+    try:
+        existing = collection.index_information()
+
+        declared, to_create = set(), []
+        for index_spec in index_specs:
+            keys = list(index_spec["keys"].items())
+            options = {name: value for name, value in index_spec.items() if name != "keys"}
+            name = options.setdefault("name", "_".join(f"{field}_{direction}" for field, direction in keys))
+            declared.add(name)
+
+            current = existing.get(name)
+            if current is not None:
+                same_keys = [tuple(key) for key in current["key"]] == keys
+                if same_keys and current.get("unique", False) == options.get("unique", False):
+                    continue
+                collection.drop_index(name)
+                print(f"Index '{name}' changed; rebuilding.")
+            to_create.append(IndexModel(keys, **options))
+
+        if to_create:
+            created = collection.create_indexes(to_create)
+            print(f"Created indexes on '{collection_name}': {', '.join(created)}")
+
+        for name in existing:
+            if name != "_id_" and name not in declared:
+                if drop_undeclared:
+                    collection.drop_index(name)
+                    print(f"Dropped undeclared index '{name}'.")
+                else:
+                    print(f"Undeclared index '{name}' left in place (pass --drop-undeclared to drop it).")
+    except OperationFailure as e:
+        print("Error reconciling indexes:", e)
+    except PyMongoError as e:
+        print("General PyMongoError:", e)
+
+# Collect every stage name in an explain() plan tree
+def plan_stages(plan: dict):
+    stages = [plan["stage"]] if "stage" in plan else []
+    for key in ("inputStage", "queryPlan", "outerStage", "innerStage"):
+        if isinstance(plan.get(key), dict):
+            stages.extend(plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(plan_stages(child))
+    return stages
+
+# Function to explain each hot query and report the ones that scan the whole collection
+def check_query_plans(collection_name: str, hot_queries: list):
+    collection = db[collection_name]
+    collscans = []
+    for query in hot_queries:
+        cursor = collection.find(query["filter"], query.get("projection"))
+        if query.get("limit"):
+            cursor = cursor.limit(query["limit"])
+        stages = plan_stages(cursor.explain()["queryPlanner"]["winningPlan"])
+
+        name = query.get("name", json.dumps(query["filter"]))
+        print(f"{name}: {' <- '.join(stages)}")
+        if "COLLSCAN" in stages:
+            collscans.append(name)
+    return collscans
+
 
 
 # Usage
-create_or_update_collection_with_schema_from_file("schema.json", COLLECTION_NAME)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema.json's validator and indexes to the collection.")
+    parser.add_argument('--drop-undeclared', action='store_true',
+                        help="Drop indexes that schema.json does not declare (they are only reported otherwise)")
+    args = parser.parse_args()
+
+    spec = load_schema_spec("schema.json")
+    create_or_update_collection_with_schema_from_file("schema.json", COLLECTION_NAME)
+
+    if spec:
+        reconcile_indexes(COLLECTION_NAME, spec["indexes"], drop_undeclared=args.drop_undeclared)
+        collscans = check_query_plans(COLLECTION_NAME, spec["hot_queries"])
+        if collscans:
+            print(f"Hot queries using a collection scan: {', '.join(collscans)}")
+            sys.exit(1)
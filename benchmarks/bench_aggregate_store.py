@@ -0,0 +1,110 @@
+"""
+Memory and throughput of CSVProcessor's summaries on a synthetic month: the
+previous pair of dicts keyed by string tuples (host level and region level)
+against rep's AggregateStore (interned codes, packed keys, NumPy totals, region
+level rolled up on demand).
+
+Rows are fed in CSVProcessor.CHUNK_SIZE batches of already-parsed
+(date, host, jobs) values, so only the aggregation itself is measured.
+
+Usage: python benchmarks/bench_aggregate_store.py [--rows N] [--hosts N] [--sources N]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from common import load_script
+
+rep = load_script('rep')
+
+REGIONS = ['EMEA', 'APAC', 'AMER', 'LATAM']
+ENVS = ['PROD', 'UAT', 'DEV']
+DAYS = [(date(2024, 9, 1) + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(30)]
+
+
+def generate_chunks(rows: int, hosts: int, sources: int, chunk_size: int, seed: int = 42):
+    """Yield (region, env, dates, hosts, jobs) batches; host strings are fresh objects, as csv.reader makes them."""
+    rng = random.Random(seed)
+    pairs = [(REGIONS[i % len(REGIONS)], ENVS[i // len(REGIONS) % len(ENVS)] + ('' if i < 12 else str(i)))
+             for i in range(sources)]
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        region, env = pairs[rng.randrange(sources)]
+        yield (region, env,
+               [DAYS[rng.randrange(len(DAYS))] for _ in range(count)],
+               [f"ctm-host-{rng.randrange(hosts):06d}" for _ in range(count)],
+               [rng.randrange(1, 50) for _ in range(count)])
+
+
+class DictSummaries:
+    """The previous CSVProcessor bookkeeping: two dicts updated per row."""
+
+    def __init__(self):
+        self.summary_data = {}
+        self.summary_data_region = {}
+
+    def add_rows(self, region, env, dates, hosts, jobs):
+        for day, host, count in zip(dates, hosts, jobs):
+            key = (region, env, day, host)
+            key_region = (region, env, day)
+            self.summary_data[key] = self.summary_data.get(key, 0) + count
+            self.summary_data_region[key_region] = self.summary_data_region.get(key_region, 0) + count
+
+    def finish(self):
+        return len(self.summary_data), len(self.summary_data_region)
+
+
+class StoreSummaries:
+    def __init__(self):
+        self.summary_data = rep.AggregateStore()
+
+    def add_rows(self, region, env, dates, hosts, jobs):
+        self.summary_data.add_rows(region, env, dates, hosts, jobs)
+
+    def finish(self):
+        return len(self.summary_data), len(self.summary_data.rollup())
+
+
+def run(factory, args, trace: bool):
+    """Aggregate every chunk; returns (seconds spent aggregating, bytes retained, key counts)."""
+    elapsed = 0.0
+    if trace:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0] if trace else 0
+    summaries = factory()
+    for chunk in generate_chunks(args.rows, args.hosts, args.sources, rep.CSVProcessor.CHUNK_SIZE):
+        start = time.perf_counter()
+        summaries.add_rows(*chunk)
+        elapsed += time.perf_counter() - start
+        del chunk
+
+    start = time.perf_counter()
+    keys = summaries.finish()
+    elapsed += time.perf_counter() - start
+
+    retained = 0
+    if trace:
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+    return elapsed, retained, keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=3000000)
+    parser.add_argument('--hosts', type=int, default=20000)
+    parser.add_argument('--sources', type=int, default=8, help="REGION-ENV pairs")
+    args = parser.parse_args()
+
+    print(f"{'summaries':<26}{'rows/s':>12}{'MiB':>10}{'bytes/key':>11}{'host keys':>12}{'region keys':>13}")
+    for label, factory in (('dict of tuples (x2)', DictSummaries), ('AggregateStore', StoreSummaries)):
+        elapsed, _, keys = run(factory, args, trace=False)
+        _, retained, _ = run(factory, args, trace=True)
+        print(f"{label:<26}{args.rows / elapsed:>12,.0f}{retained / 2 ** 20:>10.1f}"
+              f"{retained / keys[0]:>11.0f}{keys[0]:>12,}{keys[1]:>13,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare scheduling N jobs through POST /schedule-job/ one at a time with
+POST /schedule-jobs/ in batches, against a throwaway job store.
+
+Usage: python benchmarks/bench_bulk_schedule.py [--jobs N] [--batch-size N] [--run-in SECONDS]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import REPO_ROOT
+
+
+def single(client, jobs):
+    for job in jobs:
+        client.post('/schedule-job/', json=job).raise_for_status()
+
+
+def bulk(client, jobs, batch_size):
+    for start in range(0, len(jobs), batch_size):
+        client.post('/schedule-jobs/', json=jobs[start:start + batch_size]).raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=5000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--run-in', type=int, default=600,
+                        help='Seconds until the jobs are due; inside the schedule window they are also '
+                             'registered with APScheduler')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        os.environ['JOB_STORE_URL'] = os.path.join(work_dir, 'jobs.db')
+        sys.path.insert(0, os.path.join(REPO_ROOT, 'Scheduler'))
+
+        from fastapi.testclient import TestClient
+        import app as scheduler_app
+
+        run_at = (datetime.now() + timedelta(seconds=args.run_in)).strftime('%Y-%m-%d %H:%M:%S')
+        jobs = [
+            {'url': 'http://127.0.0.1:9/hook', 'payload': {'host': f'host{i:05d}', 'cr': f'CR{i:06d}'}, 'run_at': run_at}
+            for i in range(args.jobs)
+        ]
+
+        with TestClient(scheduler_app.app) as client:
+            print(f"{'mode':<28}{'jobs':>8}{'seconds':>10}{'jobs/s':>12}")
+            for label, func, extra in (
+                ('single /schedule-job/', single, ()),
+                (f'bulk /schedule-jobs/ x{args.batch_size}', bulk, (args.batch_size,)),
+            ):
+                start = time.perf_counter()
+                func(client, jobs, *extra)
+                elapsed = time.perf_counter() - start
+                print(f"{label:<28}{len(jobs):>8}{elapsed:>10.2f}{len(jobs) / elapsed:>12,.0f}")
+
+            # Nothing should fire; drop the scheduled jobs before shutdown
+            scheduler_app.scheduler.remove_all_jobs()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare the per-row CSVProcessor.parse_date path with the batched parse_dates path.
+
+Usage: python benchmarks/bench_date_parsing.py [--rows N]
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from common import load_script, timed
+
+rep = load_script('rep')
+
+
+def generate_dates(fmt: str, rows: int, seed: int = 42) -> list:
+    """Generate `rows` NET_DATE strings for one month in the given format."""
+    rng = random.Random(seed)
+    start = datetime(2024, 9, 1)
+    return [(start + timedelta(seconds=rng.randrange(30 * 86400))).strftime(fmt) for _ in range(rows)]
+
+
+def per_row(processor, values):
+    for value in values:
+        date_obj = processor.parse_date(value)
+        if date_obj is not None:
+            date_obj.strftime('%Y-%m-%d')
+
+
+def batched(processor, values):
+    processor._date_cache.clear()
+    for i in range(0, len(values), processor.CHUNK_SIZE):
+        processor.parse_dates(values[i:i + processor.CHUNK_SIZE])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        os.chdir(log_dir)
+        processor = rep.CSVProcessor({'timestamp': datetime.now(), 'user': 'benchmark'})
+
+        print(f"{'format':<24}{'per-row rows/s':>18}{'batched rows/s':>18}{'speedup':>10}")
+        for fmt in processor.DATE_FORMATS:
+            values = generate_dates(fmt, args.rows)
+            slow = timed(per_row, processor, values, repeat=1)
+            fast = timed(batched, processor, values)
+            print(f"{fmt:<24}{args.rows / slow:>18,.0f}{args.rows / fast:>18,.0f}{slow / fast:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
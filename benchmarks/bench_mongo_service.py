@@ -0,0 +1,178 @@
+"""
+Load test POST /retrieve-data on the MongoDB data service: the async endpoints
+in mongoDB/main.py against the previous style of sync endpoint running a
+blocking pymongo lookup in FastAPI's threadpool.
+
+By default both run against an in-process mock (mongomock) that adds
+--latency-ms to every database call, standing in for the network round-trip.
+Pass --mongo-uri to run against a real mongod instead.
+
+Usage: python benchmarks/bench_mongo_service.py [--requests N] [--concurrency N]
+                                                [--latency-ms MS] [--mongo-uri URI]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+from common import REPO_ROOT
+
+COLLECTION = 'bench_fields'
+FIELDS = [f'field_{i}' for i in range(50)]
+
+
+class SlowCollection:
+    """mongomock collection whose calls block for `latency` seconds, like a sync driver round-trip."""
+
+    def __init__(self, collection, latency: float):
+        self.collection = collection
+        self.latency = latency
+
+    def find(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return self.collection.find(*args, **kwargs)
+
+
+class AsyncMockCursor:
+    def __init__(self, cursor, latency: float):
+        self.cursor = cursor
+        self.latency = latency
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    async def __aiter__(self):
+        await asyncio.sleep(self.latency)
+        for document in self.cursor:
+            yield document
+
+
+class AsyncMockCollection:
+    """mongomock collection behind the async driver's interface, awaiting `latency` per call."""
+
+    def __init__(self, collection, latency: float):
+        self.collection = collection
+        self.latency = latency
+
+    def find(self, *args, **kwargs):
+        return AsyncMockCursor(self.collection.find(*args, **kwargs), self.latency)
+
+    async def insert_one(self, document, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.collection.insert_one(document, **kwargs)
+
+    async def insert_many(self, documents, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self.collection.insert_many(documents, **kwargs)
+
+
+class MockDatabase(dict):
+    def __init__(self, wrap):
+        super().__init__()
+        self.wrap = wrap
+
+    def __missing__(self, name):
+        return self.setdefault(name, self.wrap(name))
+
+
+def seed(collection, per_field: int = 5):
+    collection.delete_many({})
+    collection.insert_many([
+        {'field': field, 'datatype': 'string', 'origin': f'origin_{j}', 'sample': 'x', 'notes': 'bench'}
+        for field in FIELDS for j in range(per_field)
+    ])
+    collection.create_index([('field', 1), ('origin', 1)])
+
+
+def retrieve_sync(db, field: str):
+    """The previous data.py lookup: one blocking find per request, each document converted for JSON."""
+    from documents import RETRIEVE_LIMIT, _to_json, lookup_query
+
+    results = [_to_json(document) for document in db[COLLECTION].find(lookup_query(field)).limit(RETRIEVE_LIMIT)]
+    return results or {'status': 'error', 'message': f"No documents found for the field: {field}"}
+
+
+def sync_app(db):
+    """The previous endpoint shape: a def route, run in the threadpool, blocking on pymongo."""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel
+
+    app = FastAPI()
+
+    class RetrieveDataPayload(BaseModel):
+        field: str
+
+    @app.post('/retrieve-data')
+    def retrieve_data(param: RetrieveDataPayload):
+        return JSONResponse(content=retrieve_sync(db, param.field))
+
+    return app
+
+
+async def run_load(app, requests: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        async def one(i):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post('/retrieve-data', json={'field': FIELDS[i % len(FIELDS)]})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--mongo-uri', default=None)
+    args = parser.parse_args()
+
+    os.environ.setdefault('COLLECTION_NAME', COLLECTION)
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'mongoDB'))
+    import async_data
+    import main as service
+
+    service.COLLECTION_NAME = COLLECTION
+    latency = args.latency_ms / 1000
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        sync_db = MongoClient(args.mongo_uri)['bench']
+        seed(sync_db[COLLECTION])
+        asyncio.run(async_data.connect(args.mongo_uri, 'bench'))
+    else:
+        import mongomock
+        mock_db = mongomock.MongoClient()['bench']
+        seed(mock_db[COLLECTION])
+        sync_db = MockDatabase(lambda name: SlowCollection(mock_db[name], latency))
+        async_data.db = MockDatabase(lambda name: AsyncMockCollection(mock_db[name], latency))
+
+    print(f"{'endpoint':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for label, app in (('sync def + pymongo', sync_app(sync_db)), ('async def + async driver', service.app)):
+        throughput, p50, p99 = asyncio.run(run_load(app, args.requests, args.concurrency))
+        print(f"{label:<28}{throughput:>10,.0f}{p50 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
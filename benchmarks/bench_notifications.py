@@ -0,0 +1,179 @@
+"""
+Report-link notifications against a local aiosmtpd stub server: one SMTP
+connection per message (the old `email` script), against
+notification_dispatcher.NotificationDispatcher sending one message per link
+over pooled sessions, and sending one digest per batch of pages.
+
+The stub adds --handshake-ms to every EHLO (standing in for STARTTLS and
+login round trips) and --data-ms to every message; with --fail-every N it
+answers every Nth message with a 421 so the dispatcher has to reconnect and
+retry. Every recipient must receive every link due to them; the script exits
+with status 1 when one is missing.
+
+Usage: python benchmarks/bench_notifications.py [--pages N] [--batch-size N] [--owners N] [--workers N] [--fail-every N]
+"""
+import argparse
+import asyncio
+import re
+import smtplib
+import socket
+import sys
+import threading
+import time
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+from aiosmtpd.controller import Controller
+
+from common import REPO_ROOT
+
+sys.path.insert(0, REPO_ROOT)
+from generators import REGIONS  # noqa: E402
+from notification_dispatcher import NotificationDispatcher  # noqa: E402
+
+SENDER = 'reports@example.com'
+RECEIVER = 'recipient@example.com'
+LINK = re.compile(r'pageId=(\d+)')
+
+
+class StubHandler:
+    """Records each recipient's links; slows handshakes and messages down and injects 421s."""
+
+    def __init__(self, handshake_seconds: float, data_seconds: float, fail_every: int = 0):
+        self.handshake_seconds = handshake_seconds
+        self.data_seconds = data_seconds
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.messages = 0
+        self.sessions = 0
+        self.received = {}
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.sessions += 1
+        session.host_name = hostname
+        await asyncio.sleep(self.handshake_seconds)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.data_seconds)
+        with self.lock:
+            self.messages += 1
+            if self.fail_every and self.messages % self.fail_every == 0:
+                return '421 Service not available, closing transmission channel'
+            body = message_from_bytes(envelope.content, policy=policy.default).get_content()
+            links = set(LINK.findall(body))
+            for recipient in envelope.rcpt_tos:
+                self.received.setdefault(recipient, set()).update(links)
+        return '250 Message accepted for delivery'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def owners(count: int) -> dict:
+    return {region: [f"{region.lower()}-owner{i}@example.com" for i in range(count)] for region in REGIONS}
+
+
+def page_links(pages: int) -> list:
+    """(region, url) per report page, regions taking turns."""
+    return [(REGIONS[i % len(REGIONS)], f"https://confluence.example.com/pages/viewpage.action?pageId={100000 + i}")
+            for i in range(pages)]
+
+
+def expected_links(links: list, region_owners: dict) -> dict:
+    expected = {}
+    for region, url in links:
+        page_id = LINK.search(url).group(1)
+        for recipient in [RECEIVER, *region_owners[region]]:
+            expected.setdefault(recipient, set()).add(page_id)
+    return expected
+
+
+def send_per_connection(config: dict, links: list, region_owners: dict, _args) -> dict:
+    """The old `email` script: connect, send one message, quit, for every link and recipient."""
+    sent = 0
+    for region, url in links:
+        for recipient in [RECEIVER, *region_owners[region]]:
+            message = EmailMessage()
+            message['From'], message['To'], message['Subject'] = SENDER, recipient, "Confluence Page Link"
+            message.set_content(f"Hello,\n\nYour Confluence page has been created: {url}\n\nBest Regards.")
+            for attempt in range(2):
+                try:
+                    server = smtplib.SMTP(config['SMTP_SERVER'], config['SMTP_PORT'])
+                    server.send_message(message)
+                    server.quit()
+                    sent += 1
+                    break
+                except smtplib.SMTPResponseException:
+                    server.close()
+    return {'sent': sent, 'failed': 0, 'retries': 0}
+
+
+def dispatch(config: dict, links: list, region_owners: dict, args, digest: bool) -> dict:
+    """Publish-side loop of the `email` script: notify per page, flush per batch (or per page)."""
+    with NotificationDispatcher(config, workers=args.workers, backoff_factor=0.01) as dispatcher:
+        for start in range(0, len(links), args.batch_size):
+            for region, url in links[start:start + args.batch_size]:
+                dispatcher.notify([RECEIVER, *region_owners[region]], "Confluence Page Link",
+                                  f"Your Confluence page has been created: {url}")
+                if not digest:
+                    dispatcher.flush()
+            dispatcher.flush()
+    return dispatcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--batch-size', type=int, default=10, help="Pages per publishing batch")
+    parser.add_argument('--owners', type=int, default=3, help="Owners per region")
+    parser.add_argument('--workers', type=int, default=2, help="Dispatcher SMTP sessions")
+    parser.add_argument('--handshake-ms', type=float, default=20.0)
+    parser.add_argument('--data-ms', type=float, default=2.0)
+    parser.add_argument('--fail-every', type=int, default=0, help="Answer every Nth message with a 421")
+    args = parser.parse_args()
+
+    handler = StubHandler(args.handshake_ms / 1000, args.data_ms / 1000, args.fail_every)
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    config = {'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': port,
+              'EMAIL_SENDER': SENDER, 'SMTP_STARTTLS': False}
+
+    links = page_links(args.pages)
+    region_owners = owners(args.owners)
+    expected = expected_links(links, region_owners)
+    scenarios = [
+        ('connection per message', send_per_connection),
+        ('pooled sessions, message per link', lambda *a: dispatch(*a, digest=False)),
+        ('pooled sessions, digest per batch', lambda *a: dispatch(*a, digest=True)),
+    ]
+
+    print(f"{args.pages} pages in batches of {args.batch_size}, {len(expected)} recipients, "
+          f"{args.workers} dispatcher session(s)")
+    print(f"{'scenario':<36}{'seconds':>9}{'messages':>10}{'sessions':>10}{'retries':>9}{'links ok':>10}")
+    ok = True
+    try:
+        for label, send in scenarios:
+            handler.reset()
+            start = time.perf_counter()
+            stats = send(config, links, region_owners, args)
+            seconds = time.perf_counter() - start
+            delivered = {recipient: handler.received.get(recipient, set()) for recipient in expected}
+            match = delivered == expected and not stats['failed']
+            ok = ok and match
+            print(f"{label:<36}{seconds:>9.3f}{handler.messages:>10}{handler.sessions:>10}"
+                  f"{stats['retries']:>9}{'ok' if match else 'FAIL':>10}")
+    finally:
+        controller.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
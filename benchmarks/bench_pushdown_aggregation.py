@@ -0,0 +1,140 @@
+"""
+Task usage summaries built two ways from the same SQLite net_report fixture:
+exporting raw rows per REGION-ENV and summing them with rep's CSVProcessor, and
+the push-down GROUP BY of `sql --aggregate` (net_report_extract.aggregate).
+
+Both task_usage_report.csv and task_usage_report_by_region.csv must match row
+for row (order aside); the script exits with status 1 when they do not. Runs once
+counting rows as jobs and once summing a jobs column.
+
+Usage: python benchmarks/bench_pushdown_aggregation.py [--rows N] [--hosts N] [--sources N]
+"""
+import argparse
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from common import REPO_ROOT, load_script
+
+sys.path.insert(0, REPO_ROOT)
+import net_report_extract  # noqa: E402
+
+rep = load_script('rep')
+
+REGIONS = ['EMEA', 'APAC', 'AMER', 'LATAM']
+ENVS = ['PROD', 'UAT']
+START, END = date(2024, 9, 1), date(2024, 9, 30)
+EXECUTION_INFO = {'timestamp': datetime(2025, 3, 11, 6, 14, 11), 'user': 'benchmark'}
+
+# Raw rows in the layout CSVProcessor reads: NET_DATE, host, jobs
+RAW_QUERY = """
+    SELECT strftime('%Y-%m-%d %H:%M:%S', net_report.report_date) AS NET_DATE,
+           net_report.ctm_host_name,
+           {jobs} AS jobs
+    FROM {{table}} net_report
+    WHERE net_report.report_date >= :start_date AND net_report.report_date < :end_date
+"""
+
+
+def build_fixture(path: str, rows: int, hosts: int, seed: int) -> None:
+    """One month of net_report rows; a few host names carry stray whitespace."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE net_report (report_date TEXT, ctm_host_name TEXT, "
+                 "data_fname TEXT, node_id INTEGER, jobs INTEGER)")
+    first = datetime.combine(START, datetime.min.time())
+    span = ((END - START).days + 1) * 86400
+    conn.executemany("INSERT INTO net_report VALUES (?, ?, ?, ?, ?)", (
+        ((first + timedelta(seconds=rng.randrange(span))).strftime('%Y-%m-%d %H:%M:%S'),
+         f"ctm-host-{rng.randrange(hosts):03d}" + rng.choice(['', '', '', ' ']),
+         f"job_{i}.dat", rng.randrange(16), rng.randrange(1, 50))
+        for i in range(rows)
+    ))
+    conn.commit()
+    conn.close()
+
+
+def read_rows(path: str) -> list:
+    with open(path, newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        return [next(reader)] + sorted(reader)
+
+
+def csvprocessor_path(sources, work_dir: str, jobs_column) -> tuple:
+    """Export raw rows to REGION-ENV.csv and summarise them with CSVProcessor."""
+    raw_query = RAW_QUERY.format(jobs=f'net_report.{jobs_column}' if jobs_column else '1')
+    processor = rep.CSVProcessor(EXECUTION_INFO)
+    transferred = 0
+    for region, env, connect in sources:
+        output = os.path.join(work_dir, f'{region}-{env}.csv')
+        for path, rows in net_report_extract.extract(connect, START, END, output, table='net_report',
+                                                     query_template=raw_query):
+            transferred += rows
+            processor.process_csv_file(path)
+
+    out_dir = os.path.join(work_dir, 'csvprocessor')
+    os.makedirs(out_dir)
+    processor.write_summary_to_csv(os.path.join(out_dir, net_report_extract.SUMMARY_FILE),
+                                   net_report_extract.SUMMARY_HEADERS, processor.summary_data)
+    processor.write_summary_to_csv(os.path.join(out_dir, net_report_extract.REGION_SUMMARY_FILE),
+                                   net_report_extract.REGION_SUMMARY_HEADERS, processor.summary_data_region)
+    return out_dir, transferred
+
+
+def pushdown_path(sources, work_dir: str, jobs_column) -> tuple:
+    summary_data, summary_data_region = net_report_extract.aggregate(sources, START, END, table='net_report',
+                                                                     jobs_column=jobs_column)
+    out_dir = os.path.join(work_dir, 'pushdown')
+    os.makedirs(out_dir)
+    net_report_extract.write_summaries(summary_data, summary_data_region, EXECUTION_INFO['timestamp'],
+                                       EXECUTION_INFO['user'], directory=out_dir)
+    return out_dir, len(summary_data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000, help="net_report rows per source")
+    parser.add_argument('--hosts', type=int, default=40)
+    parser.add_argument('--sources', type=int, default=2, help="REGION-ENV databases")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        sources = []
+        for i in range(args.sources):
+            region, env = REGIONS[i % len(REGIONS)], ENVS[i // len(REGIONS) % len(ENVS)]
+            path = os.path.join(work_dir, f'{region}_{env}.db')
+            build_fixture(path, args.rows, args.hosts, seed=i)
+            sources.append((region, env, lambda path=path: sqlite3.connect(path, check_same_thread=False)))
+
+        print(f"{'jobs':<14}{'path':<16}{'rows fetched':>14}{'seconds':>10}{'parity':>8}")
+        for label, jobs_column in (('COUNT(*)', None), ('SUM(jobs)', 'jobs')):
+            run_dir = os.path.join(work_dir, label.replace('(', '_').replace(')', '').replace('*', 'rows'))
+            os.makedirs(run_dir)
+
+            start = time.perf_counter()
+            expected_dir, raw_rows = csvprocessor_path(sources, run_dir, jobs_column)
+            raw_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual_dir, grouped_rows = pushdown_path(sources, run_dir, jobs_column)
+            pushdown_seconds = time.perf_counter() - start
+
+            match = all(read_rows(os.path.join(expected_dir, name)) == read_rows(os.path.join(actual_dir, name))
+                        for name in (net_report_extract.SUMMARY_FILE, net_report_extract.REGION_SUMMARY_FILE))
+            failed = failed or not match
+            print(f"{label:<14}{'CSVProcessor':<16}{raw_rows:>14,}{raw_seconds:>10.2f}{'':>8}")
+            print(f"{label:<14}{'push-down':<16}{grouped_rows:>14,}{pushdown_seconds:>10.2f}"
+                  f"{'ok' if match else 'FAIL':>8}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
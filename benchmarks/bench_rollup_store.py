@@ -0,0 +1,108 @@
+"""
+Month peak and baseline queries over a multi-year task usage history: pandas
+groupby/nlargest over the full summary (what 1conf / conf999 / newconf did per
+run) against rollup_store.RollupStore, which keeps daily and monthly totals and
+ranked peaks in SQLite and refreshes only the months a new summary touches.
+
+Every month's top peaks and trailing baseline must agree between the two; the
+script exits with status 1 when they do not.
+
+Usage: python benchmarks/bench_rollup_store.py [--years N] [--sources N] [--k N] [--baseline-months N]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+from common import REPO_ROOT
+
+sys.path.insert(0, REPO_ROOT)
+from rollup_store import RollupStore, shift_month  # noqa: E402
+
+REGIONS = ['EMEA', 'APAC', 'AMER', 'LATAM']
+ENVS = ['PROD', 'UAT']
+
+
+def generate_summary(years: int, sources: int, seed: int = 42) -> pd.DataFrame:
+    """Region-level summary rows (DATE, REGION, ENV, TOTAL_JOBS), one per source per day."""
+    rng = random.Random(seed)
+    days = [date(2024 - years, 1, 1) + timedelta(days=i) for i in range(years * 365)]
+    pairs = [(REGIONS[i % len(REGIONS)], ENVS[i // len(REGIONS) % len(ENVS)]) for i in range(sources)]
+    return pd.DataFrame(
+        [(day.strftime('%Y-%m-%d'), region, env, rng.randrange(100000, 2000000))
+         for day in days for region, env in pairs],
+        columns=['DATE', 'REGION', 'ENV', 'TOTAL_JOBS']
+    )
+
+
+def pandas_peaks(df: pd.DataFrame, k: int, baseline_months: int) -> dict:
+    """Per month: top k (date, jobs) and the k-th peak over the previous `baseline_months` months."""
+    daily = df.groupby('DATE', as_index=False)['TOTAL_JOBS'].sum()
+    daily['MONTH'] = daily['DATE'].str[:7]
+    results = {}
+    for month in sorted(daily['MONTH'].unique()):
+        top = daily[daily['MONTH'] == month].nlargest(k, 'TOTAL_JOBS')
+        window = daily[(daily['MONTH'] >= shift_month(month, -baseline_months)) & (daily['MONTH'] < month)]
+        peaks = window['TOTAL_JOBS'].nlargest(k)
+        results[month] = (sorted(top['TOTAL_JOBS'].tolist(), reverse=True),
+                          int(peaks.iloc[-1]) if len(peaks) == k else None)
+    return results
+
+
+def rollup_peaks(store: RollupStore, k: int, baseline_months: int) -> dict:
+    return {month: (sorted((jobs for _, jobs in store.top_peaks(month, k)), reverse=True),
+                    store.baseline(month, baseline_months, k))
+            for month in store.months()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--sources', type=int, default=8, help="REGION-ENV pairs")
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--baseline-months', type=int, default=3)
+    args = parser.parse_args()
+
+    df = generate_summary(args.years, args.sources)
+    with tempfile.TemporaryDirectory() as work_dir:
+        summary = os.path.join(work_dir, 'task_usage_report_by_region.csv')
+        df.to_csv(summary, index=False)
+        store = RollupStore(os.path.join(work_dir, 'rollup.db'))
+
+        start = time.perf_counter()
+        store.update_from_summary(summary)
+        ingest_seconds = time.perf_counter() - start
+
+        last_month = df[df['DATE'] >= df['DATE'].max()[:7]]
+        start = time.perf_counter()
+        store.update(last_month[['REGION', 'ENV', 'DATE', 'TOTAL_JOBS']].itertuples(index=False))
+        refresh_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = pandas_peaks(df, args.k, args.baseline_months)
+        pandas_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = rollup_peaks(store, args.k, args.baseline_months)
+        rollup_seconds = time.perf_counter() - start
+        store.close()
+
+    match = expected == actual
+    months = len(expected)
+    print(f"{len(df):,} summary rows, {months} months")
+    print(f"{'step':<36}{'seconds':>10}{'ms/month':>10}")
+    print(f"{'rollup: initial ingest':<36}{ingest_seconds:>10.3f}{'':>10}")
+    print(f"{'rollup: refresh latest month':<36}{refresh_seconds:>10.3f}{'':>10}")
+    print(f"{'pandas: peaks + baseline':<36}{pandas_seconds:>10.3f}{pandas_seconds * 1000 / months:>10.2f}")
+    print(f"{'rollup: peaks + baseline':<36}{rollup_seconds:>10.3f}{rollup_seconds * 1000 / months:>10.2f}")
+    print(f"parity: {'ok' if match else 'FAIL'}")
+    sys.exit(0 if match else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Documents validated per second with jsonschema.validate() per document (the
+old SchemaValidator path) versus the compiled validators from schema_registry.
+
+Usage: python benchmarks/bench_schema_validation.py [--docs N] [--invalid-ratio R]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from jsonschema import ValidationError, validate
+
+from common import REPO_ROOT
+
+sys.path.insert(0, REPO_ROOT)
+from schema_registry import error_message, registry  # noqa: E402
+
+SCHEMA_FILE = os.path.join(REPO_ROOT, 'schema.json')
+
+
+def generate_documents(count: int, invalid_ratio: float, seed: int = 42) -> list:
+    """Metadata documents like the catalogue loads; a share of them miss a required field."""
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        document = {'field': f'field_{i}', 'datatype': rng.choice(['string', 'int', 'date']),
+                    'origin': rng.choice(['ctm', 'cmdb', 'sap']), 'sample': str(rng.random()),
+                    'notes': 'generated'}
+        if rng.random() < invalid_ratio:
+            del document['datatype']
+        documents.append(document)
+    return documents
+
+
+def validate_per_call(schema, documents):
+    valid = 0
+    for document in documents:
+        try:
+            validate(instance=document, schema=schema)
+            valid += 1
+        except ValidationError:
+            pass
+    return valid
+
+
+def validate_compiled(documents):
+    valid = 0
+    for document in documents:
+        validator = registry.for_file(SCHEMA_FILE)
+        if validator.is_valid(document):
+            valid += 1
+        else:
+            error_message(validator, document)
+    return valid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--invalid-ratio', type=float, default=0.01)
+    args = parser.parse_args()
+
+    documents = generate_documents(args.docs, args.invalid_ratio)
+    schema = registry.schema_for_file(SCHEMA_FILE)
+
+    print(f"{'path':<34}{'docs/s':>12}{'valid':>10}")
+    for label, func, func_args in (
+        ('jsonschema.validate per document', validate_per_call, (schema, documents)),
+        ('registry is_valid (compiled)', validate_compiled, (documents,)),
+    ):
+        start = time.perf_counter()
+        valid = func(*func_args)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<34}{len(documents) / elapsed:>12,.0f}{valid:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Check that the files copied into more than one service directory are still
+identical. Each service's image is built from its own directory, so shared
+code such as metrics.py, and the schema.json index declarations, are kept as
+one copy per service; line endings are ignored. Prints a unified diff and
+exits with status 1 when a copy differs.
+
+Usage: python benchmarks/check_shared_modules.py
+"""
+import argparse
+import difflib
+import os
+import sys
+
+from common import REPO_ROOT
+
+# Paths relative to the repository root; every file in a group must match the first
+SHARED_MODULES = [
+    ('Scheduler/metrics.py', 'mongoDB/metrics.py'),
+    ('schema.json', 'mongoDB/schema.json'),
+]
+
+
+def read_lines(path: str) -> list:
+    with open(os.path.join(REPO_ROOT, path), newline='') as file:
+        return file.read().replace('\r\n', '\n').splitlines(keepends=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    ok = True
+    for reference, *copies in SHARED_MODULES:
+        expected = read_lines(reference)
+        for copy in copies:
+            diff = list(difflib.unified_diff(expected, read_lines(copy), reference, copy))
+            print(f"{copy:<36}{'ok' if not diff else 'DIFFERS from ' + reference}")
+            if diff:
+                ok = False
+                sys.stdout.writelines(diff)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
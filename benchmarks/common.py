@@ -0,0 +1,33 @@
+import os
+import time
+import importlib.util
+from importlib.machinery import SourceFileLoader
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(name: str, alias: str = None):
+    """
+    Import one of the repository's extension-less scripts (e.g. 'rep') as a module.
+    
+    Args:
+        name (str): Script path relative to the repository root
+        alias (str): Module name to register it under
+    """
+    path = os.path.join(REPO_ROOT, name)
+    module_name = alias or os.path.basename(name).replace('-', '_')
+    loader = SourceFileLoader(module_name, path)
+    spec = importlib.util.spec_from_loader(module_name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def timed(func, *args, repeat: int = 3, **kwargs) -> float:
+    """Return the best wall-clock time in seconds over `repeat` calls."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,155 @@
+"""
+Deterministic synthetic data for the benchmarks: Control-M NET_DATE exports,
+task usage summaries, schema-conforming MongoDB documents and bursts of
+Scheduler jobs. The same arguments and seed always produce the same data.
+"""
+import csv
+import os
+import random
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Sequence, Tuple
+
+REGIONS = ['EMEA', 'APAC', 'AMER', 'LATAM']
+ENVS = ['PROD', 'UAT', 'DEV']
+DATATYPES = ['string', 'int', 'decimal', 'date', 'boolean']
+
+# Filenames CSVProcessor.parse_filename accepts: REGION-ENV and REGION-ENV-<partition>
+# (as written by `sql --partition-by-day`)
+FILENAME_SCHEMES = ('{region}-{env}.csv', '{region}-{env}-{day:%Y%m%d}.csv')
+
+
+def region_envs(count: int) -> List[Tuple[str, str]]:
+    """The first `count` REGION-ENV pairs, regions varying fastest."""
+    return [(REGIONS[i % len(REGIONS)], ENVS[i // len(REGIONS) % len(ENVS)] + ('' if i < 12 else str(i)))
+            for i in range(count)]
+
+
+def host_names(hosts: int) -> List[str]:
+    return [f"ctm-host-{i:05d}" for i in range(hosts)]
+
+
+def netdate_rows(rows: int, date_format: str, hosts: Sequence[str], start: datetime,
+                 days: int, rng: random.Random) -> Iterator[List[str]]:
+    """NET_DATE, CTM_HOST_NAME, JOBS rows; one host name in ten carries stray whitespace."""
+    span = days * 86400
+    for _ in range(rows):
+        net_date = (start + timedelta(seconds=rng.randrange(span))).strftime(date_format)
+        host = hosts[rng.randrange(len(hosts))]
+        if rng.random() < 0.1:
+            host += ' '
+        yield [net_date, host, str(rng.randrange(1, 50))]
+
+
+def write_netdate_csvs(directory: str, date_formats: Sequence[str], files: int, rows_per_file: int,
+                       hosts: int = 2000, sources: int = 8, start: date = date(2024, 9, 1), days: int = 30,
+                       seed: int = 42) -> List[Tuple[str, int]]:
+    """
+    Write Control-M exports covering every date format and filename scheme.
+
+    File i uses date_formats[i % len(date_formats)] and FILENAME_SCHEMES cycled
+    the same way, for the next REGION-ENV pair; every other file has a NET_DATE
+    header row.
+
+    Args:
+        directory (str): Output directory
+        date_formats (Sequence[str]): strftime formats, e.g. CSVProcessor.DATE_FORMATS
+        files (int): Number of files; at least len(date_formats) * len(FILENAME_SCHEMES)
+            to cover every combination
+        rows_per_file (int): Data rows per file
+        hosts (int): Distinct CTM host names
+        sources (int): Distinct REGION-ENV pairs
+        start (date): First day of the exported period
+        days (int): Length of the period
+        seed (int): Random seed
+
+    Returns:
+        List[Tuple[str, int]]: (path, data rows) per file
+    """
+    rng = random.Random(seed)
+    names = host_names(hosts)
+    pairs = region_envs(sources)
+    first = datetime.combine(start, datetime.min.time())
+    written, used = [], set()
+
+    for i in range(files):
+        date_format = date_formats[i % len(date_formats)]
+        scheme = FILENAME_SCHEMES[i // len(date_formats) % len(FILENAME_SCHEMES)]
+        region, env = pairs[i % len(pairs)]
+        day = start + timedelta(days=i // len(pairs))
+        filename = scheme.format(region=region, env=env, day=day)
+        while filename in used:  # more REGION-ENV files than pairs: partition them further
+            day += timedelta(days=days)
+            filename = FILENAME_SCHEMES[1].format(region=region, env=env, day=day)
+        used.add(filename)
+
+        path = os.path.join(directory, filename)
+        with open(path, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            if i % 2 == 0:
+                writer.writerow(['NET_DATE', 'CTM_HOST_NAME', 'JOBS'])
+            writer.writerows(netdate_rows(rows_per_file, date_format, names, first, days, rng))
+        written.append((path, rows_per_file))
+    return written
+
+
+def write_task_usage_summary(path: str, months: int = 12, sources: int = 8,
+                             end: date = date(2024, 9, 30), seed: int = 42) -> int:
+    """
+    Write a region-level summary (REGION, ENV, DATE, TOTAL_JOBS), as rep writes
+    task_usage_report_by_region.csv, for the `months` months ending at `end`.
+
+    Returns:
+        int: Rows written
+    """
+    rng = random.Random(seed)
+    first_month = end.year * 12 + end.month - months  # months since year 0, zero-based
+    first = date(first_month // 12, first_month % 12 + 1, 1)
+    rows = 0
+    with open(path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['REGION', 'ENV', 'DATE', 'TOTAL_JOBS'])
+        day = first
+        while day <= end:
+            for region, env in region_envs(sources):
+                writer.writerow([region, env, day.strftime('%Y-%m-%d'), rng.randrange(100000, 400000)])
+                rows += 1
+            day += timedelta(days=1)
+    return rows
+
+
+def field_names(count: int) -> List[str]:
+    return [f"field_{i:05d}" for i in range(count)]
+
+
+def mongo_documents(count: int, fields: int = 500, origins: int = 20, seed: int = 42) -> List[dict]:
+    """
+    Documents valid against schema.json (field, datatype, origin, sample, optional notes),
+    spread evenly over `fields` field names.
+    """
+    rng = random.Random(seed)
+    names = field_names(fields)
+    documents = []
+    for i in range(count):
+        document = {
+            'field': names[i % fields],
+            'datatype': DATATYPES[rng.randrange(len(DATATYPES))],
+            'origin': f"origin_{rng.randrange(origins):03d}",
+            'sample': ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for _ in range(rng.randrange(4, 32))),
+        }
+        if rng.random() < 0.5:
+            document['notes'] = f"synthetic document {i}"
+        documents.append(document)
+    return documents
+
+
+def job_burst(count: int, url: str, run_at: datetime, hosts: int = 500, seed: int = 42) -> List[dict]:
+    """
+    /schedule-jobs/ requests that all come due at `run_at`, as when one report
+    fans out a callback per host.
+    """
+    rng = random.Random(seed)
+    run_at = run_at.strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        {'url': url, 'payload': {'host': f"host{rng.randrange(hosts):05d}", 'cr': f"CR{i:06d}"}, 'run_at': run_at}
+        for i in range(count)
+    ]
@@ -0,0 +1,526 @@
+"""
+Reproducible benchmark suite over synthetic data and local stand-ins:
+
+  csvprocessor       rep's CSVProcessor.process_all_files over Control-M exports in
+                     every DATE_FORMATS variant and filename scheme (full and
+                     unchanged incremental run)
+  confluence_report  newconf's ConfluenceReporter: summary load and page rendering
+                     (direct and via the rollup store), publishing to a stub
+                     Confluence server, and a batch of regional pages
+  mongo_service      POST /add-data and /retrieve-data (cache off and on) on the
+                     mongoDB service over mongomock with --mongo-latency-ms per call
+  scheduler          Scheduler/app.py: bulk scheduling into the store and the
+                     window, then firing a burst of due jobs at a local HTTP target
+
+Each scenario runs --repeat times in a fresh interpreter; the median of every
+metric is reported and written, with the environment and parameters, to a JSON
+results file. --compare checks the results against an earlier file and exits
+with status 1 when any metric regressed by more than --threshold percent.
+
+Usage: python benchmarks/run_suite.py [--scale small|medium|large] [--scenarios a,b]
+                                      [--repeat N] [--output FILE] [--compare BASELINE]
+                                      [--threshold PCT] [--seed N]
+"""
+import argparse
+import asyncio
+import http.server
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from importlib import metadata
+from typing import Callable, Dict, List
+
+import generators
+from common import REPO_ROOT, load_script, timed
+
+RESULTS_VERSION = 1
+COLLECTION = 'bench_fields'
+CONFLUENCE_PATH = '/rest/api/content/'
+
+SCALES = {
+    'small': {
+        'csv_files': 10, 'csv_rows_per_file': 20000, 'csv_hosts': 2000,
+        'report_months': 12, 'report_sources': 8, 'report_pages': 20, 'confluence_latency_ms': 2.0,
+        'mongo_documents': 1000, 'mongo_lookups': 2000, 'mongo_fields': 200, 'mongo_concurrency': 50,
+        'mongo_latency_ms': 1.0,
+        'schedule_jobs': 1000, 'schedule_batch_size': 500, 'fire_jobs': 500, 'target_latency_ms': 5.0,
+    },
+    'medium': {
+        'csv_files': 20, 'csv_rows_per_file': 100000, 'csv_hosts': 5000,
+        'report_months': 24, 'report_sources': 12, 'report_pages': 100, 'confluence_latency_ms': 2.0,
+        'mongo_documents': 5000, 'mongo_lookups': 10000, 'mongo_fields': 1000, 'mongo_concurrency': 100,
+        'mongo_latency_ms': 1.0,
+        'schedule_jobs': 5000, 'schedule_batch_size': 1000, 'fire_jobs': 2000, 'target_latency_ms': 5.0,
+    },
+    'large': {
+        'csv_files': 40, 'csv_rows_per_file': 250000, 'csv_hosts': 20000,
+        'report_months': 60, 'report_sources': 24, 'report_pages': 400, 'confluence_latency_ms': 2.0,
+        'mongo_documents': 20000, 'mongo_lookups': 40000, 'mongo_fields': 5000, 'mongo_concurrency': 200,
+        'mongo_latency_ms': 1.0,
+        'schedule_jobs': 20000, 'schedule_batch_size': 5000, 'fire_jobs': 5000, 'target_latency_ms': 5.0,
+    },
+}
+
+
+def metric(value: float, unit: str) -> dict:
+    """A result value; rates ('/s') are better higher, times and sizes better lower."""
+    return {'value': value, 'unit': unit, 'better': 'higher' if unit.endswith('/s') else 'lower'}
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def quiet_logging() -> None:
+    """The scripts log every file and page at INFO; keep the benchmark output readable."""
+    logging.getLogger().setLevel(logging.WARNING)
+    for handler in logging.getLogger().handlers:
+        handler.setLevel(logging.WARNING)
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_server(handler_class) -> StubServer:
+    server = StubServer(('127.0.0.1', 0), handler_class)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class JsonHandler(http.server.BaseHTTPRequestHandler):
+    """Keep-alive JSON responses after `latency` seconds; subclasses override handle_json."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body are written separately
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, method: str) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        time.sleep(self.latency)
+        status, payload = self.handle_json(method, body)
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.respond('GET')
+
+    def do_POST(self):
+        self.respond('POST')
+
+    def do_PUT(self):
+        self.respond('PUT')
+
+    def handle_json(self, method: str, body):
+        """(status, payload) for a request; anything a subclass does not serve is a 404."""
+        return 404, {'message': f"No route for {method} {self.path}"}
+
+
+# ============================
+# csvprocessor
+# ============================
+def csvprocessor_scenario(params: dict, work_dir: str) -> Dict[str, dict]:
+    rep = load_script('rep')
+    data_dir = os.path.join(work_dir, 'exports')
+    os.makedirs(data_dir)
+    files = generators.write_netdate_csvs(data_dir, rep.CSVProcessor.DATE_FORMATS, params['csv_files'],
+                                          params['csv_rows_per_file'], hosts=params['csv_hosts'],
+                                          seed=params['seed'])
+    rows = sum(count for _, count in files)
+    os.chdir(data_dir)
+    execution_info = {'timestamp': datetime(2025, 3, 11, 6, 14, 11), 'user': 'benchmark'}
+    quiet_logging()
+
+    def full_run():
+        rep.CSVProcessor(execution_info).process_all_files()
+
+    full = timed(full_run, repeat=1)
+    state_file = os.path.join(work_dir, 'state.db')
+    rep.CSVProcessor(execution_info).process_all_files(state_file=state_file)
+    unchanged = timed(lambda: rep.CSVProcessor(execution_info).process_all_files(state_file=state_file), repeat=1)
+
+    return {
+        'csvprocessor.process_all_files.seconds': metric(full, 's'),
+        'csvprocessor.process_all_files.rows_per_second': metric(rows / full, 'rows/s'),
+        'csvprocessor.incremental_unchanged.seconds': metric(unchanged, 's'),
+    }
+
+
+# ============================
+# confluence_report
+# ============================
+class ConfluenceHandler(JsonHandler):
+    """Just enough of the Confluence content API for ConfluenceReporter and ConfluencePublisher."""
+
+    pages: Dict[str, list] = {}
+    lock = threading.Lock()
+
+    def handle_json(self, method: str, body):
+        path, _, query = self.path.partition('?')
+        page_id = path[len(CONFLUENCE_PATH):]
+        with self.lock:
+            if method == 'GET' and page_id == 'search':
+                quoted = re.search(r'title in \((.*)\)', urllib.parse.unquote_plus(query)).group(1)
+                titles = [title.replace('\\"', '"') for title in re.findall(r'"((?:[^"\\]|\\.)*)"', quoted)]
+                results = [{'id': self.pages[t][0], 'title': t, 'version': {'number': self.pages[t][1]}}
+                           for t in titles if t in self.pages]
+                return 200, {'results': results, 'size': len(results)}
+            if method == 'GET':
+                title = urllib.parse.parse_qs(query).get('title', [''])[0]
+                page = self.pages.get(title)
+                results = [{'id': page[0], 'version': {'number': page[1]}}] if page else []
+                return 200, {'results': results, 'size': len(results)}
+            if method == 'POST':
+                page = self.pages[body['title']] = [str(len(self.pages) + 1), 1]
+            else:
+                page = self.pages[body['title']]
+                if body['version']['number'] != page[1] + 1:
+                    return 409, {'message': 'Version conflict'}
+                page[1] += 1
+            return 200, {'id': page[0], 'version': {'number': page[1]}}
+
+
+def confluence_report_scenario(params: dict, work_dir: str) -> Dict[str, dict]:
+    os.chdir(work_dir)
+    sys.path.insert(0, REPO_ROOT)
+    newconf = load_script('newconf')
+    quiet_logging()
+
+    summary = os.path.join(work_dir, 'task_usage_report_by_region.csv')
+    summary_rows = generators.write_task_usage_summary(summary, params['report_months'], params['report_sources'],
+                                                       seed=params['seed'])
+    ConfluenceHandler.latency = params['confluence_latency_ms'] / 1000
+    server = start_server(ConfluenceHandler)
+    config = {
+        'CONFLUENCE_URL': f"http://127.0.0.1:{server.server_address[1]}{CONFLUENCE_PATH}",
+        'USERNAME': 'benchmark', 'API_TOKEN': 'benchmark', 'SPACE_KEY': 'BENCH',
+        'PAGE_TITLE': 'Automated Task Usage Report', 'CSV_FILE': summary,
+        'PAGE_CACHE_FILE': os.path.join(work_dir, 'page_cache.json'),
+    }
+
+    def reporter(**overrides) -> 'newconf.ConfluenceReporter':
+        path = os.path.join(work_dir, 'config.json')
+        with open(path, 'w') as f:
+            json.dump({**config, **overrides}, f)
+        return newconf.ConfluenceReporter(path)
+
+    def load_and_render(instance):
+        instance.generate_table_and_chart(instance.load_and_process_data())
+
+    direct = reporter()
+    rollup = reporter(ROLLUP_DB=os.path.join(work_dir, 'rollup.db'))
+    load_and_render(rollup)  # initial ingest; later loads find the summary unchanged
+    render_direct = timed(load_and_render, direct, repeat=10)
+    render_rollup = timed(load_and_render, rollup, repeat=10)
+
+    publish = timed(direct.run, repeat=1)
+    unchanged = timed(direct.run, repeat=1)
+
+    content = direct.generate_table_and_chart(direct.load_and_process_data())
+    pages = [{'title': f"Task Usage {region}-{env} #{i}", 'content': content}
+             for i, (region, env) in enumerate(generators.region_envs(params['report_pages']))]
+    start = time.perf_counter()
+    results = direct.publish_pages(pages)
+    pages_elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    failed = sum(1 for result in results if result['action'] == 'failed')
+    if failed:
+        raise RuntimeError(f"{failed} regional pages failed to publish")
+    return {
+        'report.load_render.seconds': metric(render_direct, 's'),
+        'report.load_render_rollup.seconds': metric(render_rollup, 's'),
+        'report.summary_rows_per_second': metric(summary_rows / render_direct, 'rows/s'),
+        'report.publish.seconds': metric(publish, 's'),
+        'report.publish_unchanged.seconds': metric(unchanged, 's'),
+        'report.regional_pages.pages_per_second': metric(len(pages) / pages_elapsed, 'pages/s'),
+    }
+
+
+# ============================
+# mongo_service
+# ============================
+async def post_load(app, requests: List[tuple], concurrency: int) -> tuple:
+    """POST every (path, body) through the ASGI app; returns (requests/s, p50 ms, p99 ms)."""
+    import httpx
+
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://bench') as client:
+        async def one(path, body):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(path, json=body)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(path, body) for path, body in requests))
+        elapsed = time.perf_counter() - start
+    return len(requests) / elapsed, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000
+
+
+def mongo_service_scenario(params: dict, work_dir: str) -> Dict[str, dict]:
+    import random
+
+    import mongomock
+    from bench_mongo_service import AsyncMockCollection, MockDatabase
+
+    os.chdir(work_dir)
+    os.environ['COLLECTION_NAME'] = COLLECTION
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'mongoDB'))
+    import async_data
+    import main as service
+    from response_cache import ResponseCache
+
+    mock_db = mongomock.MongoClient()['bench']
+    mock_db[COLLECTION].create_index([('field', 1), ('origin', 1)])
+    latency = params['mongo_latency_ms'] / 1000
+    async_data.db = MockDatabase(lambda name: AsyncMockCollection(mock_db[name], latency))
+    service.COLLECTION_NAME = COLLECTION
+
+    documents = generators.mongo_documents(params['mongo_documents'], params['mongo_fields'], seed=params['seed'])
+    rng = random.Random(params['seed'])
+    fields = generators.field_names(params['mongo_fields'])
+    lookups = [('/retrieve-data', {'field': fields[rng.randrange(len(fields))]})
+               for _ in range(params['mongo_lookups'])]
+    concurrency = params['mongo_concurrency']
+
+    results = {}
+    async_data.cache = ResponseCache(max_entries=0)
+    for name, requests, cache in (
+        ('add_data', [('/add-data', {'dataObj': document}) for document in documents], None),
+        ('retrieve_data', lookups, None),
+        ('retrieve_data_cached', lookups, ResponseCache(max_entries=len(fields), ttl_seconds=300)),
+    ):
+        if cache is not None:
+            async_data.cache = cache
+        throughput, p50, p99 = asyncio.run(post_load(service.app, requests, concurrency))
+        results[f'mongo.{name}.requests_per_second'] = metric(throughput, 'req/s')
+        results[f'mongo.{name}.p50_ms'] = metric(p50, 'ms')
+        results[f'mongo.{name}.p99_ms'] = metric(p99, 'ms')
+    return results
+
+
+# ============================
+# scheduler
+# ============================
+class TargetHandler(JsonHandler):
+    """Job webhook target: counts POSTs in a value shared with the benchmark process."""
+
+    received = None
+
+    def handle_json(self, method: str, body):
+        with self.received.get_lock():
+            self.received.value += 1
+        return 200, {'status': 'ok'}
+
+
+def serve_target(port, received, latency: float) -> None:
+    """Target process entry point; kept out of the Scheduler's process so the two do not share a GIL."""
+    TargetHandler.received = received
+    TargetHandler.latency = latency
+    server = StubServer(('127.0.0.1', 0), TargetHandler)
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+def scheduler_scenario(params: dict, work_dir: str) -> Dict[str, dict]:
+    os.chdir(work_dir)
+    os.environ['JOB_STORE_URL'] = os.path.join(work_dir, 'jobs.db')
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'Scheduler'))
+    from fastapi.testclient import TestClient
+    import app as scheduler_app
+
+    context = multiprocessing.get_context('spawn')
+    port, received = context.Value('i', 0), context.Value('i', 0)
+    target = context.Process(target=serve_target, args=(port, received, params['target_latency_ms'] / 1000),
+                             daemon=True)
+    target.start()
+    while not port.value:
+        if not target.is_alive():
+            raise RuntimeError("Job target server failed to start")
+        time.sleep(0.01)
+    url = f"http://127.0.0.1:{port.value}/hook"
+    batch_size = params['schedule_batch_size']
+
+    def schedule(client, jobs):
+        for start in range(0, len(jobs), batch_size):
+            client.post('/schedule-jobs/', json=jobs[start:start + batch_size]).raise_for_status()
+
+    results = {}
+    with TestClient(scheduler_app.app) as client:
+        # Beyond the window jobs are only stored; inside it they are also added to APScheduler
+        now = datetime.now()
+        for name, run_at in (('store_only', now + timedelta(days=1)), ('in_window', now + timedelta(minutes=10))):
+            jobs = generators.job_burst(params['schedule_jobs'], url, run_at, seed=params['seed'])
+            elapsed = timed(schedule, client, jobs, repeat=1)
+            results[f'scheduler.schedule_{name}.jobs_per_second'] = metric(len(jobs) / elapsed, 'jobs/s')
+
+        # A burst due on the next whole second after scheduling completes, plus a lead
+        fire_jobs = params['fire_jobs']
+        run_at = (datetime.now() + timedelta(seconds=2)).replace(microsecond=0)
+        schedule(client, generators.job_burst(fire_jobs, url, run_at, seed=params['seed'] + 1))
+
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            if received.value >= fire_jobs and scheduler_app.job_store.count(['running']) == 0 \
+                    and scheduler_app.job_store.count(['succeeded', 'failed']) >= fire_jobs:
+                break
+            time.sleep(0.01)
+        else:
+            raise RuntimeError(f"Only {received.value} of {fire_jobs} jobs fired within 300s")
+        drain = time.time() - run_at.timestamp()
+
+        finished = scheduler_app.job_store.list_jobs(statuses=['succeeded', 'failed'])
+        latencies = [job['latency_ms'] for job in finished]
+        lag = scheduler_app.SCHEDULER_LAG.labels()
+    target.terminate()
+
+    failed = sum(1 for job in finished if job['status'] == 'failed')
+    if failed:
+        raise RuntimeError(f"{failed} fired jobs failed")
+    results.update({
+        'scheduler.fire.drain_seconds': metric(drain, 's'),
+        'scheduler.fire.jobs_per_second': metric(fire_jobs / drain, 'jobs/s'),
+        'scheduler.fire.mean_lag_ms': metric(lag.sum / max(sum(lag.counts), 1) * 1000, 'ms'),
+        'scheduler.fire.job_p50_ms': metric(percentile(latencies, 0.5), 'ms'),
+        'scheduler.fire.job_p99_ms': metric(percentile(latencies, 0.99), 'ms'),
+    })
+    return results
+
+
+SCENARIOS: Dict[str, Callable[[dict, str], Dict[str, dict]]] = {
+    'csvprocessor': csvprocessor_scenario,
+    'confluence_report': confluence_report_scenario,
+    'mongo_service': mongo_service_scenario,
+    'scheduler': scheduler_scenario,
+}
+
+
+def run_scenario(name: str, params: dict) -> Dict[str, dict]:
+    """Child process entry point: run one scenario in its own scratch directory."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            return SCENARIOS[name](params, work_dir)
+        finally:
+            os.chdir(REPO_ROOT)
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+
+    packages = {}
+    for package in ('pandas', 'numpy', 'pyarrow', 'fastapi', 'starlette', 'httpx', 'pymongo', 'mongomock',
+                    'apscheduler', 'jsonschema', 'requests'):
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+
+    return {'git_commit': commit, 'git_dirty': dirty, 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'packages': packages}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-metric changes against a baseline results file; True when nothing regressed."""
+    regressed = False
+    print(f"\n{'metric':<52}{'baseline':>12}{'current':>12}{'change':>9}  status")
+    for scenario, metrics in results['scenarios'].items():
+        for name, current in metrics['metrics'].items():
+            previous = baseline.get('scenarios', {}).get(scenario, {}).get('metrics', {}).get(name)
+            if previous is None or not previous['value']:
+                print(f"{name:<52}{'-':>12}{current['value']:>12.4g}{'':>9}  new")
+                continue
+            change = (current['value'] - previous['value']) / previous['value'] * 100
+            worse = change > threshold if current['better'] == 'lower' else change < -threshold
+            better = change < -threshold if current['better'] == 'lower' else change > threshold
+            regressed = regressed or worse
+            status = 'REGRESSED' if worse else 'improved' if better else 'ok'
+            print(f"{name:<52}{previous['value']:>12.4g}{current['value']:>12.4g}{change:>+8.1f}%  {status}")
+    return not regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per scenario; the median is reported")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', default=None, help="Earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Percent change in the worse direction counted as a regression (default: 10)")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    params = {**SCALES[args.scale], 'seed': args.seed}
+    results = {'version': RESULTS_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+               'scale': args.scale, 'repeat': args.repeat, 'params': params, 'environment': environment(),
+               'scenarios': {}}
+
+    print(f"{'metric':<52}{'median':>12}{'min':>12}{'max':>12}  unit")
+    context = multiprocessing.get_context('spawn')
+    for name in names:
+        runs = []
+        for _ in range(args.repeat):
+            # A fresh interpreter per run: no warm caches, module state or registered metrics carried over
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                runs.append(executor.submit(run_scenario, name, params).result())
+
+        metrics = {}
+        for metric_name, first in runs[0].items():
+            values = [run[metric_name]['value'] for run in runs]
+            metrics[metric_name] = {**first, 'value': statistics.median(values), 'runs': values}
+            print(f"{metric_name:<52}{statistics.median(values):>12.4g}{min(values):>12.4g}{max(values):>12.4g}"
+                  f"  {first['unit']}")
+        results['scenarios'][name] = {'metrics': metrics}
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('scale') != args.scale:
+            print(f"Warning: baseline scale '{baseline.get('scale')}' differs from '{args.scale}'")
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import matplotlib
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+CHART_CACHE_DIR = 'chart_cache'
+
+# Rendered PNGs kept in the cache; the least recently used are removed beyond this
+MAX_CACHED_CHARTS = 500
+
+# Bump when a chart kind's output changes so cached renders are not reused
+RENDERER_VERSION = 1
+
+
+def bar_chart(ax, df: pd.DataFrame, chart: dict) -> None:
+    """One bar series per value column, against the x column (conf_img.py / jjj layout)."""
+    x = chart.get('x', df.columns[0])
+    for column in chart.get('columns') or [c for c in df.columns if c != x]:
+        ax.bar(df[x], df[column], label=column)
+
+
+def baseline_chart(ax, df: pd.DataFrame, chart: dict) -> None:
+    """A constant baseline bar behind each day's total (cong666 layout)."""
+    x, y, width = chart.get('x', 'DATE'), chart.get('y', 'TOTAL_JOBS'), chart.get('bar_width', 0.4)
+    ax.bar(df[x], [chart['baseline']] * len(df), width=width, label='Baseline', color='green')
+    ax.bar(df[x], df[y], width=width, label='Total Jobs', color='red')
+
+
+CHART_KINDS: Dict[str, Callable] = {'bar': bar_chart, 'baseline': baseline_chart}
+
+
+def chart_hash(chart: dict) -> str:
+    """
+    Hash a chart's data and spec; equal hashes render identical images.
+
+    Args:
+        chart (dict): Chart with a 'data' DataFrame and its spec (kind, title, labels, ...)
+
+    Returns:
+        str: Hex sha256 digest
+    """
+    data = chart['data']
+    spec = {key: value for key, value in chart.items() if key != 'data'}
+    digest = hashlib.sha256(json.dumps(
+        [RENDERER_VERSION, matplotlib.__version__, spec, [str(c) for c in data.columns], [str(t) for t in data.dtypes]],
+        sort_keys=True, default=str
+    ).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    except TypeError:  # unhashable cell values, e.g. lists
+        digest.update(data.to_csv(index=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_chart(chart: dict, path: str) -> str:
+    """
+    Render a chart to a PNG file on an Agg canvas, without pyplot or a GUI backend.
+
+    Args:
+        chart (dict): Chart spec: 'data', 'kind' ('bar' or 'baseline'), 'title',
+            'xlabel', 'ylabel', 'rotation', 'figsize', 'bbox_inches' and kind options
+        path (str): Output file
+
+    Returns:
+        str: The output path
+    """
+    figure = Figure(figsize=chart.get('figsize', (10, 6)))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+
+    CHART_KINDS[chart.get('kind', 'bar')](ax, chart['data'], chart)
+    ax.set_xlabel(chart.get('xlabel', ''))
+    ax.set_ylabel(chart.get('ylabel', ''))
+    ax.set_title(chart.get('title', ''))
+    if chart.get('rotation'):
+        ax.tick_params(axis='x', labelrotation=chart['rotation'])
+    ax.legend()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    figure.savefig(tmp_path, format='png', bbox_inches=chart.get('bbox_inches'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def prune_cache(cache_dir: str = CHART_CACHE_DIR, max_entries: int = MAX_CACHED_CHARTS) -> int:
+    """Remove the least recently used renders beyond `max_entries`; returns how many were removed."""
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.png')]
+    if len(entries) <= max_entries:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        os.remove(entry.path)
+    return len(entries) - max_entries
+
+
+def render_charts(charts: List[dict], cache_dir: str = CHART_CACHE_DIR, workers: Optional[int] = None,
+                  max_cached: int = MAX_CACHED_CHARTS) -> List[dict]:
+    """
+    Render many charts, reusing cached PNGs and rendering the rest in a process pool.
+
+    Args:
+        charts (List[dict]): Chart specs (see render_chart) with a 'filename' for the attachment
+        cache_dir (str): Directory of rendered PNGs, named by chart hash
+        workers (Optional[int]): Render processes; defaults to the CPU count, 1 renders in-process
+        max_cached (int): Renders kept in the cache
+
+    Returns:
+        List[dict]: Per chart, in input order: filename, path, hash and whether it was cached
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    results, pending = [], {}
+
+    for chart in charts:
+        digest = chart_hash(chart)
+        path = os.path.join(cache_dir, f"{digest}.png")
+        cached = os.path.exists(path)
+        if cached:
+            os.utime(path)  # keep recently used renders out of pruning
+        elif path not in pending:
+            pending[path] = chart
+        results.append({"filename": chart.get('filename', f"{digest[:16]}.png"), "path": path,
+                        "hash": digest, "cached": cached})
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            list(executor.map(render_chart, pending.values(), pending.keys()))
+    else:
+        for path, chart in pending.items():
+            render_chart(chart, path)
+
+    prune_cache(cache_dir, max(max_cached, len(results)))
+    return results
@@ -1,8 +1,8 @@
 from atlassian import Confluence
 import pandas as pd
-import matplotlib.pyplot as plt
-import io
-import base64
+from chart_renderer import render_charts
+from confluence_publisher import attachment_comment, attachment_hash
+from storage_renderer import render_attachment_image, render_table, render_to_string
 
 # Confluence credentials and URL
 CONFLUENCE_URL = 'https://your-domain.atlassian.net/wiki'
@@ -22,49 +22,56 @@ confluence = Confluence(
 excel_file = 'path_to_your_excel_file.xlsx'
 df = pd.read_excel(excel_file)
 
-# Generate charts
-def create_chart(df, chart_title):
-    plt.figure(figsize=(10, 6))
-    for column in df.columns[1:]:
-        plt.bar(df['Date'], df[column], label=column)
-    plt.xlabel('Date')
-    plt.ylabel('Values')
-    plt.title(chart_title)
-    plt.legend()
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.read()).decode('utf-8')
-    return img_base64
+# Generate charts (cached by data and spec, rendered off-screen)
+charts = render_charts([{
+    'filename': 'task_usage_chart.png',
+    'kind': 'bar',
+    'data': df,
+    'x': 'Date',
+    'title': 'Task Usage Report',
+    'xlabel': 'Date',
+    'ylabel': 'Values'
+}])
 
-# Create charts
-img_base64 = create_chart(df, 'Task Usage Report')
+# Upload a chart only when it differs from the version already attached
+def upload_chart(page_id, chart):
+    existing = confluence.get_attachments_from_content(page_id, filename=chart['filename'],
+                                                       expand='version,metadata')
+    if any(attachment_hash(a) == chart['hash'] for a in existing.get('results', [])):
+        print(f'Chart "{chart["filename"]}" unchanged, skipping upload.')
+        return
+    with open(chart['path'], 'rb') as f:
+        confluence.attach_content(f.read(), name=chart['filename'], content_type='image/png',
+                                  page_id=page_id, comment=attachment_comment(chart['hash']))
+    print(f'Chart "{chart["filename"]}" uploaded.')
 
 # Prepare content for Confluence
 content = f"""
 <h1>Overall Monthly Task Usage Report</h1>
 <p>Here is the detailed report based on the uploaded data:</p>
 <h2>Data Table</h2>
-{df.to_html(index=False)}
+{render_to_string(render_table(df, list(df.columns)))}
 <h2>Charts</h2>
-<p><img src="data:image/png;base64,{img_base64}" alt="Task Usage Chart"/></p>
+<p>{render_attachment_image(charts[0]['filename'], 'Task Usage Chart')}</p>
 """
 
 # Create or update Confluence page
 existing_page = confluence.get_page_by_title(SPACE_KEY, PAGE_TITLE)
 
 if existing_page:
-    confluence.update_page(
+    page = confluence.update_page(
         page_id=existing_page['id'],
         title=PAGE_TITLE,
         body=content
     )
     print(f'Page "{PAGE_TITLE}" updated successfully.')
 else:
-    confluence.create_page(
+    page = confluence.create_page(
         space=SPACE_KEY,
         title=PAGE_TITLE,
         body=content
     )
     print(f'Page "{PAGE_TITLE}" created successfully.')
+
+for chart in charts:
+    upload_chart(page['id'], chart)
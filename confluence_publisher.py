@@ -0,0 +1,503 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Uploaded attachments record the hash of their source in the version comment
+ATTACHMENT_HASH_PREFIX = 'sha256:'
+
+
+def attachment_comment(content_hash: str) -> str:
+    """Version comment identifying an attachment's content."""
+    return f"{ATTACHMENT_HASH_PREFIX}{content_hash}"
+
+
+def attachment_hash(attachment: dict) -> Optional[str]:
+    """Return the content hash recorded on an attachment from the REST API, if any."""
+    for comment in ((attachment.get('metadata') or {}).get('comment'),
+                    (attachment.get('version') or {}).get('message')):
+        if comment and comment.startswith(ATTACHMENT_HASH_PREFIX):
+            return comment[len(ATTACHMENT_HASH_PREFIX):]
+    return None
+
+
+def create_pooled_session(config: dict, pool_size: int = 8) -> requests.Session:
+    """
+    Create a keep-alive session whose connection pool can serve `pool_size` concurrent requests.
+
+    Args:
+        config (dict): ConfluenceReporter configuration (USERNAME, API_TOKEN)
+        pool_size (int): Maximum pooled connections per host
+
+    Returns:
+        requests.Session: Configured session object
+    """
+    session = requests.Session()
+    session.auth = HTTPBasicAuth(config['USERNAME'], config['API_TOKEN'])
+    session.headers.update({
+        "Content-Type": "application/json",
+        "X-Atlassian-Token": "no-check"
+    })
+    session.verify = config.get('VERIFY_SSL', False)  # Self-signed certificates by default
+
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class PageCache:
+    """
+    Local JSON cache mapping (space, title) to page id, version and the
+    hash of the last published storage body.
+
+    Lets callers skip publishing unchanged content entirely and update
+    changed pages without a title lookup round-trip.
+    """
+
+    def __init__(self, path: str = "confluence_page_cache.json"):
+        """
+        Load the cache file if it exists.
+
+        Args:
+            path (str): Cache file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, 'r') as f:
+                self.entries: Dict[str, Dict[str, dict]] = json.load(f)
+        except FileNotFoundError:
+            self.entries = {}
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring corrupt page cache: {path}")
+            self.entries = {}
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Return the hash of a storage-format body."""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, space_key: str, title: str) -> Optional[dict]:
+        """Return the cached {'page_id', 'version', 'content_hash'} entry, if any."""
+        with self._lock:
+            return self.entries.get(space_key, {}).get(title)
+
+    def set(self, space_key: str, title: str, page_id: str, version: int, content_hash: str) -> None:
+        """Record the state of a page after a successful publish."""
+        with self._lock:
+            self.entries.setdefault(space_key, {})[title] = {
+                "page_id": str(page_id),
+                "version": version,
+                "content_hash": content_hash
+            }
+
+    def invalidate(self, space_key: str, title: str) -> None:
+        """Forget a page, e.g. after a version conflict."""
+        with self._lock:
+            self.entries.get(space_key, {}).pop(title, None)
+
+    def save(self) -> None:
+        """Atomically write the cache back to disk."""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class ConfluencePublisher:
+    """
+    Publish many Confluence pages per run over one pooled session.
+
+    Page specs are dicts with 'title' and 'content' (storage format) and
+    optional 'space_key', 'parent_id' and 'content_key' (text whose hash
+    identifies the content, e.g. the body without its "Last updated"
+    timestamp). Existing page ids are resolved in bulk with a CQL search,
+    then pages are created/updated concurrently with a bounded number of
+    workers, retrying 429s and transient errors with exponential backoff.
+    With a PageCache, unchanged pages are skipped and cached page ids are
+    used directly, re-resolving only on a 409 conflict or when the cached
+    page no longer exists (404).
+    """
+
+    # Titles per CQL search request, keeps the query string well below URL limits
+    LOOKUP_BATCH_SIZE = 50
+    # Attachments listed per request
+    ATTACHMENT_PAGE_SIZE = 200
+
+    def __init__(self, config: dict, session: Optional[requests.Session] = None,
+                 max_workers: int = 8, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, timeout: float = 30.0,
+                 page_cache: Optional[PageCache] = None):
+        """
+        Initialize the publisher.
+
+        Args:
+            config (dict): ConfluenceReporter configuration (CONFLUENCE_URL, SPACE_KEY, credentials)
+            session (Optional[requests.Session]): Session to reuse; a pooled one is created if omitted
+            max_workers (int): Maximum concurrent page updates
+            max_retries (int): Retries per request after the first attempt
+            backoff_base (float): Initial backoff delay in seconds
+            backoff_max (float): Upper bound for a single backoff delay in seconds
+            timeout (float): Per-request timeout in seconds
+            page_cache (Optional[PageCache]): Cache of page ids and published body hashes
+        """
+        self.config = config
+        self.base_url = config['CONFLUENCE_URL'].rstrip('/') + '/'
+        self.session = session or create_pooled_session(config, max_workers)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.page_cache = page_cache
+
+    @staticmethod
+    def content_hash(spec: dict) -> str:
+        """Hash identifying a page spec's content, from 'content_key' when given."""
+        content_key = spec.get('content_key')
+        return PageCache.content_hash(spec['content'] if content_key is None else content_key)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """Delay before the next attempt, honouring Retry-After on rate-limited responses."""
+        if response is not None and response.status_code == 429:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        delay = self.backoff_base * (2 ** attempt)
+        return min(delay, self.backoff_max) * random.uniform(0.5, 1.0)
+
+    def request(self, method: str, url: str, **kwargs) -> Tuple[requests.Response, int]:
+        """
+        Send a request, retrying rate-limited, 5xx and connection failures.
+
+        Args:
+            method (str): HTTP method
+            url (str): Request URL
+
+        Returns:
+            Tuple[requests.Response, int]: Final response and the number of attempts made
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response, attempt + 1
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"{method} {url} {'returned ' + str(response.status_code) if response is not None else 'failed'}; "
+                           f"retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def resolve_page_ids(self, titles: List[str], space_key: Optional[str] = None) -> Dict[str, Tuple[str, int]]:
+        """
+        Look up existing pages for many titles with batched CQL searches.
+
+        Args:
+            titles (List[str]): Page titles
+            space_key (Optional[str]): Space to search; defaults to the configured SPACE_KEY
+
+        Returns:
+            Dict[str, Tuple[str, int]]: Title -> (page id, current version) for pages that exist
+        """
+        space_key = space_key or self.config['SPACE_KEY']
+        found: Dict[str, Tuple[str, int]] = {}
+        unique_titles = list(dict.fromkeys(titles))
+
+        for i in range(0, len(unique_titles), self.LOOKUP_BATCH_SIZE):
+            batch = unique_titles[i:i + self.LOOKUP_BATCH_SIZE]
+            quoted = ', '.join('"{}"'.format(t.replace('\\', '\\\\').replace('"', '\\"')) for t in batch)
+            params = {
+                'cql': f'space = "{space_key}" and type = page and title in ({quoted})',
+                'expand': 'version',
+                'limit': len(batch),
+                'start': 0
+            }
+
+            while True:
+                response, _ = self.request('GET', f"{self.base_url}search", params=params)
+                response.raise_for_status()
+                data = response.json()
+
+                results = data.get('results', [])
+                for result in results:
+                    found[result['title']] = (result['id'], result['version']['number'])
+
+                if len(results) < params['limit']:
+                    break
+                params['start'] += len(results)
+
+        return found
+
+    def publish_page(self, spec: dict, existing: Optional[Tuple[str, int]], from_cache: bool = False) -> dict:
+        """
+        Create or update a single page.
+
+        Args:
+            spec (dict): Page spec with 'title', 'content' and optional 'space_key'/'parent_id'
+            existing (Optional[Tuple[str, int]]): (page id, version) if the page already exists
+            from_cache (bool): `existing` came from the page cache; a 409 conflict or
+                a 404 (page deleted) drops the cache entry and triggers a fresh
+                lookup and one more attempt
+
+        Returns:
+            dict: Result with title, page_id, action, status_code, attempts, latency and error
+        """
+        space_key = spec.get('space_key') or self.config['SPACE_KEY']
+        payload = {
+            "type": "page",
+            "title": spec['title'],
+            "space": {"key": space_key},
+            "body": {
+                "storage": {
+                    "value": spec['content'],
+                    "representation": "storage"
+                }
+            }
+        }
+        if spec.get('parent_id'):
+            payload["ancestors"] = [{"id": str(spec['parent_id'])}]
+
+        result = {"title": spec['title'], "page_id": None, "action": "updated" if existing else "created",
+                  "status_code": None, "attempts": 0, "latency": 0.0, "error": None}
+        start = time.perf_counter()
+        try:
+            while True:
+                if existing:
+                    page_id, version = existing
+                    payload["id"] = page_id
+                    payload["version"] = {"number": version + 1}
+                    response, attempts = self.request('PUT', f"{self.base_url}{page_id}", json=payload)
+                else:
+                    response, attempts = self.request('POST', self.base_url, json=payload)
+
+                result["status_code"] = response.status_code
+                result["attempts"] += attempts
+
+                if response.status_code in (404, 409) and from_cache:
+                    # Cached version is stale or the page was deleted: look it up once and retry
+                    reason = "Version conflict" if response.status_code == 409 else "Cached page not found"
+                    logger.info(f"{reason} on '{spec['title']}', refreshing page info")
+                    if self.page_cache:
+                        self.page_cache.invalidate(space_key, spec['title'])
+                    existing = self.resolve_page_ids([spec['title']], space_key).get(spec['title'])
+                    result["action"] = "updated" if existing else "created"
+                    from_cache = False
+                    continue
+                break
+
+            response.raise_for_status()
+            data = response.json()
+            result["page_id"] = data.get('id', existing[0] if existing else None)
+
+            if self.page_cache and result["page_id"]:
+                new_version = data.get('version', {}).get('number', existing[1] + 1 if existing else 1)
+                self.page_cache.set(space_key, spec['title'], result["page_id"], new_version,
+                                    self.content_hash(spec))
+
+        except requests.exceptions.RequestException as e:
+            result["action"] = "failed"
+            result["error"] = str(e)
+            logger.error(f"Failed to publish page '{spec['title']}': {str(e)}")
+
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    def publish(self, pages: List[dict]) -> List[dict]:
+        """
+        Publish a batch of pages concurrently.
+
+        Args:
+            pages (List[dict]): Page specs
+
+        Returns:
+            List[dict]: One result per page spec, in input order
+        """
+        existing: Dict[Tuple[str, str], Tuple[str, int]] = {}
+        cached: set = set()
+        skipped: Dict[int, dict] = {}
+        titles_by_space: Dict[str, List[str]] = {}
+
+        for index, spec in enumerate(pages):
+            space_key = spec.get('space_key') or self.config['SPACE_KEY']
+            entry = self.page_cache.get(space_key, spec['title']) if self.page_cache else None
+
+            if entry and entry['content_hash'] == self.content_hash(spec):
+                skipped[index] = {"title": spec['title'], "page_id": entry['page_id'], "action": "skipped",
+                                  "status_code": None, "attempts": 0, "latency": 0.0, "error": None}
+            elif entry:
+                existing[(space_key, spec['title'])] = (entry['page_id'], entry['version'])
+                cached.add((space_key, spec['title']))
+            else:
+                titles_by_space.setdefault(space_key, []).append(spec['title'])
+
+        for space_key, titles in titles_by_space.items():
+            for title, info in self.resolve_page_ids(titles, space_key).items():
+                existing[(space_key, title)] = info
+
+        def publish_spec(spec: dict) -> dict:
+            key = (spec.get('space_key') or self.config['SPACE_KEY'], spec['title'])
+            return self.publish_page(spec, existing.get(key), key in cached)
+
+        pending = [spec for index, spec in enumerate(pages) if index not in skipped]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            published = iter(list(executor.map(publish_spec, pending)))
+
+        results = [skipped[index] if index in skipped else next(published) for index in range(len(pages))]
+
+        if self.page_cache:
+            self.page_cache.save()
+
+        for result in results:
+            logger.info(f"Page '{result['title']}' {result['action']} in {result['latency'] * 1000:.1f} ms "
+                        f"({result['attempts']} attempt(s))")
+        return results
+
+    def publish_content(self, title: str, content: str, content_key: Optional[str] = None,
+                        space_key: Optional[str] = None, parent_id: Optional[str] = None) -> dict:
+        """
+        Publish a single report page, using the page cache to avoid redundant calls.
+
+        Unchanged content skips the network entirely; changed content is PUT
+        against the cached page id and version, with a title lookup only when
+        nothing is cached, the cached version conflicts or the cached page is gone.
+
+        Args:
+            title (str): Page title
+            content (str): Page content in Confluence storage format
+            content_key (Optional[str]): Text whose hash identifies the content; defaults to content
+            space_key (Optional[str]): Space of the page; defaults to the configured SPACE_KEY
+            parent_id (Optional[str]): Parent page id for a newly created page
+
+        Returns:
+            dict: Publish result, with action 'skipped' when the content is unchanged
+
+        Raises:
+            requests.exceptions.HTTPError: If the page could not be published
+        """
+        spec = {'title': title, 'content': content, 'content_key': content_key,
+                'space_key': space_key, 'parent_id': parent_id}
+        result = self.publish([spec])[0]
+        if result['action'] == 'failed':
+            raise requests.exceptions.HTTPError(f"Failed to publish page '{title}': {result['error']}")
+        return result
+
+    def list_attachments(self, page_id: str) -> Dict[str, dict]:
+        """
+        List a page's attachments.
+
+        Args:
+            page_id (str): Page id
+
+        Returns:
+            Dict[str, dict]: File name -> {'id', 'hash'} where hash is the recorded content hash, if any
+        """
+        params = {'expand': 'version,metadata', 'limit': self.ATTACHMENT_PAGE_SIZE, 'start': 0}
+        found: Dict[str, dict] = {}
+        while True:
+            response, _ = self.request('GET', f"{self.base_url}{page_id}/child/attachment", params=params)
+            response.raise_for_status()
+            results = response.json().get('results', [])
+            for result in results:
+                found[result['title']] = {"id": result['id'], "hash": attachment_hash(result)}
+
+            if len(results) < params['limit']:
+                break
+            params['start'] += len(results)
+        return found
+
+    def upload_attachment(self, page_id: str, attachment: dict, existing: Optional[dict]) -> dict:
+        """
+        Create an attachment or add a new version of it, unless its content hash is unchanged.
+
+        Args:
+            page_id (str): Page id
+            attachment (dict): 'filename', 'path' and 'hash', optional 'content_type'
+            existing (Optional[dict]): The page's current attachment of that name, from list_attachments
+
+        Returns:
+            dict: Result with filename, attachment_id, action, status_code, attempts, latency and error
+        """
+        filename = attachment['filename']
+        result = {"filename": filename, "attachment_id": existing['id'] if existing else None,
+                  "action": "updated" if existing else "created", "status_code": None,
+                  "attempts": 0, "latency": 0.0, "error": None}
+
+        if existing and existing['hash'] == attachment['hash']:
+            result["action"] = "skipped"
+            return result
+
+        start = time.perf_counter()
+        try:
+            with open(attachment['path'], 'rb') as f:
+                data = f.read()
+            url = f"{self.base_url}{page_id}/child/attachment"
+            if existing:
+                url += f"/{existing['id']}/data"
+            response, result["attempts"] = self.request(
+                'POST', url,
+                files={"file": (filename, data, attachment.get('content_type', 'image/png'))},
+                data={"comment": attachment_comment(attachment['hash']), "minorEdit": "true"},
+                headers={"Content-Type": None}  # let requests set the multipart boundary
+            )
+            result["status_code"] = response.status_code
+            response.raise_for_status()
+            body = response.json()
+            result["attachment_id"] = (body.get('results') or [body])[0].get('id', result["attachment_id"])
+
+        except (OSError, requests.exceptions.RequestException) as e:
+            result["action"] = "failed"
+            result["error"] = str(e)
+            logger.error(f"Failed to upload attachment '{filename}' to page {page_id}: {str(e)}")
+
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    def upload_attachments(self, page_id: str, attachments: List[dict]) -> List[dict]:
+        """
+        Upload files to a page concurrently, skipping those whose content hash
+        matches the version already attached.
+
+        Args:
+            page_id (str): Page id
+            attachments (List[dict]): 'filename', 'path' and 'hash' per file, e.g. from
+                chart_renderer.render_charts
+
+        Returns:
+            List[dict]: One result per attachment, in input order
+        """
+        existing = self.list_attachments(page_id)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(
+                lambda attachment: self.upload_attachment(page_id, attachment, existing.get(attachment['filename'])),
+                attachments
+            ))
+
+        for result in results:
+            logger.info(f"Attachment '{result['filename']}' {result['action']} on page {page_id}")
+        return results
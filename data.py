@@ -1,41 +1,52 @@
 import json
 from bson import ObjectId, json_util
 from pymongo import MongoClient, errors
-from jsonschema import validate, ValidationError
+from schema_registry import error_message, registry
 
 # Connect to MongoDB (local server or MongoDB Atlas)
 client = MongoClient('mongodb://localhost:27017/')  # Change URI for MongoDB Atlas if needed
 db = client['mydatabase']  # Replace with your database name
 
+# Most documents returned for one field lookup
+RETRIEVE_LIMIT = 1000
+
 class SchemaValidator:
     def __init__(self, db, schema_file="schema.json"):
-        """Load schema from a JSON file instead of hardcoding it."""
+        """Validate against a JSON schema file, compiled once and reloaded when the file changes."""
         self.db = db
-        self.json_schema = self.load_schema(schema_file)
+        self.schema_file = schema_file
+
+    @property
+    def json_schema(self):
+        return self.load_schema(self.schema_file)
 
     def load_schema(self, file_path):
-        """Read the schema from a JSON file."""
-        try:
-            with open(file_path, 'r') as file:
-                schema = json.load(file)
-            return schema
-        except FileNotFoundError:
-            print(f"Error: Schema file '{file_path}' not found.")
-            return None
-        except json.JSONDecodeError:
-            print(f"Error: Invalid JSON format in '{file_path}'.")
-            return None
+        """Return the schema currently loaded from a JSON file."""
+        return registry.schema_for_file(file_path)
+
+    def is_valid(self, document):
+        """Fast check without building error details."""
+        validator = registry.for_file(self.schema_file)
+        return validator is not None and validator.is_valid(document)
 
     def validate_document(self, document):
         """Validate the document against the schema."""
-        if not self.json_schema:
+        validator = registry.for_file(self.schema_file)
+        if validator is None:
             return {"status": "error", "message": "Schema not loaded."}
 
-        try:
-            validate(instance=document, schema=self.json_schema)
+        if validator.is_valid(document):
             return True  # Valid document
-        except ValidationError as e:
-            return {"status": "error", "message": f"Validation failed: {e.message}"}
+        return {"status": "error", "message": f"Validation failed: {error_message(validator, document)}"}
+
+# Validators by schema file; the compiled schemas themselves are shared through the registry
+_validators = {}
+
+def get_schema_validator(schema_file="schema.json"):
+    validator = _validators.get(schema_file)
+    if validator is None:
+        validator = _validators[schema_file] = SchemaValidator(db, schema_file)
+    return validator
 
 # Custom JSON encoder to handle ObjectId
 class JSONEncoder(json.JSONEncoder):
@@ -44,10 +55,21 @@ class JSONEncoder(json.JSONEncoder):
             return str(obj)
         return super().default(obj)
 
+# Convert BSON values (ObjectId, datetime, ...) in a document the way json_util does, without a JSON round-trip;
+# nested documents and arrays (e.g. workflow history) are converted too
+def _to_json(value):
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return json_util.default(value)
+
 # Function to add data to a collection
 def add_data_to_collection(collection_name: str, data_obj: dict, schema_file="schema.json"):
     try:
-        schema_obj = SchemaValidator(db, schema_file)
+        schema_obj = get_schema_validator(schema_file)
         
         # Validate the document
         validation_result = schema_obj.validate_document(data_obj)
@@ -66,15 +88,23 @@ def add_data_to_collection(collection_name: str, data_obj: dict, schema_file="sc
         return {"status": "error", "message": f"Database error: {str(e)}"}
 
 # Function to retrieve data based on field and return only that field's value
-def retrieve_data_from_collection(collection_name: str, field: str):
+# The filter on field (and optionally origin) is served by the field_1_origin_1 index from schema.json
+def retrieve_data_from_collection(collection_name: str, field: str, origin: str = None,
+                                  fields: list = None, limit: int = RETRIEVE_LIMIT):
     try:
         collection = db[collection_name]
-        results = list(collection.find({ "field": field }))
+
+        query = {"field": field}
+        if origin is not None:
+            query["origin"] = origin
+        projection = {name: 1 for name in fields} if fields else None
+
+        results = [_to_json(document) for document in collection.find(query, projection).limit(limit)]
         
         if not results:
             raise ValueError(f"No documents found for the field: {field}")
         
-        return json.loads(json.dumps(results, default=json_util.default))
+        return results
 
     except errors.PyMongoError as e:
         return {"status": "error", "message": str(e)}
@@ -0,0 +1,280 @@
+import os
+import asyncio
+from pymongo import ASCENDING, AsyncMongoClient, errors, monitoring
+from metrics import Tracer, registry, tracing_enabled
+from response_cache import MISSING, ResponseCache
+from documents import (BULK_CHUNK_SIZE, MAX_PAGE_SIZE, RETRIEVE_LIMIT, STREAM_BATCH_SIZE, _encoder, _to_json,
+                       bulk_summary, frame_chunk, frame_end, insert_errors, lookup_query, page_query,
+                       projection_for, schema_validator, validate_batch)
+
+# Database access for the FastAPI service, on the async driver.
+# The client is opened and closed by the app's startup/shutdown hooks.
+
+client = None
+db = None
+
+# Read-through cache for field lookups; configured in connect()
+cache = ResponseCache(max_entries=0)
+# Beyond this many distinct fields in one bulk write, the whole collection's entries are dropped
+MAX_FIELD_INVALIDATIONS = 256
+_watchers = []
+
+COMMAND_SECONDS = registry.histogram("mongodb_command_seconds", "MongoDB command round trips",
+                                     ["command", "outcome"])
+POOL_CHECKOUT_SECONDS = registry.histogram("mongodb_pool_checkout_seconds", "Time spent waiting for a pooled connection")
+POOL_CHECKOUT_FAILURES = registry.counter("mongodb_pool_checkout_failures_total",
+                                          "Connection checkouts that failed (e.g. waitQueueTimeoutMS)", ["reason"])
+POOL_IN_USE = registry.gauge("mongodb_pool_connections_in_use", "Pooled connections checked out")
+POOL_WAITING = registry.gauge("mongodb_pool_checkouts_waiting", "Requests waiting for a pooled connection")
+tracer = Tracer(registry, "data_api", tracing_enabled())
+
+
+
+# Times every command the client sends (find, getMore, insert, ...) from pymongo's monitoring events
+class CommandMetrics(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        COMMAND_SECONDS.labels(event.command_name, "success").observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        COMMAND_SECONDS.labels(event.command_name, "failure").observe(event.duration_micros / 1e6)
+
+
+
+# Connection pool pressure: checkout waits, failures and connections in use
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def connection_check_out_started(self, event):
+        POOL_WAITING.inc()
+
+    def connection_checked_out(self, event):
+        POOL_WAITING.dec()
+        POOL_IN_USE.inc()
+        POOL_CHECKOUT_SECONDS.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        POOL_WAITING.dec()
+        POOL_CHECKOUT_FAILURES.labels(event.reason).inc()
+        POOL_CHECKOUT_SECONDS.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        POOL_IN_USE.dec()
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+
+# Open the pooled client; called once on application startup.
+# Settings come from the environment (.env) unless passed in:
+#   MONGO_URI, MONGO_DB, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE and
+#   MONGO_WAIT_QUEUE_TIMEOUT_MS (how long a request waits for a free pooled connection)
+# Command and connection pool timings are recorded for /metrics.
+# The lookup cache is sized by RETRIEVE_CACHE_SIZE (entries, 0 disables it) and
+# RETRIEVE_CACHE_TTL_SECONDS
+async def connect(uri: str = None, database: str = None, **options):
+    global client, db, cache
+    cache = ResponseCache(max_entries=int(os.getenv("RETRIEVE_CACHE_SIZE", "1024")),
+                          ttl_seconds=float(os.getenv("RETRIEVE_CACHE_TTL_SECONDS", "30")))
+    options.setdefault("maxPoolSize", int(os.getenv("MONGO_MAX_POOL_SIZE", "100")))
+    options.setdefault("minPoolSize", int(os.getenv("MONGO_MIN_POOL_SIZE", "0")))
+    options.setdefault("waitQueueTimeoutMS", int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")))
+    options["event_listeners"] = [*options.get("event_listeners", []), CommandMetrics(), PoolMetrics()]
+    client = AsyncMongoClient(uri or os.getenv("MONGO_URI", "mongodb://localhost:27017/"), **options)
+    db = client[database or os.getenv("MONGO_DB", "mydatabase")]
+    return db
+
+
+
+# Close the client and its pool; called on application shutdown
+async def close():
+    global client, db
+    for task in _watchers:
+        task.cancel()
+    await asyncio.gather(*_watchers, return_exceptions=True)
+    _watchers.clear()
+
+    if client is not None:
+        await client.close()
+    client, db = None, None
+
+
+
+# Function to add data to a collection
+async def add_data_to_collection(collection_name: str, data_obj: dict):
+    with tracer.span("validate_document"):
+        validation_result = schema_validator.validate_document(data_obj)
+    if validation_result is not True:
+        return {"status": "error", "message": f"Schema validation failed: {validation_result['message']}"}
+
+    try:
+        result = await db[collection_name].insert_one(data_obj)
+        return {"status": "success", "inserted_id": str(result.inserted_id)}
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": f"Database error: {str(e)}"}
+    finally:
+        invalidate_fields(collection_name, [data_obj.get("field")])
+
+
+
+# Function to validate and insert one chunk of documents; invalid or rejected documents
+# are reported by their position (offset + index in the chunk) and do not stop the rest
+async def add_data_batch(collection_name: str, documents: list, offset: int = 0):
+    with tracer.span("validate_batch"):
+        valid, positions, errors_found = validate_batch(documents, offset)
+
+    inserted = 0
+    if valid:
+        try:
+            result = await db[collection_name].insert_many(valid, ordered=False)
+            inserted = len(result.inserted_ids)
+        except errors.PyMongoError as e:
+            inserted, failed = insert_errors(e, positions)
+            errors_found.extend(failed)
+        invalidate_fields(collection_name, [document.get("field") for document in valid])
+
+    errors_found.sort(key=lambda error: error["index"])
+    return {"inserted": inserted, "errors": errors_found}
+
+
+
+# Function to bulk insert documents in chunks of chunk_size
+async def add_many_to_collection(collection_name: str, documents, chunk_size: int = BULK_CHUNK_SIZE):
+    inserted, errors_found, received = 0, [], 0
+    for start in range(0, len(documents), chunk_size):
+        chunk = documents[start:start + chunk_size]
+        result = await add_data_batch(collection_name, chunk, start)
+        inserted += result["inserted"]
+        errors_found.extend(result["errors"])
+        received += len(chunk)
+    return bulk_summary(received, inserted, errors_found)
+
+
+
+# Drop cached lookups for the fields touched by a write. The schema check does not enforce
+# bsonType, so a field may be any JSON value; a non-string one (e.g. an array a lookup can
+# still match) drops the whole collection's entries
+def invalidate_fields(collection_name: str, fields: list):
+    if not all(isinstance(field, str) for field in fields):
+        cache.invalidate_collection(collection_name)
+        return
+    fields = set(fields)
+    if len(fields) > MAX_FIELD_INVALIDATIONS:
+        cache.invalidate_collection(collection_name)
+    else:
+        for field in fields:
+            cache.invalidate_field(collection_name, field)
+
+
+
+# Function to retrieve documents for a field (and optionally origin), read through the cache
+async def retrieve_data_from_collection(collection_name: str, field: str, origin: str = None,
+                                        fields: list = None, limit: int = RETRIEVE_LIMIT):
+    key = (collection_name, field, origin, tuple(fields) if fields else None, limit)
+    results = cache.get(key) if cache.enabled else MISSING
+    if results is not MISSING:
+        return results
+
+    try:
+        cursor = db[collection_name].find(lookup_query(field, origin), projection_for(fields)).limit(limit)
+        with tracer.span("retrieve_lookup"):
+            results = [_to_json(document) async for document in cursor]
+
+        if not results:
+            return {"status": "error", "message": f"No documents found for the field: {field}"}
+        cache.set(key, results)
+        return results
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": str(e)}
+
+
+
+# Invalidate cached lookups from the collection's change stream, so writes made through
+# other replicas of the service are seen too (needs a replica set). Inserts drop their
+# field; updates, replaces and deletes may have changed any field, so they drop the collection.
+async def watch_changes(collection_name: str, retry_seconds: float = 5.0):
+    while True:
+        try:
+            async with await db[collection_name].watch() as stream:
+                async for change in stream:
+                    document = change.get("fullDocument") or {}
+                    if change.get("operationType") == "insert" and "field" in document:
+                        invalidate_fields(collection_name, [document["field"]])
+                    else:
+                        cache.invalidate_collection(collection_name)
+        except errors.PyMongoError as e:
+            print(f"Change stream on '{collection_name}' failed: {e}; retrying in {retry_seconds}s")
+        # Changes may have been missed while the stream was down
+        cache.invalidate_collection(collection_name)
+        await asyncio.sleep(retry_seconds)
+
+
+
+# Start change-stream invalidation for a collection (RETRIEVE_CACHE_MODE=change-stream)
+def start_cache_watcher(collection_name: str):
+    _watchers.append(asyncio.create_task(watch_changes(collection_name)))
+
+
+
+# Cursor over a collection in _id order, resuming after the `after` _id
+def find_documents(collection_name: str, after: str = None, fields: list = None,
+                   limit: int = None, batch_size: int = STREAM_BATCH_SIZE):
+    cursor = db[collection_name].find(page_query(after), projection_for(fields),
+                                      batch_size=batch_size).sort("_id", ASCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+
+# Function to retrieve one page of data from a collection, each document encoded to JSON once
+async def retrieve_all_data(collection_name: str, limit: int = MAX_PAGE_SIZE, after: str = None, fields: list = None):
+    try:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        encoded, last_id = [], None
+        with tracer.span("retrieve_page"):
+            async for document in find_documents(collection_name, after, fields, limit):
+                last_id = document["_id"]
+                encoded.append(_encoder.encode(document))
+
+        next_after = str(last_id) if len(encoded) == limit else None
+        return {"status": "success", "data": encoded, "next_after": next_after}
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": str(e)}
+
+
+
+# Function to stream a whole collection as NDJSON (or a JSON array) in chunks of batch_size documents
+async def stream_all_data(collection_name: str, after: str = None, fields: list = None,
+                          batch_size: int = STREAM_BATCH_SIZE, ndjson: bool = True):
+    batch, first = [], True
+    async for document in find_documents(collection_name, after, fields, batch_size=batch_size):
+        batch.append(_encoder.encode(document))
+        if len(batch) >= batch_size:
+            yield frame_chunk(batch, ndjson, first)
+            batch, first = [], False
+    if batch:
+        yield frame_chunk(batch, ndjson, first)
+        first = False
+
+    end = frame_end(ndjson, first)
+    if end:
+        yield end
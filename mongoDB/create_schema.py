@@ -1,4 +1,6 @@
-from pymongo import MongoClient
+import json
+import os
+from pymongo import IndexModel, MongoClient
 from pymongo.errors import OperationFailure, PyMongoError
 
 # Connect to MongoDB (local server or MongoDB Atlas)
@@ -29,6 +31,20 @@ json_schema = {
     }
 }
 
+# Index declarations; (field, origin) also serves queries on field alone. The service's copy of
+# the root schema.json that add_schema.py reconciles (benchmarks/check_shared_modules.py checks they match)
+SCHEMA_FILE = os.getenv("SCHEMA_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.json"))
+
+# Build the IndexModels declared under "indexes" in the schema file
+def load_indexes(file_path: str = SCHEMA_FILE):
+    with open(file_path, 'r') as file:
+        spec = json.load(file)
+    indexes = []
+    for index_spec in spec.get("indexes", []):
+        options = {name: value for name, value in index_spec.items() if name != "keys"}
+        indexes.append(IndexModel(list(index_spec["keys"].items()), **options))
+    return indexes
+
 # Create or modify the collection with schema validation
 def create_or_update_collection_with_schema(collection_name: str = "collect"):
     try:
@@ -51,12 +67,18 @@ def create_or_update_collection_with_schema(collection_name: str = "collect"):
                 "validationLevel": "strict"  # Enforce strict validation
             })
             print(f"Collection '{collection_name}' updated with new JSON schema validator.")
+
+        # Existing indexes with the same definition are left as they are
+        created = db[collection_name].create_indexes(load_indexes())
+        print(f"Indexes on '{collection_name}': {', '.join(created)}")
     except OperationFailure as e:
         print("Error creating or updating collection:", e)
     except PyMongoError as e:
         print("General PyMongoError:", e)
+    except (OSError, ValueError) as e:
+        print(f"Error reading indexes from '{SCHEMA_FILE}':", e)
 
 
 
 # Usage
-# create_or_update_collection_with_schema("collect2")
\ No newline at end of file
+# create_or_update_collection_with_schema("collect2")
@@ -0,0 +1,183 @@
+import json
+from bson import ObjectId, json_util
+from pymongo import errors
+from jsonschema import validators
+from jsonschema.exceptions import best_match
+
+# Validation, encoding and query helpers shared by async_data.py and workflow.py.
+# Importing this module opens no MongoDB client.
+
+# Largest page served by a single paginated read
+MAX_PAGE_SIZE = 10000
+# Most documents returned for one field lookup
+RETRIEVE_LIMIT = 1000
+# Documents fetched per cursor round-trip and encoded per chunk when streaming
+STREAM_BATCH_SIZE = 1000
+# Documents validated and written per insert_many call in bulk loads
+BULK_CHUNK_SIZE = 1000
+
+
+class SchemaValidator:
+    # Compiled validators shared by every instance, keyed by the schema's canonical JSON
+    _compiled = {}
+
+    def __init__(self, db=None):
+        # Define the JSON schema for validation
+        self.json_schema = {
+            "bsonType": "object",
+            "additionalProperties": True,
+            "required": ["field", "datatype", "origin", "sample"],
+            "properties": {
+                "field": {
+                    "bsonType": "string"
+                },
+                "datatype": {
+                    "bsonType": "string"
+                },
+                "origin": {
+                    "bsonType": "string"
+                },
+                "sample": {
+                    "bsonType": "string"
+                },
+                "notes": {
+                    "bsonType": "string"
+                }
+            }
+        }
+        
+        self.db = db
+        self.validator = self.compile(self.json_schema)
+
+    @classmethod
+    def compile(cls, schema):
+        """Check the schema and build its validator once per process."""
+        key = json.dumps(schema, sort_keys=True)
+        validator = cls._compiled.get(key)
+        if validator is None:
+            validator_class = validators.validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = cls._compiled[key] = validator_class(schema)
+        return validator
+
+    def is_valid(self, document):
+        """Fast check without building error details."""
+        return self.validator.is_valid(document)
+
+    def validate_document(self, document):
+        """Validate the document against the schema."""
+        if self.validator.is_valid(document):
+            return True  # Valid document
+        # Error details are only worked out for invalid documents
+        error = best_match(self.validator.iter_errors(document))
+        return {"status": "error", "message": f"Validation failed: {error.message}"}
+        
+    def add_default_values(self, document):
+        """Add default values for missing required fields."""
+        # Set default values for missing fields
+        default_values = {
+            "field": "default_field",
+            "datatype": "default_datatype",
+            "origin": "default_origin",
+            "sample": "default_sample",
+            "notes": "default_notes"
+        }
+        
+        # Add default values if not provided
+        for key, value in default_values.items():
+            if key not in document:
+                document[key] = value
+        return document
+
+
+
+
+# Built once; the schema does not change while the service runs (validation never touches the database)
+schema_validator = SchemaValidator()
+
+
+# Custom JSON encoder to handle ObjectId
+class JSONEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, ObjectId):
+            return str(obj)
+        return super().default(obj)
+
+_encoder = JSONEncoder()
+
+# Convert BSON values (ObjectId, datetime, ...) in a document the way json_util does, without a JSON round-trip;
+# nested documents and arrays (e.g. workflow history) are converted too
+def _to_json(value):
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    return json_util.default(value)
+
+# Filter for a field lookup; served by the field_1_origin_1 index
+def lookup_query(field: str, origin: str = None):
+    query = {"field": field}
+    if origin is not None:
+        query["origin"] = origin
+    return query
+
+# Filter for documents after the `after` _id (keyset pagination)
+def page_query(after: str = None):
+    if after is None:
+        return {}
+    return {"_id": {"$gt": ObjectId(after) if ObjectId.is_valid(after) else after}}
+
+# Only the requested fields (plus _id) are sent back by the server
+def projection_for(fields: list = None):
+    return {name: 1 for name in fields} if fields else None
+
+# Validate one chunk of a bulk insert; returns the valid documents, their positions and the errors
+def validate_batch(documents: list, offset: int = 0):
+    errors_found, valid, positions = [], [], []
+    for index, document in enumerate(documents):
+        validation_result = schema_validator.validate_document(document) if isinstance(document, dict) \
+            else {"message": "Document must be a JSON object"}
+        if validation_result is True:
+            valid.append(document)
+            positions.append(offset + index)
+        else:
+            errors_found.append({"index": offset + index, "message": validation_result["message"]})
+    return valid, positions, errors_found
+
+# Per-document errors (by request position) from a failed unordered insert_many
+def insert_errors(error: errors.PyMongoError, positions: list):
+    if isinstance(error, errors.BulkWriteError):
+        return error.details.get("nInserted", 0), [
+            {"index": positions[write_error["index"]], "message": f"Database error: {write_error.get('errmsg')}"}
+            for write_error in error.details.get("writeErrors", [])
+        ]
+    return 0, [{"index": position, "message": f"Database error: {str(error)}"} for position in positions]
+
+
+
+# Overall status of a bulk insert
+def bulk_summary(received: int, inserted: int, errors_found: list):
+    if not errors_found:
+        status = "success"
+    elif inserted:
+        status = "partial"
+    else:
+        status = "error"
+    return {"status": status, "received": received, "inserted": inserted,
+            "failed": len(errors_found), "errors": errors_found}
+
+
+
+# Frame a batch of encoded documents as NDJSON lines or as the next piece of one JSON array
+def frame_chunk(batch: list, ndjson: bool, first: bool):
+    if ndjson:
+        return "\n".join(batch) + "\n"
+    return ("[" if first else ",") + ",".join(batch)
+
+# Closing piece of a stream; an empty collection still yields a complete JSON array
+def frame_end(ndjson: bool, empty: bool):
+    if ndjson:
+        return ""
+    return "[]" if empty else "]"
@@ -1,23 +1,128 @@
 import os
-from pydantic import BaseModel
+import json
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
-from fastapi.responses import JSONResponse
-from fastapi import FastAPI, HTTPException, status
-from data import add_data_to_collection, retrieve_all_data, retrieve_data_from_collection
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi import FastAPI, HTTPException, Query, Request, status
+import async_data
+import workflow
+from async_data import (add_data_batch, add_data_to_collection, add_many_to_collection,
+                        retrieve_all_data, retrieve_data_from_collection, stream_all_data)
+from documents import BULK_CHUNK_SIZE, MAX_PAGE_SIZE, RETRIEVE_LIMIT, bulk_summary
+from metrics import CONTENT_TYPE, MetricsMiddleware, registry
 
 app = FastAPI()
+app.add_middleware(MetricsMiddleware, registry=registry)
 
 # Load environment variables from .env file
 load_dotenv()
 COLLECTION_NAME = os.getenv("COLLECTION_NAME")
 
+# Largest chunk a bulk insert may request
+MAX_BULK_CHUNK_SIZE = 10000
+
+
+# One pooled client per process, opened and closed with the application
+@app.on_event("startup")
+async def open_client():
+    await async_data.connect()
+    # Writes invalidate cached lookups in this process; with several replicas behind a
+    # load balancer, RETRIEVE_CACHE_MODE=change-stream also picks up the others' writes
+    if async_data.cache.enabled and os.getenv("RETRIEVE_CACHE_MODE", "local") == "change-stream":
+        async_data.start_cache_watcher(COLLECTION_NAME)
+    await workflow.ensure_indexes()
+    # MR statuses of all waiting workflows are polled together every WORKFLOW_POLL_SECONDS
+    # (0 leaves it to a Scheduler job calling /workflows/check-mr, or to pushed statuses)
+    poll_seconds = float(os.getenv("WORKFLOW_POLL_SECONDS", "0"))
+    if poll_seconds > 0 and os.getenv("MR_STATUS_URL"):
+        workflow.start_mr_poller(poll_seconds)
+
+@app.on_event("shutdown")
+async def close_client():
+    await workflow.close()
+    await async_data.close()
+
+
+
 
 class AddDataPayload(BaseModel):
     dataObj: dict
 
 @app.post("/add-data")
-def add_data(param: AddDataPayload):
-    response = add_data_to_collection(COLLECTION_NAME, param.dataObj)
+async def add_data(param: AddDataPayload):
+    response = await add_data_to_collection(COLLECTION_NAME, param.dataObj)
+    if response.get("status") == "error":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
+        )
+    return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+
+
+
+
+# Split an NDJSON request body into lines as it arrives
+async def iter_ndjson_lines(request: Request):
+    buffer = b""
+    async for data in request.stream():
+        *lines, buffer = (buffer + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+# Validate and insert NDJSON documents chunk by chunk, without holding the whole body
+async def add_ndjson_stream(request: Request, chunk_size: int):
+    received, inserted, errors_found, chunk = 0, 0, [], []
+
+    async def flush():
+        nonlocal inserted
+        result = await add_data_batch(COLLECTION_NAME, chunk, received - len(chunk))
+        inserted += result["inserted"]
+        errors_found.extend(result["errors"])
+
+    async for line in iter_ndjson_lines(request):
+        try:
+            document = json.loads(line)
+        except ValueError as e:
+            # Keep chunk positions contiguous: write what came before, then record the bad line
+            if chunk:
+                await flush()
+                chunk = []
+            errors_found.append({"index": received, "message": f"Invalid JSON: {str(e)}"})
+            received += 1
+            continue
+
+        chunk.append(document)
+        received += 1
+        if len(chunk) >= chunk_size:
+            await flush()
+            chunk = []
+    if chunk:
+        await flush()
+
+    return bulk_summary(received, inserted, errors_found)
+
+# Bulk insert: a JSON array of documents or an NDJSON stream (Content-Type: application/x-ndjson).
+# Documents are validated and written in chunks with unordered inserts; failures are
+# reported per document index and do not abort the rest of the batch.
+@app.post("/add-data/bulk")
+async def add_data_bulk(request: Request, chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=MAX_BULK_CHUNK_SIZE)):
+    if "ndjson" in request.headers.get("content-type", ""):
+        response = await add_ndjson_stream(request, chunk_size)
+    else:
+        try:
+            documents = await request.json()
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON: {str(e)}")
+        if isinstance(documents, dict) and isinstance(documents.get("dataObjs"), list):
+            documents = documents["dataObjs"]
+        if not isinstance(documents, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Expected a JSON array of documents or an NDJSON body")
+        response = await add_many_to_collection(COLLECTION_NAME, documents, chunk_size)
+
     if response.get("status") == "error":
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
@@ -29,10 +134,13 @@ def add_data(param: AddDataPayload):
 
 class RetrieveDataPayload(BaseModel):
     field: str
+    origin: Optional[str] = None
+    fields: Optional[List[str]] = None  # Projection; whole documents when omitted
+    limit: int = Field(RETRIEVE_LIMIT, ge=1, le=MAX_PAGE_SIZE)
 
 @app.post("/retrieve-data")
-def retrieve_data(param: RetrieveDataPayload):
-    response = retrieve_data_from_collection(COLLECTION_NAME, param.field)
+async def retrieve_data(param: RetrieveDataPayload):
+    response = await retrieve_data_from_collection(COLLECTION_NAME, param.field, param.origin, param.fields, param.limit)
     if "status" in response and response["status"] == "error":
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
@@ -42,14 +150,66 @@ def retrieve_data(param: RetrieveDataPayload):
 
 
 
+# Hit/miss counters and size of the /retrieve-data cache
+@app.get("/cache-stats")
+async def cache_stats():
+    return async_data.cache.stats()
+
+
+
+# The same cache counters for /metrics, read at scrape time (the cache is rebuilt by connect())
+CACHE_EVENTS = ("hits", "misses", "evictions", "expirations", "invalidations")
+registry.gauge("retrieve_cache_entries", "Cached /retrieve-data results",
+               function=lambda: async_data.cache.stats()["size"])
+registry.gauge("retrieve_cache_events", "/retrieve-data cache events since startup", ["event"],
+               function=lambda: {event: value for event, value in async_data.cache.stats().items()
+                                 if event in CACHE_EVENTS})
+
+# Prometheus metrics: route latency and payload sizes, MongoDB command and pool
+# timings, cache counters and trace spans
+@app.get("/metrics")
+async def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+
+
+# Re-attach a chunk that was already pulled from a stream
+async def prepend(first: str, chunks):
+    yield first
+    async for chunk in chunks:
+        yield chunk
+
+# Without a limit the whole collection is streamed from the cursor (a JSON array, or
+# NDJSON with format=ndjson). With a limit one page is returned; pass the X-Next-After
+# response header back as `after` to fetch the next page.
 @app.get("/retrieve-all-data")
-def retrieve_all_data_endpoint():
+async def retrieve_all_data_endpoint(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,  # Comma-separated projection, e.g. "field,origin"
+    format: Literal["json", "ndjson"] = "json",
+):
     try:
-        # Await the retrieve_all_data function
-        response = retrieve_all_data(COLLECTION_NAME)
-        if isinstance(response, dict) and "error" in response:
-            raise HTTPException(status_code=400, detail=response["error"])
-        return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+        projection = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+        if limit is None:
+            chunks = stream_all_data(COLLECTION_NAME, after, projection, ndjson=format == "ndjson")
+            # Pull the first chunk here so connection errors still produce an error response
+            first = await anext(chunks, "")
+            media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+            return StreamingResponse(prepend(first, chunks), media_type=media_type)
+
+        response = await retrieve_all_data(COLLECTION_NAME, limit, after, projection)
+        if response.get("status") == "error":
+            raise HTTPException(status_code=400, detail=response["message"])
+
+        if format == "ndjson":
+            content, media_type = "".join(line + "\n" for line in response["data"]), "application/x-ndjson"
+        else:
+            content, media_type = "[" + ",".join(response["data"]) + "]", "application/json"
+        headers = {"X-Next-After": response["next_after"]} if response["next_after"] else None
+        return Response(content=content, media_type=media_type, headers=headers)
 
     except HTTPException as http_exc:
         return JSONResponse(content=http_exc.detail, status_code=http_exc.status_code)
@@ -60,3 +220,105 @@ def retrieve_all_data_endpoint():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+
+
+class WorkflowPayload(BaseModel):
+    host: str
+    master_cr: Optional[str] = None
+    cr: Optional[str] = None
+    workflow_id: Optional[str] = None
+    mr_push: bool = False  # The MR service pushes this CR's status; never poll it
+
+# A decommission request: one workflow per host, created in one insert
+@app.post("/workflows")
+async def create_workflows(param: List[WorkflowPayload]):
+    response = await workflow.create_workflows([item.model_dump() for item in param])
+    if response.get("status") == "error":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
+        )
+    return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+
+
+
+class WorkflowEventPayload(BaseModel):
+    workflow_id: str
+    event: str  # One of workflow.TRANSITIONS
+    detail: Optional[dict] = None  # e.g. {"cr": ...} for raise_crs, {"error": ...} for step_failed
+
+# Apply events to many workflows at once; events that do not apply in a workflow's
+# current state are rejected per index (409 when none could be applied)
+@app.post("/workflows/events")
+async def apply_workflow_events(param: List[WorkflowEventPayload]):
+    response = await workflow.apply_events([item.model_dump() for item in param])
+    if response.get("status") == "error":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
+        )
+    status_code = status.HTTP_409_CONFLICT if response["status"] == "rejected" else status.HTTP_200_OK
+    return JSONResponse(content=response, status_code=status_code)
+
+
+
+class MRStatusPayload(BaseModel):
+    cr: str
+    status: str
+
+# Push callback for the MR service: statuses for any number of CRs in one call.
+# A pushed status also holds the poller off that CR until its next round.
+@app.post("/workflows/mr-status")
+async def push_mr_status(param: List[MRStatusPayload]):
+    response = await workflow.apply_mr_statuses({item.cr: item.status for item in param}, "push")
+    if response.get("status") == "error":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
+        )
+    return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+
+# One batched MR status check for every waiting workflow, e.g. from a single recurring
+# Scheduler job instead of one polling job per host CR
+@app.post("/workflows/check-mr")
+async def check_mr_status(min_interval_seconds: float = Query(0, ge=0)):
+    if not os.getenv("MR_STATUS_URL"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="MR_STATUS_URL is not set")
+    response = await workflow.check_mr_statuses(min_interval_seconds=min_interval_seconds)
+    if response.get("status") == "error":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response
+        )
+    return JSONResponse(content=response, status_code=status.HTTP_200_OK)
+
+
+
+# One page of workflows; pass X-Next-After back as `after` for the next one
+@app.get("/workflows")
+async def list_workflows(
+    state: Optional[str] = None,
+    master_cr: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    history: bool = False,
+):
+    response = await workflow.list_workflows(state, master_cr, limit, after, history)
+    if response.get("status") == "error":
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response)
+    headers = {"X-Next-After": response["next_after"]} if response["next_after"] else None
+    return JSONResponse(content=response["data"], headers=headers)
+
+# Workflows per state, optionally for one master CR
+@app.get("/workflows/counts")
+async def workflow_counts(master_cr: Optional[str] = None):
+    response = await workflow.count_by_state(master_cr)
+    if response.get("status") == "error":
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=response)
+    return response
+
+@app.get("/workflows/{workflow_id}")
+async def get_workflow(workflow_id: str):
+    response = await workflow.get_workflow(workflow_id)
+    if response.get("status") == "error":
+        status_code = status.HTTP_404_NOT_FOUND if response["message"].startswith("Workflow not found") \
+            else status.HTTP_500_INTERNAL_SERVER_ERROR
+        raise HTTPException(status_code=status_code, detail=response)
+    return response
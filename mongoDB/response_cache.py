@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+# Returned by ResponseCache.get when there is no fresh entry (None can be a cached value)
+MISSING = object()
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with a TTL for /retrieve-data results.
+
+    Keys are (collection, field, ...) tuples; entries for one collection and
+    field can be dropped together when that field is written to. Holds at most
+    `max_entries` results; the least recently used one is evicted first.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()      # key -> (expires_at, value)
+        self._by_field = defaultdict(set)  # (collection, field) -> keys
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            if entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._by_field[key[:2]].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_field.get(key[:2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_field[key[:2]]
+
+    def invalidate_field(self, collection: str, field) -> int:
+        """Drop every cached result for one field of a collection."""
+        with self._lock:
+            keys = self._by_field.pop((collection, field), set())
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def invalidate_collection(self, collection: str) -> int:
+        """Drop every cached result for a collection."""
+        with self._lock:
+            dropped = 0
+            for group in [group for group in self._by_field if group[0] == collection]:
+                for key in self._by_field.pop(group):
+                    self._entries.pop(key, None)
+                    dropped += 1
+            self.invalidations += dropped
+            return dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_field.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,389 @@
+import os
+import json
+import uuid
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import httpx
+from pymongo import ASCENDING, IndexModel, UpdateMany, errors
+import async_data
+from documents import MAX_PAGE_SIZE, _to_json, insert_errors
+from metrics import registry
+
+# Decommission workflow state machine (README "State Changes in the Workflow").
+# One document per host in the workflow collection holds the current state, the host
+# CR and its last seen Master Record (MR) status. Transitions are applied in bulk:
+# one conditional update_many per (state, event) group, so a workflow that moved on
+# in the meantime is left alone and reported as a conflict.
+
+WORKFLOW_COLLECTION = os.getenv("WORKFLOW_COLLECTION", "workflows")
+
+INITIAL = "initial"                        # Initial Workflow Created
+INITIALIZED = "initialized"                # Workflow Initialized
+VALIDATION = "validation"                  # Validation
+READY_TO_VALIDATE = "ready_to_validate"    # Ready to Validate
+CRS_RAISED = "crs_raised"                  # CRs Raised for Hosts
+STATUS_RESET = "status_reset"              # Reset Workflow Status
+DB_UPDATED = "db_updated"                  # Updated Status in DB
+RESET = "reset"                            # Reset Workflow (validation failed)
+FAILED = "failed"                          # Reset Workflow State (any step failure)
+COMPLETED = "completed"                    # Workflow Completed
+
+STATES = (INITIAL, INITIALIZED, VALIDATION, READY_TO_VALIDATE, CRS_RAISED, STATUS_RESET,
+          DB_UPDATED, RESET, FAILED, COMPLETED)
+
+# event: (states it applies to, new state). A reset workflow starts over with the
+# next user action, as a freshly initialized one does.
+TRANSITIONS = {
+    "submit": ((INITIAL,), INITIALIZED),                            # User submits decommission request
+    "user_action": ((INITIALIZED, RESET, FAILED), VALIDATION),      # User takes action (Thursday/Friday)
+    "validation_passed": ((VALIDATION,), READY_TO_VALIDATE),
+    "validation_failed": ((VALIDATION,), RESET),
+    "raise_crs": ((READY_TO_VALIDATE,), CRS_RAISED),                # User clicks on action
+    "mr_status_changed": ((CRS_RAISED,), STATUS_RESET),             # MR approved/status changed
+    "verified": ((STATUS_RESET,), DB_UPDATED),                      # Workflow items moved to validation
+    "complete": ((DB_UPDATED,), COMPLETED),                         # No further action needed
+    "step_failed": (tuple(state for state in STATES if state not in (FAILED, COMPLETED)), FAILED),
+}
+
+# Fields an event's detail may set on the workflow document
+EVENT_FIELDS = {
+    "raise_crs": ("cr",),
+    "mr_status_changed": ("mr_status",),
+    "step_failed": ("error",),
+}
+
+# MR statuses that move a workflow on even when no earlier status was recorded;
+# any other status only does so once it differs from the last one seen
+APPROVED_STATUSES = {"approved"}
+
+# Transitions kept on each workflow document
+HISTORY_LIMIT = 50
+# CRs per MR status request and per bulk write
+MR_CHECK_BATCH_SIZE = int(os.getenv("MR_CHECK_BATCH_SIZE", "500"))
+
+indexes = [
+    IndexModel([("state", ASCENDING), ("mr_checked_at", ASCENDING)], name="state_1_mr_checked_at_1"),
+    IndexModel([("cr", ASCENDING)], name="cr_1"),
+    IndexModel([("master_cr", ASCENDING), ("state", ASCENDING)], name="master_cr_1_state_1"),
+]
+
+TRANSITIONS_TOTAL = registry.counter("workflow_transitions_total", "Workflow state transitions applied", ["event"])
+TRANSITION_CONFLICTS = registry.counter("workflow_transition_conflicts_total",
+                                        "Transitions skipped because the workflow changed state first")
+MR_STATUSES = registry.counter("workflow_mr_statuses_total", "MR statuses received, by how they arrived and what they did",
+                               ["source", "result"])
+MR_REQUEST_SECONDS = registry.histogram("workflow_mr_request_seconds", "Bulk MR status requests")
+
+_client = None
+_pollers = []
+
+
+
+def collection():
+    return async_data.db[WORKFLOW_COLLECTION]
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+
+# Create the workflow collection's indexes; called on application startup
+async def ensure_indexes():
+    try:
+        await collection().create_indexes(indexes)
+    except errors.PyMongoError as e:
+        print(f"Creating indexes on '{WORKFLOW_COLLECTION}' failed: {e}")
+
+
+
+# Update moving the matched workflows from `previous` to the event's new state
+def transition_update(previous: str, event: str, detail: dict, now: datetime, fields: dict = None):
+    new_state = TRANSITIONS[event][1]
+    entry = {"event": event, "from": previous, "to": new_state, "at": now}
+    if detail:
+        entry["detail"] = detail
+    values = {"state": new_state, "updated_at": now}
+    values.update({name: detail[name] for name in EVENT_FIELDS.get(event, ()) if detail and name in detail})
+    if event == "raise_crs":
+        values.update({"mr_status": None, "mr_checked_at": None})
+    values.update(fields or {})
+    return {"$set": values, "$inc": {"version": 1},
+            "$push": {"history": {"$each": [entry], "$slice": -HISTORY_LIMIT}}}
+
+
+
+# Function to create workflows for the hosts of a decommission request; they start
+# out initialized, the user's submission being the first event
+async def create_workflows(workflows: list):
+    now = utcnow()
+    documents = [{
+        "_id": item.get("workflow_id") or uuid.uuid4().hex,
+        "master_cr": item.get("master_cr"),
+        "host": item.get("host"),
+        "cr": item.get("cr"),
+        "state": INITIALIZED,
+        "version": 1,
+        "mr_status": None,
+        "mr_checked_at": None,
+        "mr_push": bool(item.get("mr_push", False)),
+        "created_at": now,
+        "updated_at": now,
+        "history": [{"event": "submit", "from": INITIAL, "to": INITIALIZED, "at": now}],
+    } for item in workflows]
+    if not documents:
+        return {"status": "success", "received": 0, "created": 0, "ids": [], "errors": []}
+
+    created, errors_found = len(documents), []
+    try:
+        await collection().insert_many(documents, ordered=False)
+    except errors.PyMongoError as e:
+        created, errors_found = insert_errors(e, list(range(len(documents))))
+    failed = {error["index"] for error in errors_found}
+    TRANSITIONS_TOTAL.labels("submit").inc(created)
+    return {
+        "status": "success" if not errors_found else "partial" if created else "error",
+        "received": len(documents),
+        "created": created,
+        "ids": [document["_id"] for index, document in enumerate(documents) if index not in failed],
+        "errors": errors_found,
+    }
+
+
+
+# Function to apply a batch of events ({"workflow_id", "event", "detail"}), at most one
+# per workflow. Current states are read with one query and the transitions written
+# with one unordered bulk_write. Events that do not apply are rejected per index.
+async def apply_events(events: list):
+    rejected, wanted = [], {}
+    for index, item in enumerate(events):
+        workflow_id, event = item.get("workflow_id"), item.get("event")
+        if event not in TRANSITIONS:
+            rejected.append({"index": index, "workflow_id": workflow_id, "message": f"Unknown event: {event}"})
+        elif workflow_id in wanted:
+            rejected.append({"index": index, "workflow_id": workflow_id,
+                             "message": "Only one event per workflow in a batch"})
+        else:
+            wanted[workflow_id] = (index, event, item.get("detail") or {})
+    if not wanted:
+        return {"status": "rejected" if rejected else "success", "applied": 0, "conflicts": 0, "rejected": rejected}
+
+    try:
+        current = {document["_id"]: document["state"]
+                   async for document in collection().find({"_id": {"$in": list(wanted)}}, {"state": 1})}
+
+        # Group by (current state, event, detail) so each group is a single update_many
+        groups = defaultdict(list)
+        for workflow_id, (index, event, detail) in wanted.items():
+            state = current.get(workflow_id)
+            if state is None:
+                rejected.append({"index": index, "workflow_id": workflow_id, "message": "Workflow not found"})
+            elif state not in TRANSITIONS[event][0]:
+                rejected.append({"index": index, "workflow_id": workflow_id,
+                                 "message": f"Event '{event}' does not apply in state '{state}'"})
+            else:
+                groups[(state, event, json.dumps(detail, sort_keys=True, default=str))].append(workflow_id)
+
+        applied = 0
+        if groups:
+            now, operations, counts = utcnow(), [], defaultdict(int)
+            for (state, event, detail), ids in groups.items():
+                operations.append(UpdateMany({"_id": {"$in": ids}, "state": state},
+                                             transition_update(state, event, json.loads(detail), now)))
+                counts[event] += len(ids)
+            result = await collection().bulk_write(operations, ordered=False)
+            applied = result.modified_count
+            for event, count in counts.items():
+                TRANSITIONS_TOTAL.labels(event).inc(count)
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": f"Database error: {str(e)}"}
+
+    conflicts = sum(len(ids) for ids in groups.values()) - applied
+    TRANSITION_CONFLICTS.inc(conflicts)
+    rejected.sort(key=lambda error: error["index"])
+    return {"status": "success" if not rejected else "partial" if applied else "rejected",
+            "applied": applied, "conflicts": conflicts, "rejected": rejected}
+
+
+
+# Function to record MR statuses ({cr: status}) for workflows waiting on their CRs.
+# An approved or changed status moves the workflow to "status_reset"; an unchanged one
+# only stamps mr_checked_at. Shared by the poller and the push callback.
+async def apply_mr_statuses(statuses: dict, source: str = "push"):
+    if not statuses:
+        return {"status": "success", "received": 0, "transitioned": 0, "unchanged": 0, "unknown": 0}
+    now = utcnow()
+    moved, recorded, matched = defaultdict(list), defaultdict(list), set()
+
+    try:
+        cursor = collection().find({"cr": {"$in": list(statuses)}, "state": CRS_RAISED}, {"cr": 1, "mr_status": 1})
+        async for document in cursor:
+            status, previous = statuses[document["cr"]], document.get("mr_status")
+            matched.add(document["cr"])
+            if str(status).lower() in APPROVED_STATUSES or (previous is not None and status != previous):
+                moved[status].append(document["_id"])
+            else:
+                recorded[status].append(document["_id"])
+
+        operations = [
+            UpdateMany({"_id": {"$in": ids}, "state": CRS_RAISED},
+                       transition_update(CRS_RAISED, "mr_status_changed", {"mr_status": status, "source": source},
+                                         now, {"mr_checked_at": now}))
+            for status, ids in moved.items()
+        ] + [
+            UpdateMany({"_id": {"$in": ids}, "state": CRS_RAISED}, {"$set": {"mr_status": status, "mr_checked_at": now}})
+            for status, ids in recorded.items()
+        ]
+        if operations:
+            await collection().bulk_write(operations, ordered=False)
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": f"Database error: {str(e)}"}
+
+    transitioned = sum(len(ids) for ids in moved.values())
+    unchanged = sum(len(ids) for ids in recorded.values())
+    unknown = len(set(statuses) - matched)
+    TRANSITIONS_TOTAL.labels("mr_status_changed").inc(transitioned)
+    MR_STATUSES.labels(source, "transitioned").inc(transitioned)
+    MR_STATUSES.labels(source, "unchanged").inc(unchanged)
+    MR_STATUSES.labels(source, "unknown").inc(unknown)
+    return {"status": "success", "received": len(statuses), "transitioned": transitioned,
+            "unchanged": unchanged, "unknown": unknown}
+
+
+
+# Statuses for a batch of CRs in one request to the MR service (MR_STATUS_URL).
+# The request body is {"crs": [...]}; the response maps CR to status, either at the
+# top level or under "statuses". CRs the service leaves out are polled again next time.
+async def fetch_mr_statuses(crs: list):
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=float(os.getenv("MR_STATUS_TIMEOUT_SECONDS", "30")))
+    with MR_REQUEST_SECONDS.time():
+        response = await _client.post(os.getenv("MR_STATUS_URL"), json={"crs": crs})
+    response.raise_for_status()
+    body = response.json()
+    statuses = body.get("statuses", body) if isinstance(body, dict) else body
+    if not isinstance(statuses, dict):
+        raise ValueError(f"expected an object of statuses by CR, got {type(statuses).__name__}")
+    return statuses
+
+
+
+# Function to poll the MR status of every workflow waiting on its CR, in batches of
+# batch_size CRs: one status request and one bulk write per batch. Workflows whose MR
+# status is pushed (mr_push) or was seen within min_interval_seconds are skipped.
+async def check_mr_statuses(fetch=None, batch_size: int = MR_CHECK_BATCH_SIZE, min_interval_seconds: float = 0):
+    fetch = fetch or fetch_mr_statuses
+    query = {"state": CRS_RAISED, "cr": {"$ne": None}, "mr_push": {"$ne": True}}
+    if min_interval_seconds:
+        cutoff = utcnow() - timedelta(seconds=min_interval_seconds)
+        query["$or"] = [{"mr_checked_at": None}, {"mr_checked_at": {"$lt": cutoff}}]
+    totals = {"status": "success", "checked": 0, "transitioned": 0, "unchanged": 0, "missing": 0, "batches": 0}
+
+    async def run(crs: list):
+        statuses = await fetch(crs)
+        result = await apply_mr_statuses({cr: statuses[cr] for cr in crs if statuses.get(cr) is not None}, "poll")
+        if result["status"] == "error":
+            raise errors.PyMongoError(result["message"])
+        totals["checked"] += len(crs)
+        totals["transitioned"] += result["transitioned"]
+        totals["unchanged"] += result["unchanged"]
+        totals["missing"] += len(crs) - result["received"]
+        totals["batches"] += 1
+
+    try:
+        batch = []
+        # _id order is stable while the batch updates stamp the documents already read
+        async for document in collection().find(query, {"cr": 1}, batch_size=batch_size).sort("_id", ASCENDING):
+            batch.append(document["cr"])
+            if len(batch) >= batch_size:
+                await run(batch)
+                batch = []
+        if batch:
+            await run(batch)
+    except errors.PyMongoError as e:
+        return {**totals, "status": "error", "message": f"Database error: {str(e)}"}
+    except (httpx.HTTPError, ValueError) as e:
+        return {**totals, "status": "error", "message": f"MR status request failed: {str(e)}"}
+    return totals
+
+
+
+# Poll MR statuses on one shared schedule for all hosts; a failed check is logged and
+# retried on the next round instead of ending the poller
+async def poll_mr_statuses(interval_seconds: float):
+    while True:
+        try:
+            result = await check_mr_statuses(min_interval_seconds=interval_seconds / 2)
+            if result["status"] == "error":
+                print(f"MR status check failed: {result['message']}")
+        except Exception as e:
+            print(f"MR status check failed: {type(e).__name__}: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+
+
+# Start the MR status poller; with MR statuses pushed to /workflows/mr-status it is not needed
+def start_mr_poller(interval_seconds: float):
+    _pollers.append(asyncio.create_task(poll_mr_statuses(interval_seconds)))
+
+
+
+# Stop the poller and close the MR service client; called on application shutdown
+async def close():
+    global _client
+    for task in _pollers:
+        task.cancel()
+    await asyncio.gather(*_pollers, return_exceptions=True)
+    _pollers.clear()
+
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+
+
+
+# Function to retrieve one page of workflows in _id order, optionally by state and master CR
+async def list_workflows(state: str = None, master_cr: str = None, limit: int = MAX_PAGE_SIZE,
+                         after: str = None, history: bool = False):
+    query = {}
+    if state is not None:
+        query["state"] = state
+    if master_cr is not None:
+        query["master_cr"] = master_cr
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    try:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor = collection().find(query, None if history else {"history": 0}).sort("_id", ASCENDING).limit(limit)
+        workflows = [_to_json(document) async for document in cursor]
+        next_after = workflows[-1]["_id"] if len(workflows) == limit else None
+        return {"status": "success", "data": workflows, "next_after": next_after}
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": str(e)}
+
+
+
+# Function to retrieve one workflow with its history
+async def get_workflow(workflow_id: str):
+    try:
+        document = await collection().find_one({"_id": workflow_id})
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": str(e)}
+    if document is None:
+        return {"status": "error", "message": f"Workflow not found: {workflow_id}"}
+    return _to_json(document)
+
+
+
+# Function to count workflows per state, optionally for one master CR
+async def count_by_state(master_cr: str = None):
+    pipeline = [{"$match": {"master_cr": master_cr}}] if master_cr is not None else []
+    pipeline.append({"$group": {"_id": "$state", "count": {"$sum": 1}}})
+    try:
+        counts = {state: 0 for state in STATES}
+        async for row in await collection().aggregate(pipeline):
+            counts[row["_id"]] = row["count"]
+        return counts
+    except errors.PyMongoError as e:
+        return {"status": "error", "message": str(e)}
@@ -0,0 +1,522 @@
+import argparse
+import csv
+import getpass
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for Parquet output
+    pa = None
+
+try:
+    import task_usage_store
+except ImportError:  # only needed for Parquet/Feather summaries
+    task_usage_store = None
+
+DEFAULT_TABLE = 'your_schema.net_report'
+
+# Rows fetched per round-trip (cursor.arraysize / fetchmany) and written per chunk
+CHUNK_SIZE = 50000
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+SUMMARY_FORMATS = ('csv', 'parquet', 'feather')
+
+# Same files and columns as rep's CSVProcessor reports
+SUMMARY_FILE = 'task_usage_report.csv'
+REGION_SUMMARY_FILE = 'task_usage_report_by_region.csv'
+SUMMARY_HEADERS = ['REGION', 'ENV', 'DATE', 'CTM_HOST_NAME', 'TOTAL_JOBS']
+REGION_SUMMARY_HEADERS = ['REGION', 'ENV', 'DATE', 'TOTAL_JOBS']
+
+# Raw net_report rows for a half-open [start_date, end_date) window. Both queries use
+# named binds, which sqlite3 and the Oracle drivers accept alike.
+RAW_QUERIES = {
+    'oracle': """
+        SELECT TO_CHAR(net_report.report_date, 'YYYY-MM-DD HH24:MI:SS') AS NET_DATE,
+               net_report.ctm_host_name,
+               net_report.data_fname,
+               net_report.node_id
+        FROM {table} net_report
+        WHERE net_report.report_date >= :start_date AND net_report.report_date < :end_date
+        ORDER BY net_report.report_date
+    """,
+    'sqlite': """
+        SELECT strftime('%Y-%m-%d %H:%M:%S', net_report.report_date) AS NET_DATE,
+               net_report.ctm_host_name,
+               net_report.data_fname,
+               net_report.node_id
+        FROM {table} net_report
+        WHERE net_report.report_date >= :start_date AND net_report.report_date < :end_date
+        ORDER BY net_report.report_date
+    """,
+}
+
+# Jobs per host and day, grouped in the database. {jobs} is COUNT(*) (one job per
+# net_report row) or SUM of a jobs column; see jobs_expression.
+AGGREGATE_QUERIES = {
+    'oracle': """
+        SELECT TO_CHAR(net_report.report_date, 'YYYY-MM-DD') AS NET_DATE,
+               TRIM(net_report.ctm_host_name) AS CTM_HOST_NAME,
+               {jobs} AS TOTAL_JOBS
+        FROM {table} net_report
+        WHERE net_report.report_date >= :start_date AND net_report.report_date < :end_date
+        GROUP BY TO_CHAR(net_report.report_date, 'YYYY-MM-DD'), TRIM(net_report.ctm_host_name)
+        ORDER BY 1, 2
+    """,
+    'sqlite': """
+        SELECT strftime('%Y-%m-%d', net_report.report_date) AS NET_DATE,
+               TRIM(net_report.ctm_host_name) AS CTM_HOST_NAME,
+               {jobs} AS TOTAL_JOBS
+        FROM {table} net_report
+        WHERE net_report.report_date >= :start_date AND net_report.report_date < :end_date
+        GROUP BY strftime('%Y-%m-%d', net_report.report_date), TRIM(net_report.ctm_host_name)
+        ORDER BY 1, 2
+    """,
+}
+
+
+def bind_range(dialect: str, start: datetime, end: datetime) -> dict:
+    """
+    Bind values for a [start, end) window in the dialect's date representation.
+
+    Args:
+        dialect (str): 'oracle' binds datetimes, 'sqlite' binds ISO text
+        start (datetime): Inclusive lower bound
+        end (datetime): Exclusive upper bound
+    """
+    if dialect == 'sqlite':
+        return {'start_date': start.strftime('%Y-%m-%d %H:%M:%S'), 'end_date': end.strftime('%Y-%m-%d %H:%M:%S')}
+    return {'start_date': start, 'end_date': end}
+
+
+def day_ranges(start: date, end: date) -> List[Tuple[datetime, datetime]]:
+    """
+    Split the inclusive date range start..end into one [day, next day) window per day.
+
+    Args:
+        start (date): First day
+        end (date): Last day (inclusive)
+
+    Raises:
+        ValueError: If start is after end
+    """
+    if start > end:
+        raise ValueError(f"start date {start} is after end date {end}")
+    days = (end - start).days + 1
+    first = datetime.combine(start, datetime.min.time())
+    return [(first + timedelta(days=i), first + timedelta(days=i + 1)) for i in range(days)]
+
+
+def iter_chunks(conn, query: str, params: dict, chunk_size: int = CHUNK_SIZE) -> Tuple[List[str], Iterator[list]]:
+    """
+    Run a query and stream its rows in chunks from the cursor.
+
+    Only `chunk_size` rows are held at a time; with server-side drivers such
+    as cx_Oracle/oracledb, arraysize is also the fetch size on the wire.
+
+    Args:
+        conn: DB-API connection
+        query (str): SQL with named binds
+        params (dict): Bind values
+        chunk_size (int): Rows per chunk
+
+    Returns:
+        Tuple[List[str], Iterator[list]]: Column names and an iterator of row lists
+    """
+    cursor = conn.cursor()
+    cursor.arraysize = chunk_size
+    cursor.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+
+    def chunks():
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    return columns, chunks()
+
+
+class CsvChunkWriter:
+    """Append row chunks to a CSV file with a header row."""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, rows: list) -> None:
+        self.writer.writerows(rows)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetChunkWriter:
+    """Append row chunks to a Parquet file, one row group per chunk."""
+
+    def __init__(self, path: str, columns: Sequence[str]):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output (pip install pyarrow)")
+        self.path = path
+        self.columns = list(columns)
+        self.writer = None
+
+    def write(self, rows: list) -> None:
+        data = {name: [row[i] for row in rows] for i, name in enumerate(self.columns)}
+        if self.writer is None:
+            table = pa.Table.from_pydict(data)
+            # Columns that are all NULL in the first chunk cannot be typed yet; store them as text
+            table = table.cast(pa.schema([
+                pa.field(field.name, pa.string() if pa.types.is_null(field.type) else field.type)
+                for field in table.schema
+            ]))
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pydict(data, schema=self.writer.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is None:
+            # Nothing matched: still leave a valid, empty file behind
+            pq.write_table(pa.table({name: pa.array([], pa.string()) for name in self.columns}), self.path)
+        else:
+            self.writer.close()
+
+
+WRITERS = {'csv': CsvChunkWriter, 'parquet': ParquetChunkWriter}
+
+
+def export_query(conn, query: str, params: dict, path: str, output_format: str = 'csv',
+                 chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Stream a query's rows into a CSV or Parquet file.
+
+    The file is written under a temporary name and renamed when complete, so
+    readers such as rep never pick up a half-written export.
+
+    Args:
+        conn: DB-API connection
+        query (str): SQL with named binds
+        params (dict): Bind values
+        path (str): Output file
+        output_format (str): 'csv' or 'parquet'
+        chunk_size (int): Rows fetched and written per chunk
+
+    Returns:
+        int: Number of rows written
+    """
+    columns, chunks = iter_chunks(conn, query, params, chunk_size)
+    tmp_path = f"{path}.tmp"
+    writer = WRITERS[output_format](tmp_path, columns)
+    rows_written = 0
+    try:
+        for rows in chunks:
+            writer.write(rows)
+            rows_written += len(rows)
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, path)
+    return rows_written
+
+
+def partition_path(output: str, day: datetime) -> str:
+    """
+    Per-day output path: 'EMEA-PROD.csv' -> 'EMEA-PROD-20240901.csv', which rep
+    still maps to region EMEA and environment PROD.
+    """
+    stem, ext = os.path.splitext(output)
+    return f"{stem}-{day.strftime('%Y%m%d')}{ext}"
+
+
+def extract(connect: Callable[[], object], start: date, end: date, output: str,
+            output_format: str = 'csv', dialect: str = 'sqlite', table: str = DEFAULT_TABLE,
+            chunk_size: int = CHUNK_SIZE, partition_by_day: bool = False, workers: int = 1,
+            query_template: Optional[str] = None) -> List[Tuple[str, int]]:
+    """
+    Export net_report rows for the inclusive date range start..end.
+
+    Args:
+        connect (Callable[[], object]): Returns a new DB-API connection; each
+            parallel partition uses its own
+        start (date): First day
+        end (date): Last day (inclusive)
+        output (str): Output file, or the base name of the per-day files
+        output_format (str): 'csv' or 'parquet'
+        dialect (str): 'oracle' or 'sqlite'
+        table (str): Source table
+        chunk_size (int): Rows fetched and written per chunk
+        partition_by_day (bool): Write one file per day
+        workers (int): Days exported concurrently when partitioning
+        query_template (Optional[str]): Query with a {table} placeholder; defaults
+            to the raw export for the dialect
+
+    Returns:
+        List[Tuple[str, int]]: Written files with their row counts
+
+    Raises:
+        ValueError: If start is after end
+    """
+    query = (query_template or RAW_QUERIES[dialect]).format(table=table)
+
+    def export(window_start: datetime, window_end: datetime, path: str) -> Tuple[str, int]:
+        conn = connect()
+        try:
+            return path, export_query(conn, query, bind_range(dialect, window_start, window_end),
+                                      path, output_format, chunk_size)
+        finally:
+            conn.close()
+
+    windows = day_ranges(start, end)
+    if not partition_by_day:
+        return [export(windows[0][0], windows[-1][1], output)]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(export, window_start, window_end, partition_path(output, window_start))
+                   for window_start, window_end in windows]
+        return [future.result() for future in futures]
+
+
+def jobs_expression(jobs_column: Optional[str] = None) -> str:
+    """
+    SQL aggregate for TOTAL_JOBS: COUNT(*) when every net_report row is one job,
+    otherwise the SUM of the given jobs column.
+
+    Args:
+        jobs_column (Optional[str]): Column holding a job count per row
+    """
+    if not jobs_column:
+        return 'COUNT(*)'
+    if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', jobs_column):
+        raise ValueError(f"Invalid jobs column: {jobs_column!r}")
+    return f'SUM(net_report.{jobs_column})'
+
+
+def aggregate_source(connect: Callable[[], object], region: str, env: str, start: date, end: date,
+                     dialect: str = 'sqlite', table: str = DEFAULT_TABLE, jobs_column: Optional[str] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Dict[Tuple, int]:
+    """
+    Sum jobs by (region, env, date, host) for one source database.
+
+    The database returns one row per host and day; keys are normalised the way
+    CSVProcessor does (host names stripped, unparsable dates skipped).
+
+    Args:
+        connect (Callable[[], object]): Returns a new DB-API connection
+        region (str): Region of the source, as rep reads it from the file name
+        env (str): Environment of the source
+        start (date): First day
+        end (date): Last day (inclusive)
+        dialect (str): 'oracle' or 'sqlite'
+        table (str): Source table
+        jobs_column (Optional[str]): Column to sum; rows are counted when omitted
+        chunk_size (int): Rows fetched per chunk
+
+    Returns:
+        Dict[Tuple, int]: Totals keyed by (region, env, date, host)
+    """
+    query = AGGREGATE_QUERIES[dialect].format(table=table, jobs=jobs_expression(jobs_column))
+    windows = day_ranges(start, end)
+    summary_data: Dict[Tuple, int] = {}
+
+    conn = connect()
+    try:
+        _, chunks = iter_chunks(conn, query, bind_range(dialect, windows[0][0], windows[-1][1]), chunk_size)
+        for rows in chunks:
+            for net_date, ctm_host_name, total_jobs in rows:
+                if net_date is None or total_jobs is None:
+                    continue
+                key = (region, env, net_date, (ctm_host_name or '').strip())
+                summary_data[key] = summary_data.get(key, 0) + int(total_jobs)
+    finally:
+        conn.close()
+    return summary_data
+
+
+def region_rollup(summary_data: Dict[Tuple, int]) -> Dict[Tuple, int]:
+    """Roll host-level totals up to (region, env, date)."""
+    summary_data_region: Dict[Tuple, int] = {}
+    for (region, env, net_date, _), total_jobs in summary_data.items():
+        key = (region, env, net_date)
+        summary_data_region[key] = summary_data_region.get(key, 0) + total_jobs
+    return summary_data_region
+
+
+def aggregate(sources: List[Tuple[str, str, Callable[[], object]]], start: date, end: date,
+              dialect: str = 'sqlite', table: str = DEFAULT_TABLE, jobs_column: Optional[str] = None,
+              chunk_size: int = CHUNK_SIZE, workers: int = 1) -> Tuple[Dict[Tuple, int], Dict[Tuple, int]]:
+    """
+    Build the host-level and region-level task usage summaries in the database.
+
+    Args:
+        sources (List[Tuple[str, str, Callable[[], object]]]): (region, env, connect) per source
+        start (date): First day
+        end (date): Last day (inclusive)
+        dialect (str): 'oracle' or 'sqlite'
+        table (str): Source table
+        jobs_column (Optional[str]): Column to sum; rows are counted when omitted
+        chunk_size (int): Rows fetched per chunk
+        workers (int): Sources queried concurrently
+
+    Returns:
+        Tuple[Dict[Tuple, int], Dict[Tuple, int]]: Host-level and region-level totals,
+            keyed like CSVProcessor.summary_data and summary_data_region
+
+    Raises:
+        ValueError: If start is after end
+    """
+    day_ranges(start, end)  # Rejects start > end before any source is queried
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [executor.submit(aggregate_source, connect, region, env, start, end,
+                                   dialect, table, jobs_column, chunk_size)
+                   for region, env, connect in sources]
+        partials = [future.result() for future in futures]
+
+    summary_data: Dict[Tuple, int] = {}
+    for partial in partials:
+        for key, total_jobs in partial.items():
+            summary_data[key] = summary_data.get(key, 0) + total_jobs
+    return summary_data, region_rollup(summary_data)
+
+
+def write_summary(filename: str, headers: List[str], data: Dict[Tuple, int], execution_timestamp: datetime,
+                  execution_user: str, output_format: str = 'csv', partition: bool = False) -> str:
+    """
+    Write a summary in the task_usage_report schema (see CSVProcessor.write_summary).
+
+    Args:
+        filename (str): Output CSV filename; columnar formats swap the extension
+        headers (List[str]): Column headers
+        data (Dict[Tuple, int]): Totals keyed by dimension tuples
+        execution_timestamp (datetime): Run timestamp written on every row
+        execution_user (str): Run user written on every row
+        output_format (str): 'csv', 'parquet' or 'feather'
+        partition (bool): Partition Parquet output by REGION/ENV
+
+    Returns:
+        str: Path written
+    """
+    if output_format == 'csv':
+        with open(filename, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(headers + ['EXECUTION_TIMESTAMP', 'EXECUTED_BY'])
+            timestamp = execution_timestamp.strftime('%Y-%m-%d %H:%M:%S')
+            for key, total_jobs in data.items():
+                writer.writerow(list(key) + [total_jobs, timestamp, execution_user])
+        return filename
+
+    if task_usage_store is None:
+        raise ImportError(f"task_usage_store (pandas, pyarrow) is required for {output_format} summaries")
+    path = task_usage_store.summary_path(filename, output_format)
+    table = task_usage_store.build_summary_table(headers, data, execution_timestamp, execution_user)
+    task_usage_store.write_summary_table(path, table, output_format, ['REGION', 'ENV'] if partition else None)
+    return path
+
+
+def write_summaries(summary_data: Dict[Tuple, int], summary_data_region: Dict[Tuple, int],
+                    execution_timestamp: datetime, execution_user: str, output_format: str = 'csv',
+                    partition: bool = False, directory: str = '.') -> List[str]:
+    """Write task_usage_report and task_usage_report_by_region into `directory`."""
+    return [
+        write_summary(os.path.join(directory, SUMMARY_FILE), SUMMARY_HEADERS, summary_data,
+                      execution_timestamp, execution_user, output_format, partition),
+        write_summary(os.path.join(directory, REGION_SUMMARY_FILE), REGION_SUMMARY_HEADERS, summary_data_region,
+                      execution_timestamp, execution_user, output_format, partition),
+    ]
+
+
+def parse_date(value: str) -> date:
+    """Parse a YYYY-MM-DD command line date."""
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_source(value: str) -> Tuple[str, str, str]:
+    """Parse REGION-ENV=DATABASE, naming a source the way rep names its CSV files."""
+    name, sep, database = value.partition('=')
+    parts = name.split('-')
+    if not sep or not database or len(parts) != 2 or not all(parts):
+        raise argparse.ArgumentTypeError(f"expected REGION-ENV=DATABASE, got {value!r}")
+    return parts[0], parts[1], database
+
+
+def main(connector: Callable[[str], Callable[[], object]], argv: Optional[List[str]] = None) -> None:
+    """
+    Command line of the sc and sql scripts: export raw net_report rows, or with
+    --aggregate write the task usage summaries.
+
+    Args:
+        connector (Callable[[str], Callable[[], object]]): Turns a --database/--source
+            value into a function opening a new DB-API connection
+        argv (Optional[List[str]]): Arguments; sys.argv[1:] by default
+    """
+    parser = argparse.ArgumentParser(description="Export net_report rows for a date range to CSV or Parquet.")
+    parser.add_argument('--start', type=parse_date, default=parse_date('2024-09-01'),
+                        help="First report day, YYYY-MM-DD (default: 2024-09-01)")
+    parser.add_argument('--end', type=parse_date, default=parse_date('2024-09-30'),
+                        help="Last report day, inclusive (default: 2024-09-30)")
+    parser.add_argument('--database', default='your_database.db',
+                        help="SQLite database file (default: your_database.db)")
+    parser.add_argument('--dialect', choices=sorted(RAW_QUERIES), default='sqlite',
+                        help="SQL dialect of the source database (default: sqlite)")
+    parser.add_argument('--table', default=DEFAULT_TABLE,
+                        help=f"Source table (default: {DEFAULT_TABLE})")
+    parser.add_argument('--output', default='net_report_data.csv',
+                        help="Output file, or the base name of per-day files (default: net_report_data.csv)")
+    parser.add_argument('--output-format', choices=SUMMARY_FORMATS, default='csv',
+                        help="Output format; feather only with --aggregate (default: csv)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"Rows fetched and written per chunk (default: {CHUNK_SIZE})")
+    parser.add_argument('--partition-by-day', action='store_true',
+                        help="Write one file per report day")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Days (or --aggregate sources) exported in parallel, one connection each (default: 1)")
+    parser.add_argument('--aggregate', action='store_true',
+                        help="Sum jobs by region, env, date and host in the database and write "
+                             "task_usage_report.csv / task_usage_report_by_region.csv instead of raw rows")
+    parser.add_argument('--source', action='append', type=parse_source, default=[], metavar='REGION-ENV=DATABASE',
+                        help="Database holding one region and environment (repeatable, --aggregate only)")
+    parser.add_argument('--jobs-column', default=None,
+                        help="Column holding a job count per row; rows are counted when omitted (--aggregate only)")
+    parser.add_argument('--executed-by', default=getpass.getuser(),
+                        help="EXECUTED_BY value of the summaries (default: current user)")
+    parser.add_argument('--partition', action='store_true',
+                        help="Partition parquet summaries by REGION/ENV (--aggregate only)")
+    args = parser.parse_args(argv)
+
+    if args.start > args.end:
+        parser.error(f"--start {args.start} is after --end {args.end}")
+    if args.aggregate and not args.source:
+        parser.error("--aggregate needs at least one --source REGION-ENV=DATABASE")
+    if not args.aggregate and args.output_format not in OUTPUT_FORMATS:
+        parser.error(f"raw exports support {', '.join(OUTPUT_FORMATS)}")
+
+    if args.aggregate:
+        sources = [(region, env, connector(database)) for region, env, database in args.source]
+        summary_data, summary_data_region = aggregate(
+            sources, args.start, args.end, dialect=args.dialect, table=args.table,
+            jobs_column=args.jobs_column, chunk_size=args.chunk_size, workers=args.workers)
+        paths = write_summaries(summary_data, summary_data_region, datetime.now(),
+                                                   args.executed_by, args.output_format, args.partition)
+        for path in paths:
+            print(f"Summary saved to {path}")
+        return
+
+    connect = connector(args.database)
+    files = extract(connect, args.start, args.end, args.output,
+                                       output_format=args.output_format, dialect=args.dialect,
+                                       table=args.table, chunk_size=args.chunk_size,
+                                       partition_by_day=args.partition_by_day, workers=args.workers)
+
+    for path, rows in files:
+        print(f"Data saved to {path} ({rows} rows)")
@@ -0,0 +1,299 @@
+import logging
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import getaddresses
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of a message to stop a worker
+_STOP = object()
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a failed send is worth retrying on a fresh connection (dropped connections, 4xx replies)."""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # Other smtplib errors (refused recipients, missing STARTTLS/AUTH support) will not go away
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class SMTPSession:
+    """
+    One authenticated SMTP connection, opened on first use and reused for
+    up to `max_messages` messages (many servers cap messages per session).
+
+    Config keys: SMTP_SERVER, SMTP_PORT, EMAIL_SENDER, EMAIL_PASSWORD and
+    optionally SMTP_USERNAME (defaults to EMAIL_SENDER), SMTP_SSL (implicit
+    TLS, port 465) and SMTP_STARTTLS (default True). Without a password the
+    session does not log in.
+    """
+
+    def __init__(self, config: dict, timeout: float = 30, max_messages: int = 100):
+        self.config = config
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.server: Optional[smtplib.SMTP] = None
+        self.messages = 0
+        self.connections = 0
+
+    def connect(self) -> None:
+        """Open the connection, upgrade it to TLS and log in."""
+        self.close()
+        host, port = self.config['SMTP_SERVER'], self.config.get('SMTP_PORT', 587)
+        if self.config.get('SMTP_SSL'):
+            server = smtplib.SMTP_SSL(host, port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(host, port, timeout=self.timeout)
+        try:
+            if not self.config.get('SMTP_SSL') and self.config.get('SMTP_STARTTLS', True):
+                server.starttls(context=ssl.create_default_context())
+            if self.config.get('EMAIL_PASSWORD'):
+                server.login(self.config.get('SMTP_USERNAME') or self.config['EMAIL_SENDER'],
+                             self.config['EMAIL_PASSWORD'])
+        except BaseException:
+            server.close()
+            raise
+        self.server, self.messages = server, 0
+        self.connections += 1
+
+    def send(self, message: EmailMessage) -> Dict[str, Tuple[int, bytes]]:
+        """
+        Send a message, (re)connecting first if needed.
+
+        Returns:
+            Dict[str, Tuple[int, bytes]]: Recipients the server refused, as smtplib reports them
+        """
+        if self.server is None or self.messages >= self.max_messages:
+            self.connect()
+        refused = self.server.send_message(message)
+        self.messages += 1
+        return refused
+
+    def close(self) -> None:
+        """End the session; a connection that is already gone is just dropped."""
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+        self.server = None
+
+
+class NotificationDispatcher:
+    """
+    Send notification email in the background, off the publishing thread.
+
+    Messages are queued and sent by `workers` threads, each holding one
+    SMTPSession reused across messages. A dropped connection or a 4xx reply
+    reopens the session and retries the message with exponential backoff;
+    other failures are recorded and the message is given up. Sessions idle
+    for `idle_seconds` are closed and reopened on the next message.
+
+    notify() collects lines (e.g. report page links) per recipient until
+    flush(), which sends one digest per group of recipients due the same
+    lines, addressed to up to `max_recipients` of them at a time. close()
+    flushes, waits for the queue to drain and returns the send statistics.
+    """
+
+    def __init__(self, config: dict, workers: int = 2, max_messages_per_session: int = 100,
+                 max_recipients: int = 50, max_retries: int = 3, backoff_factor: float = 0.5,
+                 timeout: float = 30, idle_seconds: float = 60, queue_size: int = 1000,
+                 digest_subject: str = "Report updates", preconnect: bool = True):
+        """
+        Start the worker threads.
+
+        Args:
+            config (dict): SMTPSession configuration
+            workers (int): Concurrent SMTP sessions
+            max_messages_per_session (int): Messages sent before a session is reopened
+            max_recipients (int): Recipients per digest message
+            max_retries (int): Retries per message after transient failures
+            backoff_factor (float): Base delay for exponential backoff, in seconds
+            timeout (float): Socket timeout, in seconds
+            idle_seconds (float): Idle time after which a session is closed
+            queue_size (int): Queued messages before send() blocks
+            digest_subject (str): Subject of digests mixing several subjects
+            preconnect (bool): Open the sessions straight away, while the caller is still publishing
+
+        Raises:
+            ValueError: If SMTP_SERVER or EMAIL_SENDER is missing from the config
+        """
+        missing = [key for key in ('SMTP_SERVER', 'EMAIL_SENDER') if not config.get(key)]
+        if missing:
+            raise ValueError(f"Notification config is missing {', '.join(missing)}")
+        self.config = config
+        self.max_messages_per_session = max_messages_per_session
+        self.max_recipients = max_recipients
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self.digest_subject = digest_subject
+        self.preconnect = preconnect
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.failures: List[dict] = []
+        self._pending: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "sent": 0, "failed": 0, "recipients": 0, "refused": 0,
+                       "retries": 0, "connections": 0}
+        self._threads = [threading.Thread(target=self._run, name=f"notification-{index}", daemon=True)
+                         for index in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def __enter__(self) -> 'NotificationDispatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def notify(self, recipients: Iterable[str], subject: str, text: str) -> None:
+        """Add a line for each recipient's next digest; repeated lines are sent once."""
+        with self._lock:
+            for recipient in recipients:
+                items = self._pending.setdefault(recipient, [])
+                if (subject, text) not in items:
+                    items.append((subject, text))
+
+    def flush(self) -> int:
+        """
+        Queue the digests for everything notified since the last flush.
+
+        Returns:
+            int: Messages queued
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        groups: Dict[Tuple[Tuple[str, str], ...], List[str]] = {}
+        for recipient, items in pending.items():
+            groups.setdefault(tuple(items), []).append(recipient)
+
+        queued = 0
+        for items, recipients in groups.items():
+            for start in range(0, len(recipients), self.max_recipients):
+                self.send(self.build_digest(recipients[start:start + self.max_recipients], list(items)))
+                queued += 1
+        return queued
+
+    def build_digest(self, recipients: List[str], items: List[Tuple[str, str]]) -> EmailMessage:
+        """One plain-text message listing every (subject, text) item."""
+        subjects = {subject for subject, _ in items}
+        subject = items[0][0] if len(subjects) == 1 else self.digest_subject
+        if len(items) == 1:
+            body = items[0][1]
+        else:
+            subject = f"{subject} ({len(items)})"
+            body = "\n".join(f"- {text}" for _, text in items)
+
+        message = EmailMessage()
+        message['From'] = self.config['EMAIL_SENDER']
+        message['To'] = ", ".join(recipients)
+        message['Subject'] = subject
+        message.set_content(f"Hello,\n\n{body}\n\nBest Regards.")
+        return message
+
+    def send(self, message: EmailMessage) -> None:
+        """Queue a message; blocks while the queue is full."""
+        if 'From' not in message:
+            message['From'] = self.config['EMAIL_SENDER']
+        with self._lock:
+            self._stats["queued"] += 1
+        self.queue.put(message)
+
+    def stats(self) -> dict:
+        """Counts of queued, sent and failed messages, delivered and refused recipients, retries and connections."""
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> dict:
+        """
+        Flush, send everything queued and stop the workers.
+
+        Returns:
+            dict: Final stats()
+        """
+        self.flush()
+        self.queue.join()
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        return self.stats()
+
+    def _record(self, **counts) -> None:
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def _run(self) -> None:
+        session = SMTPSession(self.config, self.timeout, self.max_messages_per_session)
+        if self.preconnect:
+            try:
+                session.connect()
+            except Exception as e:
+                logger.warning(f"SMTP connection failed, retrying on the first message: {e}")
+        try:
+            while True:
+                try:
+                    message = self.queue.get(timeout=self.idle_seconds)
+                except queue.Empty:
+                    session.close()
+                    continue
+                try:
+                    if message is _STOP:
+                        break
+                    self._deliver(session, message)
+                except Exception as e:
+                    # A message that cannot even be attempted is given up, not the worker
+                    self._fail(message, e)
+                    session.close()
+                finally:
+                    self.queue.task_done()
+        finally:
+            session.close()
+            self._record(connections=session.connections)
+
+    def _fail(self, message: EmailMessage, error: Exception, refused: int = 0) -> None:
+        """Record a message that was given up on."""
+        text = f"{type(error).__name__}: {error}"
+        logger.error(f"Giving up on '{message['Subject']}' to {message['To']}: {text}")
+        with self._lock:
+            self.failures.append({"subject": message['Subject'], "to": message['To'], "error": text})
+        self._record(failed=1, refused=refused)
+
+    def _deliver(self, session: SMTPSession, message: EmailMessage) -> bool:
+        """Send one message on the worker's session, reconnecting and retrying transient failures."""
+        recipients = len(getaddresses([value for header in ('To', 'Cc', 'Bcc')
+                                       for value in message.get_all(header, [])]))
+        for attempt in range(self.max_retries + 1):
+            try:
+                refused = session.send(message)
+            except Exception as e:
+                # Only dropped connections and 4xx replies are retried (see is_transient)
+                if not is_transient(e) or attempt == self.max_retries:
+                    self._fail(message, e, recipients if isinstance(e, smtplib.SMTPRecipientsRefused) else 0)
+                    if not isinstance(e, smtplib.SMTPRecipientsRefused):
+                        session.close()
+                    return False
+
+                session.close()
+                self._record(retries=1)
+                # A connection the server dropped while idle is reopened straight away
+                if attempt or not isinstance(e, smtplib.SMTPServerDisconnected):
+                    time.sleep(self.backoff_factor * (2 ** attempt))
+                continue
+
+            if refused:
+                logger.warning(f"Recipients refused for '{message['Subject']}': {', '.join(refused)}")
+            self._record(sent=1, recipients=recipients - len(refused), refused=len(refused))
+            return True
+        return False
@@ -0,0 +1,324 @@
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from task_usage_store import load_task_usage
+
+DEFAULT_ROLLUP_DB = 'task_usage_rollup.db'
+
+# Fixed baseline the reporters have always used; also the fallback when a rolling baseline has no history
+DEFAULT_BASELINE = 1899206
+
+# Region/env value of the rows that total every region and environment
+ALL = '*'
+
+# Peak days kept per month and scope; top-k and trailing k-th peak queries need k <= PEAK_RANKS
+PEAK_RANKS = 10
+
+SUMMARY_COLUMNS = ['REGION', 'ENV', 'DATE', 'TOTAL_JOBS']
+
+
+def _day(value) -> str:
+    """Normalise a date, datetime, Timestamp or date string to 'YYYY-MM-DD'."""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
+def shift_month(month: str, months: int) -> str:
+    """Return the 'YYYY-MM' month `months` after (or before, if negative) `month`."""
+    year, number = divmod(int(month[:4]) * 12 + int(month[5:7]) - 1 + months, 12)
+    return f"{year:04d}-{number + 1:02d}"
+
+
+class RollupStore:
+    """
+    SQLite-backed time series of task usage totals, kept across months and years.
+
+    Stores daily totals per region/env plus an ALL ('*') scope summed over
+    them, monthly totals and each month's PEAK_RANKS highest days. Loading a
+    summary replaces the totals of the days it contains and refreshes only the
+    affected months, so peaks, trailing baselines and month-over-month figures
+    are read from small precomputed tables instead of regrouping raw exports.
+    """
+
+    def __init__(self, path: str = DEFAULT_ROLLUP_DB):
+        """
+        Open (or create) the rollup database.
+
+        Args:
+            path (str): SQLite database file path
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS daily_totals (
+                region TEXT NOT NULL,
+                env TEXT NOT NULL,
+                date TEXT NOT NULL,
+                total_jobs INTEGER NOT NULL,
+                PRIMARY KEY (region, env, date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_daily_totals_date ON daily_totals (date);
+            CREATE TABLE IF NOT EXISTS monthly_totals (
+                region TEXT NOT NULL,
+                env TEXT NOT NULL,
+                month TEXT NOT NULL,
+                total_jobs INTEGER NOT NULL,
+                days INTEGER NOT NULL,
+                PRIMARY KEY (region, env, month)
+            );
+            CREATE TABLE IF NOT EXISTS monthly_peaks (
+                region TEXT NOT NULL,
+                env TEXT NOT NULL,
+                month TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                total_jobs INTEGER NOT NULL,
+                PRIMARY KEY (region, env, month, rank)
+            );
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                loaded_at TEXT NOT NULL
+            );
+        """)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def update(self, rows: Iterable[Tuple[str, str, object, int]]) -> int:
+        """
+        Load (region, env, date, total_jobs) rows, replacing the stored totals of
+        those days and refreshing the affected monthly totals and peaks.
+
+        Rows repeating a key (e.g. host-level rows) are summed first.
+
+        Args:
+            rows (Iterable[Tuple[str, str, object, int]]): Totals per region, env and day
+
+        Returns:
+            int: Number of (region, env, day) totals written
+        """
+        totals: Dict[Tuple[str, str, str], int] = {}
+        for region, env, day, total_jobs in rows:
+            if region == ALL or env == ALL:
+                raise ValueError(f"'{ALL}' is reserved for the all-regions scope")
+            key = (region, env, _day(day))
+            totals[key] = totals.get(key, 0) + int(total_jobs)
+
+        if not totals:
+            return 0
+
+        days = sorted({day for _, _, day in totals})
+        scopes = {(region, env, day[:7]) for region, env, day in totals}
+        scopes |= {(ALL, ALL, day[:7]) for day in days}
+
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO daily_totals VALUES (?, ?, ?, ?)",
+                                  ((*key, total_jobs) for key, total_jobs in totals.items()))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO daily_totals "
+                "SELECT ?, ?, date, SUM(total_jobs) FROM daily_totals WHERE date = ? AND region != ? GROUP BY date",
+                ((ALL, ALL, day, ALL) for day in days)
+            )
+            for region, env, month in sorted(scopes):
+                self._refresh_month(region, env, month)
+        return len(totals)
+
+    def _refresh_month(self, region: str, env: str, month: str) -> None:
+        """Recompute one month's total and peak days for a scope."""
+        window = (region, env, f"{month}-01", f"{shift_month(month, 1)}-01")
+        self.conn.execute("DELETE FROM monthly_totals WHERE region = ? AND env = ? AND month = ?",
+                          (region, env, month))
+        self.conn.execute("DELETE FROM monthly_peaks WHERE region = ? AND env = ? AND month = ?",
+                          (region, env, month))
+        self.conn.execute(
+            "INSERT INTO monthly_totals SELECT ?, ?, ?, SUM(total_jobs), COUNT(*) FROM daily_totals "
+            "WHERE region = ? AND env = ? AND date >= ? AND date < ? HAVING COUNT(*) > 0",
+            (region, env, month, *window)
+        )
+        self.conn.execute(
+            "INSERT INTO monthly_peaks "
+            "SELECT ?, ?, ?, ROW_NUMBER() OVER (ORDER BY total_jobs DESC, date), date, total_jobs "
+            "FROM daily_totals WHERE region = ? AND env = ? AND date >= ? AND date < ? "
+            "ORDER BY total_jobs DESC, date LIMIT ?",
+            (region, env, month, *window, PEAK_RANKS)
+        )
+
+    def update_from_summary(self, path: str, force: bool = False) -> int:
+        """
+        Load a task usage summary written by rep (CSV, Parquet or Feather),
+        unless it is unchanged since it was last loaded.
+
+        Summaries without REGION/ENV columns (e.g. a plain DATE/TOTAL_JOBS
+        export) are stored under an empty region and environment.
+
+        Args:
+            path (str): Summary file or partitioned Parquet directory
+            force (bool): Reload even if the file's size and mtime are unchanged
+
+        Returns:
+            int: Number of (region, env, day) totals written; 0 if the file was skipped
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        row = self.conn.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (key,)).fetchone()
+        if not force and row == (stat.st_size, stat.st_mtime_ns):
+            return 0
+
+        df = load_task_usage(key)
+        if not {'DATE', 'TOTAL_JOBS'}.issubset(df.columns):
+            raise ValueError(f"Summary missing required columns: {{'DATE', 'TOTAL_JOBS'}}: {path}")
+        for column in ('REGION', 'ENV'):
+            if column not in df.columns:
+                df[column] = ''
+
+        df = df.dropna(subset=['DATE', 'TOTAL_JOBS'])
+        grouped = df.groupby(['REGION', 'ENV', 'DATE'], as_index=False, observed=True)['TOTAL_JOBS'].sum()
+        written = self.update(grouped[SUMMARY_COLUMNS].itertuples(index=False, name=None))
+
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                              (key, stat.st_size, stat.st_mtime_ns, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        return written
+
+    def months(self, region: str = ALL, env: str = ALL) -> List[str]:
+        """Months with data for a scope, oldest first."""
+        return [month for (month,) in self.conn.execute(
+            "SELECT month FROM monthly_totals WHERE region = ? AND env = ? ORDER BY month", (region, env))]
+
+    def latest_month(self, region: str = ALL, env: str = ALL) -> Optional[str]:
+        """Most recent month with data for a scope."""
+        row = self.conn.execute("SELECT MAX(month) FROM monthly_totals WHERE region = ? AND env = ?",
+                                (region, env)).fetchone()
+        return row[0]
+
+    def daily_totals(self, start: Optional[object] = None, end: Optional[object] = None,
+                     region: str = ALL, env: str = ALL) -> List[Tuple[str, int]]:
+        """
+        Daily totals for a scope between two days (inclusive), for trend pages.
+
+        Returns:
+            List[Tuple[str, int]]: ('YYYY-MM-DD', total_jobs) in date order
+        """
+        return self.conn.execute(
+            "SELECT date, total_jobs FROM daily_totals WHERE region = ? AND env = ? AND date >= ? AND date <= ? "
+            "ORDER BY date",
+            (region, env, _day(start) if start else '0000-00-00', _day(end) if end else '9999-99-99')
+        ).fetchall()
+
+    @staticmethod
+    def _check_rank(k: int) -> None:
+        if not 1 <= k <= PEAK_RANKS:
+            raise ValueError(f"k must be between 1 and {PEAK_RANKS}, got {k}")
+
+    def top_peaks(self, month: str, k: int = 4, region: str = ALL, env: str = ALL) -> List[Tuple[str, int]]:
+        """
+        The k highest days of a month.
+
+        Returns:
+            List[Tuple[str, int]]: ('YYYY-MM-DD', total_jobs), highest first
+        """
+        self._check_rank(k)
+        return self.conn.execute(
+            "SELECT date, total_jobs FROM monthly_peaks WHERE region = ? AND env = ? AND month = ? AND rank <= ? "
+            "ORDER BY rank", (region, env, month, k)
+        ).fetchall()
+
+    def trailing_peak(self, month: str, months: int = 3, k: int = 4,
+                      region: str = ALL, env: str = ALL) -> Optional[int]:
+        """
+        The k-th highest day over the `months` months ending with `month`.
+
+        Each month's top PEAK_RANKS days always contain the window's top k,
+        so only the stored peaks are scanned.
+        """
+        self._check_rank(k)
+        row = self.conn.execute(
+            "SELECT total_jobs FROM monthly_peaks WHERE region = ? AND env = ? AND month >= ? AND month <= ? "
+            "ORDER BY total_jobs DESC LIMIT 1 OFFSET ?",
+            (region, env, shift_month(month, 1 - months), month, k - 1)
+        ).fetchone()
+        return row[0] if row else None
+
+    def baseline(self, month: str, months: int = 3, k: int = 4, region: str = ALL, env: str = ALL) -> Optional[int]:
+        """
+        Rolling baseline for a month: the k-th peak of the `months` months before it.
+
+        Returns:
+            Optional[int]: Baseline, or None without history
+        """
+        return self.trailing_peak(shift_month(month, -1), months, k, region, env)
+
+    def monthly_summary(self, start_month: Optional[str] = None, end_month: Optional[str] = None, k: int = 4,
+                        region: str = ALL, env: str = ALL) -> List[dict]:
+        """
+        Monthly totals with their k-th peak and the change from the previous calendar month.
+
+        Returns:
+            List[dict]: month, total_jobs, days, peak, previous_total, change and change_pct per month
+        """
+        self._check_rank(k)
+        rows = self.conn.execute("""
+            SELECT t.month, t.total_jobs, t.days, p.total_jobs, prev.total_jobs
+            FROM monthly_totals t
+            LEFT JOIN monthly_peaks p
+                ON p.region = t.region AND p.env = t.env AND p.month = t.month AND p.rank = ?
+            LEFT JOIN monthly_totals prev
+                ON prev.region = t.region AND prev.env = t.env
+               AND prev.month = substr(date(t.month || '-01', '-1 month'), 1, 7)
+            WHERE t.region = ? AND t.env = ? AND t.month >= ? AND t.month <= ?
+            ORDER BY t.month
+        """, (k, region, env, start_month or '0000-00', end_month or '9999-99')).fetchall()
+
+        summary = []
+        for month, total_jobs, days, peak, previous_total in rows:
+            change = total_jobs - previous_total if previous_total is not None else None
+            summary.append({
+                "month": month, "total_jobs": total_jobs, "days": days, "peak": peak,
+                "previous_total": previous_total, "change": change,
+                "change_pct": round(change / previous_total * 100, 2) if previous_total else None
+            })
+        return summary
+
+    def month_over_month(self, month: str, k: int = 4, region: str = ALL, env: str = ALL) -> Optional[dict]:
+        """Month-over-month comparison for one month (see monthly_summary)."""
+        summary = self.monthly_summary(month, month, k, region, env)
+        return summary[0] if summary else None
+
+    def peak_frame(self, month: Optional[str] = None, k: int = 4, baseline: Optional[int] = None,
+                   baseline_months: int = 3, default_baseline: Optional[int] = None,
+                   region: str = ALL, env: str = ALL) -> pd.DataFrame:
+        """
+        The reporters' "4th Peak of the Month" frame: a month's top-k days with a baseline.
+
+        Args:
+            month (Optional[str]): 'YYYY-MM'; defaults to the latest month stored
+            k (int): Number of peak days
+            baseline (Optional[int]): Fixed baseline; otherwise the trailing k-th peak of
+                the `baseline_months` months before `month`
+            baseline_months (int): Months in the rolling baseline window
+            default_baseline (Optional[int]): Used when there is no history for the rolling baseline
+            region (str): Region scope, ALL for every region
+            env (str): Environment scope, ALL for every environment
+
+        Returns:
+            pd.DataFrame: DATE (datetime64), TOTAL_JOBS and 'Base Line', highest day first
+        """
+        month = month or self.latest_month(region, env)
+        peaks = self.top_peaks(month, k, region, env) if month else []
+        if baseline is None and month:
+            baseline = self.baseline(month, baseline_months, k, region, env)
+        if baseline is None:
+            baseline = default_baseline
+
+        df = pd.DataFrame(peaks, columns=['DATE', 'TOTAL_JOBS'])
+        df['DATE'] = pd.to_datetime(df['DATE'])
+        df['Base Line'] = baseline
+        return df
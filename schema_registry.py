@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+
+from jsonschema import validators
+from jsonschema.exceptions import SchemaError, best_match
+
+
+class SchemaRegistry:
+    """
+    Process-wide cache of compiled JSON schema validators.
+
+    jsonschema.validate() checks the schema and builds a validator on every
+    call. Here each schema is checked and compiled once: file schemas are
+    keyed by path and recompiled when the file's mtime/size and content hash
+    change, inline schemas are keyed by a hash of their canonical JSON.
+    File changes are looked for at most every `check_interval` seconds.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._files = {}    # path -> {"stat", "hash", "checked_at", "schema", "validator"}
+        self._inline = {}   # schema hash -> validator
+
+    @staticmethod
+    def compile(schema: dict):
+        """Check a schema once and return a reusable validator for it."""
+        cls = validators.validator_for(schema)
+        cls.check_schema(schema)
+        return cls(schema)
+
+    @staticmethod
+    def _unwrap(spec: dict) -> dict:
+        # schema.json keeps the $jsonSchema under "validator", next to its index declarations
+        return spec.get("validator", spec)
+
+    def for_schema(self, schema: dict):
+        """Compiled validator for an inline schema, shared by equal schemas."""
+        key = hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+        validator = self._inline.get(key)
+        if validator is None:
+            with self._lock:
+                validator = self._inline.get(key)
+                if validator is None:
+                    validator = self._inline[key] = self.compile(schema)
+        return validator
+
+    def for_file(self, path: str):
+        """Compiled validator for a schema file, recompiled when the file changes; None if unreadable."""
+        entry = self._files.get(path)
+        now = time.monotonic()
+        if entry is not None and now - entry["checked_at"] < self.check_interval:
+            return entry["validator"]
+
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and now - entry["checked_at"] < self.check_interval:
+                return entry["validator"]
+            return self._refresh(path, entry, now)
+
+    def _refresh(self, path: str, entry: Optional[dict], now: float):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            if entry is None or entry["stat"] is not None:
+                print(f"Error: Schema file '{path}' not found.")
+            # Remember the miss so it is re-checked once per interval, not per document
+            self._files[path] = {"stat": None, "hash": None, "checked_at": now,
+                                 "schema": None, "validator": None}
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry["stat"] == signature:
+            entry["checked_at"] = now
+            return entry["validator"]
+
+        with open(path, "rb") as file:
+            content = file.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        # Touched but unchanged (e.g. re-deployed) files keep their compiled validator
+        if entry is not None and entry["hash"] == digest:
+            entry.update(stat=signature, checked_at=now)
+            return entry["validator"]
+
+        try:
+            schema = self._unwrap(json.loads(content))
+            validator = self.compile(schema)
+        except (ValueError, SchemaError) as e:
+            print(f"Error: Invalid schema in '{path}': {e}")
+            # Keep serving the last good schema rather than failing every document
+            if entry is not None and entry["validator"] is not None:
+                entry.update(stat=signature, hash=digest, checked_at=now)
+                return entry["validator"]
+            self._files[path] = {"stat": signature, "hash": digest, "checked_at": now,
+                                 "schema": None, "validator": None}
+            return None
+
+        if entry is not None and entry["validator"] is not None:
+            print(f"Reloaded schema from '{path}'.")
+        self._files[path] = {"stat": signature, "hash": digest, "checked_at": now,
+                             "schema": schema, "validator": validator}
+        return validator
+
+    def schema_for_file(self, path: str) -> Optional[dict]:
+        """The schema currently compiled for `path`."""
+        self.for_file(path)
+        entry = self._files.get(path)
+        return entry["schema"] if entry is not None else None
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Forget one compiled file schema (or all), forcing a reload on next use."""
+        with self._lock:
+            if path is None:
+                self._files.clear()
+                self._inline.clear()
+            else:
+                self._files.pop(path, None)
+
+
+def error_message(validator, document) -> Optional[str]:
+    """Message of the most relevant validation error, or None if the document is valid."""
+    error = best_match(validator.iter_errors(document))
+    return error.message if error is not None else None
+
+
+# Shared by every SchemaValidator in the process
+registry = SchemaRegistry()
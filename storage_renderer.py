@@ -0,0 +1,200 @@
+from html import escape
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Default rows per yielded chunk when streaming table markup
+CHUNK_ROWS = 5000
+
+# Confluence rejects very large page bodies; stay well below the limit
+DEFAULT_MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+Formatter = Callable[[pd.Series], pd.Series]
+
+
+def date_formatter(fmt: str = '%Y-%m-%d') -> Formatter:
+    """Format a datetime column, e.g. DATE, with strftime in one pass."""
+    return lambda series: pd.to_datetime(series).dt.strftime(fmt)
+
+
+def thousands_formatter(series: pd.Series) -> pd.Series:
+    """Format an integer column with thousands separators (1,899,206)."""
+    return series.map('{:,}'.format)
+
+
+def _escape_column(series: pd.Series) -> pd.Series:
+    """Convert a column to escaped XHTML text; missing values render as empty cells."""
+    text = series.astype(object).where(series.notna(), '').astype(str)
+    return (text.str.replace('&', '&amp;', regex=False)
+                .str.replace('<', '&lt;', regex=False)
+                .str.replace('>', '&gt;', regex=False)
+                .str.replace('"', '&quot;', regex=False))
+
+
+def render_rows(df: pd.DataFrame, columns: List[str],
+                formatters: Optional[Dict[str, Formatter]] = None) -> pd.Series:
+    """
+    Build one '<tr>...</tr>' string per dataframe row from whole columns.
+
+    Args:
+        df (pd.DataFrame): Source data
+        columns (List[str]): Columns to render, in order
+        formatters (Optional[Dict[str, Formatter]]): Per-column formatters applied before escaping
+
+    Returns:
+        pd.Series: Row markup aligned with df
+    """
+    if not columns:
+        return pd.Series('<tr></tr>', index=df.index, dtype=object)
+
+    formatters = formatters or {}
+    rows = None
+    for column in columns:
+        values = df[column]
+        if column in formatters:
+            values = formatters[column](values)
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            # Match DataFrame.to_html: date-only values render without a time part
+            has_time = (values.dropna() != values.dropna().dt.normalize()).any()
+            values = date_formatter('%Y-%m-%d %H:%M:%S' if has_time else '%Y-%m-%d')(values)
+        cells = _escape_column(values)
+        rows = '<tr><td>' + cells if rows is None else rows + '</td><td>' + cells
+    return rows + '</td></tr>'
+
+
+def render_table(df: pd.DataFrame, columns: List[str], headers: Optional[List[str]] = None,
+                 formatters: Optional[Dict[str, Formatter]] = None, table_class: Optional[str] = None,
+                 chunk_rows: int = CHUNK_ROWS) -> Iterator[str]:
+    """
+    Stream an XHTML table in chunks of `chunk_rows` rows.
+
+    Args:
+        df (pd.DataFrame): Source data
+        columns (List[str]): Columns to render, in order
+        headers (Optional[List[str]]): Header labels; defaults to the column names
+        formatters (Optional[Dict[str, Formatter]]): Per-column formatters
+        table_class (Optional[str]): Value of the table's class attribute
+        chunk_rows (int): Rows per yielded chunk
+
+    Yields:
+        str: Table markup fragments; ''.join() of them is the full table
+    """
+    class_attr = f' class="{escape(table_class)}"' if table_class else ''
+    header_cells = ''.join(f'<th>{escape(str(h))}</th>' for h in (headers or columns))
+    yield f'<table{class_attr}><tbody><tr>{header_cells}</tr>'
+
+    if len(df):
+        rows = render_rows(df, columns, formatters).tolist()
+        for start in range(0, len(rows), chunk_rows):
+            yield ''.join(rows[start:start + chunk_rows])
+
+    yield '</tbody></table>'
+
+
+def render_chart_macro(table: Iterable[str], parameters: Dict[str, str],
+                       macro_name: str = 'table-chart') -> Iterator[str]:
+    """
+    Wrap streamed table markup in a Confluence chart macro.
+
+    Args:
+        table (Iterable[str]): Table fragments, e.g. from render_table
+        parameters (Dict[str, str]): Macro parameters (type, title, columns, ...)
+        macro_name (str): Chart macro name
+
+    Yields:
+        str: Macro markup fragments
+    """
+    params = ''.join(
+        f'<ac:parameter ac:name="{escape(name)}">{escape(str(value), quote=False)}</ac:parameter>'
+        for name, value in parameters.items()
+    )
+    yield f'<ac:structured-macro ac:name="{escape(macro_name)}">{params}<ac:rich-text-body>'
+    yield from table
+    yield '</ac:rich-text-body></ac:structured-macro>'
+
+
+def render_attachment_image(filename: str, alt: Optional[str] = None) -> str:
+    """
+    Reference an image attached to the page, instead of inlining it as a base64 data URI.
+
+    Args:
+        filename (str): Attachment file name
+        alt (Optional[str]): Alternative text
+
+    Returns:
+        str: <ac:image> markup
+    """
+    alt_attr = f' ac:alt="{escape(alt)}"' if alt else ''
+    return f'<ac:image{alt_attr}><ri:attachment ri:filename="{escape(filename)}" /></ac:image>'
+
+
+def render_to_string(fragments: Iterable[str]) -> str:
+    """Join streamed fragments into a single storage-format string."""
+    return ''.join(fragments)
+
+
+def paginate_table(df: pd.DataFrame, columns: List[str], headers: Optional[List[str]] = None,
+                   formatters: Optional[Dict[str, Formatter]] = None, table_class: Optional[str] = None,
+                   max_bytes: int = DEFAULT_MAX_PAGE_BYTES) -> List[str]:
+    """
+    Render a table split into several complete tables, each below `max_bytes`
+    of UTF-8 markup, so large tables can be spread across child pages.
+
+    Args:
+        df (pd.DataFrame): Source data
+        columns (List[str]): Columns to render, in order
+        headers (Optional[List[str]]): Header labels; defaults to the column names
+        formatters (Optional[Dict[str, Formatter]]): Per-column formatters
+        table_class (Optional[str]): Value of the table's class attribute
+        max_bytes (int): Size budget per table
+
+    Returns:
+        List[str]: One table per page; a single (possibly empty) table if everything fits
+    """
+    head, tail = list(render_table(df.iloc[:0], columns, headers, formatters, table_class))
+    budget = max_bytes - len(head.encode('utf-8')) - len(tail.encode('utf-8'))
+
+    if not len(df):
+        return [head + tail]
+
+    rows = render_rows(df, columns, formatters)
+    ends = rows.str.encode('utf-8').str.len().to_numpy().cumsum()
+    rows = rows.tolist()
+
+    pages, start = [], 0
+    while start < len(rows):
+        offset = ends[start - 1] if start else 0
+        # Always take at least one row, even if it alone exceeds the budget
+        end = max(int(np.searchsorted(ends, offset + budget, side='right')), start + 1)
+        pages.append(head + ''.join(rows[start:end]) + tail)
+        start = end
+    return pages
+
+
+def child_page_specs(title: str, bodies: List[str], parent_id: Optional[str] = None,
+                     space_key: Optional[str] = None) -> List[dict]:
+    """
+    Build ConfluencePublisher page specs for table parts produced by paginate_table.
+
+    The first part keeps `title`; later parts are published as
+    '<title> (part N)' under `parent_id`.
+
+    Args:
+        title (str): Title of the first page
+        bodies (List[str]): Storage-format body per page
+        parent_id (Optional[str]): Ancestor page id for the extra parts
+        space_key (Optional[str]): Space override
+
+    Returns:
+        List[dict]: Page specs in publish order
+    """
+    specs = []
+    for number, body in enumerate(bodies, start=1):
+        spec = {"title": title if number == 1 else f"{title} (part {number})", "content": body}
+        if number > 1 and parent_id:
+            spec["parent_id"] = parent_id
+        if space_key:
+            spec["space_key"] = space_key
+        specs.append(spec)
+    return specs
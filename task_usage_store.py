@@ -0,0 +1,160 @@
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the columnar formats
+    pa = None
+
+COLUMNAR_FORMATS = ('parquet', 'feather')
+
+# Column types of the task usage summaries; every other column is a string
+INT_COLUMNS = {'TOTAL_JOBS'}
+DATE_COLUMNS = {'DATE'}
+
+# Loaded summaries keyed by absolute path -> (file signature, dataframe)
+_cache: Dict[str, Tuple[tuple, pd.DataFrame]] = {}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("pyarrow is required for Parquet/Feather task usage summaries (pip install pyarrow)")
+
+
+def summary_path(filename: str, output_format: str) -> str:
+    """
+    Return the output path of a summary for the given format.
+
+    Args:
+        filename (str): Base CSV filename, e.g. 'task_usage_report.csv'
+        output_format (str): 'csv', 'parquet' or 'feather'
+    """
+    return f"{os.path.splitext(filename)[0]}.{output_format}"
+
+
+def build_summary_table(headers: List[str], data: Dict[Tuple, int],
+                        execution_timestamp: datetime, execution_user: str) -> 'pa.Table':
+    """
+    Build a typed Arrow table from CSVProcessor summary data.
+
+    Args:
+        headers (List[str]): Column names of the key parts followed by the total column
+        data (Dict[Tuple, int]): Summary totals keyed by tuples of dimension values
+        execution_timestamp (datetime): Run timestamp written on every row
+        execution_user (str): Run user written on every row
+
+    Returns:
+        pa.Table: Table with date32 DATE, int64 TOTAL_JOBS and string dimension columns
+    """
+    _require_pyarrow()
+    key_columns = list(zip(*data.keys())) if data else [()] * (len(headers) - 1)
+
+    arrays = []
+    for name, values in zip(headers[:-1], key_columns):
+        if name in DATE_COLUMNS:
+            arrays.append(pa.array([datetime.strptime(v, '%Y-%m-%d').date() for v in values], type=pa.date32()))
+        else:
+            arrays.append(pa.array(values, type=pa.string()))
+    arrays.append(pa.array(list(data.values()), type=pa.int64()))
+
+    rows = len(data)
+    arrays.append(pa.array([execution_timestamp] * rows, type=pa.timestamp('s')))
+    arrays.append(pa.array([execution_user] * rows, type=pa.string()))
+
+    return pa.Table.from_arrays(arrays, names=headers + ['EXECUTION_TIMESTAMP', 'EXECUTED_BY'])
+
+
+def write_summary_table(path: str, table: 'pa.Table', output_format: str,
+                        partition_cols: Optional[List[str]] = None) -> None:
+    """
+    Write a summary table as Parquet or Feather (Arrow IPC).
+
+    Args:
+        path (str): Output file, or dataset directory when partitioning
+        table (pa.Table): Table to write
+        output_format (str): 'parquet' or 'feather'
+        partition_cols (Optional[List[str]]): Hive-partition a Parquet dataset by these columns
+    """
+    _require_pyarrow()
+    if output_format not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format}. Expected one of {COLUMNAR_FORMATS}")
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+    if partition_cols:
+        if output_format != 'parquet':
+            raise ValueError("Partitioned output is only supported for the parquet format")
+        pq.write_to_dataset(table, path, partition_cols=partition_cols)
+    elif output_format == 'parquet':
+        pq.write_table(table, path)
+    else:
+        # Uncompressed so readers can memory-map the file without decoding it
+        feather.write_feather(table, path, compression='uncompressed')
+
+
+def _signature(path: str) -> tuple:
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in files:
+            stat = os.stat(os.path.join(root, name))
+            entries.append((os.path.join(root, name), stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(entries))
+
+
+def _read(path: str) -> pd.DataFrame:
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        df = pd.read_csv(path)
+        if 'DATE' in df.columns:
+            df['DATE'] = pd.to_datetime(df['DATE'], errors='coerce')
+        return df
+
+    _require_pyarrow()
+    if extension in ('.feather', '.arrow'):
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    else:
+        table = pq.read_table(path, memory_map=True)
+    return table.to_pandas(date_as_object=False)
+
+
+def load_task_usage(path: str) -> pd.DataFrame:
+    """
+    Load a task usage summary written by rep in any supported format.
+
+    CSV files are parsed as before; Feather files are memory-mapped and
+    Parquet files/datasets are read with typed columns, so no text parsing
+    is needed. Results are cached per path and reused until the file (or
+    any file of a partitioned dataset) changes size or mtime.
+
+    Args:
+        path (str): .csv, .parquet, .feather file or partitioned Parquet directory
+
+    Returns:
+        pd.DataFrame: Summary with DATE as datetime64; callers get a shallow copy
+    """
+    key = os.path.abspath(path)
+    signature = _signature(key)
+
+    cached = _cache.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, _read(key))
+        _cache[key] = cached
+
+    return cached[1].copy(deep=False)
+
+
+def clear_cache() -> None:
+    """Drop every cached summary."""
+    _cache.clear()